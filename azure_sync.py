@@ -2,7 +2,8 @@
 Synchronisation Azure pour le projet Youtube-Fon-Scrapping.
 
 Ce module permet de :
-- Synchroniser tous les fichiers audio depuis MinIO vers Azure Blob Storage
+- Synchroniser de façon incrémentale les fichiers audio depuis MinIO vers Azure Blob Storage
+  (objets déjà à jour ignorés, transfert en flux par blocs, pool de workers borné avec retries)
 - Lister les blobs présents dans le conteneur Azure et obtenir des statistiques
 
 Variables d'environnement utilisées :
@@ -13,26 +14,25 @@ Variables d'environnement utilisées :
 - AZURE_ACCOUNT_URL : URL du compte Azure Blob Storage
 - AZURE_SAS_TOKEN : Jeton SAS Azure
 - AZURE_CONTAINER : Nom du conteneur Azure
+- AZURE_SYNC_WORKERS : Nombre de transferts simultanés
+- AZURE_SYNC_RETRIES : Nombre de tentatives par objet
+- AZURE_BLOCK_SIZE : Taille (octets) des blocs envoyés à Azure
+
+Les SDK MinIO et Azure ne sont importés qu'au premier usage ; lancement : python azure_sync.py ou python cli.py sync.
 """
 import os
+import time
+import base64
 import logging
+import threading
+import concurrent.futures
 from datetime import datetime
-from minio import Minio
-from azure.storage.blob import BlobServiceClient
 import argparse
 from dotenv import load_dotenv
+from log_utils import configurer_logging
 
 load_dotenv()
 
-# Configuration du logger
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("azure_sync.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger()
 
 # Configuration MinIO
@@ -45,60 +45,172 @@ MINIO_BUCKET = os.getenv("MINIO_BUCKET")
 AZURE_ACCOUNT_URL = os.getenv("AZURE_ACCOUNT_URL")
 AZURE_SAS_TOKEN = os.getenv("AZURE_SAS_TOKEN")
 AZURE_CONTAINER = os.getenv("AZURE_CONTAINER")
+AZURE_SYNC_WORKERS = int(os.getenv("AZURE_SYNC_WORKERS", "8"))
+AZURE_SYNC_RETRIES = int(os.getenv("AZURE_SYNC_RETRIES", "3"))
+AZURE_BLOCK_SIZE = int(os.getenv("AZURE_BLOCK_SIZE", str(8 * 1024 * 1024)))
+
+_clients = {}
+_clients_lock = threading.Lock()
 
 
-def sync_to_azure():
+def _client(nom):
     """
-    Synchronise tous les fichiers depuis MinIO vers Azure Blob Storage.
-    Parcourt tous les objets du bucket MinIO, les télécharge puis les upload dans Azure Blob Storage.
-    Ajoute des métadonnées sur chaque blob transféré.
+    Retourne le client partagé "minio" ou "azure" (service Blob), créé avec l'import de son SDK au premier usage.
+    Args:
+        nom (str): "minio" ou "azure".
     Returns:
-        None
+        Client MinIO ou BlobServiceClient.
     """
+    with _clients_lock:
+        if nom not in _clients:
+            if nom == "minio":
+                from minio import Minio
+                _clients[nom] = Minio(
+                    MINIO_ENDPOINT,
+                    access_key=MINIO_ACCESS_KEY,
+                    secret_key=MINIO_SECRET_KEY,
+                    secure=False
+                )
+            else:
+                from azure.storage.blob import BlobServiceClient
+                _clients[nom] = BlobServiceClient(
+                    account_url=AZURE_ACCOUNT_URL,
+                    credential=AZURE_SAS_TOKEN
+                )
+        return _clients[nom]
+
+
+def _index_blobs_azure(container_client):
+    """
+    Charge en un seul listing l'etag MinIO et la taille de chaque blob déjà présent dans Azure.
+    Args:
+        container_client: Client du conteneur Azure.
+    Returns:
+        dict: nom du blob -> (minio_etag enregistré en métadonnée, taille)
+    """
+    index = {}
+    for blob in container_client.list_blobs(include=["metadata"]):
+        index[blob.name] = ((blob.metadata or {}).get("minio_etag"), blob.size)
+    return index
+
+
+def _transferer_objet(minio_client, container_client, obj):
+    """
+    Copie un objet MinIO vers Azure en flux : l'objet est lu par blocs de AZURE_BLOCK_SIZE,
+    chaque bloc est envoyé avec stage_block puis la liste des blocs est validée avec les métadonnées.
+    Args:
+        minio_client: Client MinIO.
+        container_client: Client du conteneur Azure.
+        obj: Objet MinIO (résultat de list_objects).
+    Returns:
+        int: Nombre d'octets transférés.
+    """
+    from azure.storage.blob import BlobBlock
+    blob_client = container_client.get_blob_client(obj.object_name)
+    response = minio_client.get_object(MINIO_BUCKET, obj.object_name)
+    blocs = []
+    transferes = 0
     try:
-        # Clients init
-        minio_client = Minio(
-            MINIO_ENDPOINT,
-            access_key=MINIO_ACCESS_KEY,
-            secret_key=MINIO_SECRET_KEY,
-            secure=False
-        )
-        
-        blob_service = BlobServiceClient(
-            account_url=AZURE_ACCOUNT_URL,
-            credential=AZURE_SAS_TOKEN
-        )
-        container_client = blob_service.get_container_client(AZURE_CONTAINER)
+        for i, chunk in enumerate(response.stream(AZURE_BLOCK_SIZE)):
+            block_id = base64.b64encode(f"{i:08d}".encode()).decode()
+            blob_client.stage_block(block_id, chunk, length=len(chunk))
+            blocs.append(BlobBlock(block_id=block_id))
+            transferes += len(chunk)
+    finally:
+        response.close()
+        response.release_conn()
+    blob_client.commit_block_list(
+        blocs,
+        metadata={
+            "minio_etag": obj.etag,
+            "original_size": str(obj.size),
+            "last_modified": obj.last_modified.isoformat()
+        }
+    )
+    return transferes
 
-        # Liste des objets MinIO
-        objects = minio_client.list_objects(MINIO_BUCKET)
-        
-        for obj in objects:
+
+def _transferer_avec_retries(minio_client, container_client, obj, retries=AZURE_SYNC_RETRIES):
+    """
+    Transfère un objet en réessayant avec un délai exponentiel en cas d'erreur.
+    Args:
+        minio_client: Client MinIO.
+        container_client: Client du conteneur Azure.
+        obj: Objet MinIO à transférer.
+        retries (int): Nombre maximal de tentatives.
+    Returns:
+        int: Nombre d'octets transférés.
+    """
+    for tentative in range(retries):
+        try:
+            return _transferer_objet(minio_client, container_client, obj)
+        except Exception as e:
+            if tentative == retries - 1:
+                raise
+            logger.warning(f"Erreur sur {obj.object_name} (tentative {tentative+1}/{retries}): {str(e)}")
+            time.sleep(2 ** tentative)
+
+
+def sync_to_azure(workers=AZURE_SYNC_WORKERS, force=False):
+    """
+    Synchronise de façon incrémentale les fichiers de MinIO vers Azure Blob Storage.
+    Les objets dont l'etag MinIO et la taille correspondent aux métadonnées du blob Azure sont ignorés ;
+    les autres sont copiés en flux par blocs dans un pool de workers borné, avec retries par objet.
+    Args:
+        workers (int): Nombre de transferts simultanés.
+        force (bool): Recopie tous les objets sans comparer avec Azure si True.
+    Returns:
+        dict: Statistiques (transferes, ignores, echecs, octets, duree)
+    """
+    stats = {"transferes": 0, "ignores": 0, "echecs": 0, "octets": 0}
+    verrou = threading.Lock()
+    debut = time.time()
+    try:
+        minio_client = _client("minio")
+        container_client = _client("azure").get_container_client(AZURE_CONTAINER)
+
+        existants = {} if force else _index_blobs_azure(container_client)
+        logger.info(f"{len(existants)} blobs déjà présents dans Azure")
+
+        # Nombre borné de transferts en attente pour ne pas matérialiser tout le bucket en futures
+        places = threading.BoundedSemaphore(workers * 4)
+
+        def _termine(future, obj):
+            places.release()
             try:
-                # Téléchargement depuis MinIO
-                data = minio_client.get_object(MINIO_BUCKET, obj.object_name)
-                
-                # Upload vers Azure
-                blob_client = container_client.get_blob_client(obj.object_name)
-                blob_client.upload_blob(
-                    data.data,
-                    overwrite=True,
-                    metadata={
-                        "minio_etag": obj.etag,
-                        "original_size": str(obj.size),
-                        "last_modified": obj.last_modified.isoformat()
-                    }
-                )
-                
+                octets = future.result()
+                with verrou:
+                    stats["transferes"] += 1
+                    stats["octets"] += octets
                 logger.info(f"Fichier {obj.object_name} synchronisé avec succès")
-                
             except Exception as e:
+                with verrou:
+                    stats["echecs"] += 1
                 logger.error(f"Erreur sur {obj.object_name}: {str(e)}")
-                continue
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            # Liste des objets MinIO
+            for obj in minio_client.list_objects(MINIO_BUCKET, recursive=True):
+                if existants.get(obj.object_name) == (obj.etag, obj.size):
+                    stats["ignores"] += 1
+                    continue
+                places.acquire()
+                future = executor.submit(_transferer_avec_retries, minio_client, container_client, obj)
+                future.add_done_callback(lambda f, obj=obj: _termine(f, obj))
             
     except Exception as e:
         logger.error(f"Erreur de synchronisation globale: {str(e)}")
         raise
+    finally:
+        stats["duree"] = time.time() - debut
+        traites = stats["transferes"] + stats["ignores"]
+        logger.info(
+            f"Synchronisation: {stats['transferes']} transférés, {stats['ignores']} ignorés (déjà à jour), "
+            f"{stats['echecs']} échecs | {stats['octets']/1024/1024:.2f} Mo "
+            f"({stats['octets']/1024/1024/max(stats['duree'], 1e-6):.2f} Mo/s, "
+            f"{traites/max(stats['duree'], 1e-6):.1f} objets/s) en {stats['duree']:.1f}s"
+        )
+    return stats
 
 
 def list_azure_blobs(verbose=True):
@@ -111,11 +223,7 @@ def list_azure_blobs(verbose=True):
         None
     """
     try:
-        blob_service = BlobServiceClient(
-            account_url=AZURE_ACCOUNT_URL,
-            credential=AZURE_SAS_TOKEN
-        )
-        container_client = blob_service.get_container_client(AZURE_CONTAINER)
+        container_client = _client("azure").get_container_client(AZURE_CONTAINER)
 
         blobs = container_client.list_blobs()
         total_count = 0
@@ -136,7 +244,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Synchronisation MinIO vers Azure')
     parser.add_argument('--list', action='store_true', help='Lister les blobs Azure au lieu de synchroniser')
     parser.add_argument('--stats', action='store_true', help='Afficher les statistiques de stockage')
+    parser.add_argument('--workers', type=int, default=AZURE_SYNC_WORKERS, help='Nombre de transferts simultanés')
+    parser.add_argument('--force', action='store_true', help='Recopier tous les objets, même déjà à jour dans Azure')
     args = parser.parse_args()
+    configurer_logging("azure_sync.log")
 
     if args.list:
         logger.info("Démarrage du listing Azure")
@@ -148,5 +259,5 @@ if __name__ == "__main__":
         logger.info("Calcul des statistiques terminé")
     else:
         logger.info("Démarrage de la synchronisation Azure")
-        sync_to_azure()
+        sync_to_azure(workers=args.workers, force=args.force)
         logger.info("Synchronisation terminée")
\ No newline at end of file
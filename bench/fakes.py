@@ -0,0 +1,229 @@
+"""
+Doublures en mémoire des clients de stockage pour les benchmarks de Youtube-Fon-Scrapping.
+
+- MinioFactice : sous-ensemble du client minio.Minio utilisé par le projet (buckets, put/fput/get/stat/list/remove)
+- BlobServiceFactice : sous-ensemble d'azure.storage.blob.BlobServiceClient (conteneur, blocs, métadonnées)
+- installer() : substitue ces doublures et mongomock aux vrais clients avant l'import des modules du projet
+
+Les doublures ne conservent que la taille et l'empreinte MD5 des objets : les flux sont lus en entier
+(le coût du transfert reste mesuré) mais la mémoire ne croît pas avec le volume du catalogue.
+Les états sont partagés entre instances, comme le seraient un serveur MinIO ou un compte Azure.
+"""
+import hashlib
+import threading
+from datetime import datetime, timezone
+from stubs import BLOC
+
+TAILLE_LECTURE = 1024 * 1024
+
+
+class ObjetFactice:
+    """Description d'un objet stocké, avec les attributs lus par le projet (minio.datatypes.Object)."""
+
+    def __init__(self, object_name, size, etag, content_type=None):
+        self.object_name = object_name
+        self.size = size
+        self.etag = etag
+        self.content_type = content_type
+        self.last_modified = datetime.now(timezone.utc)
+        self.is_dir = False
+
+
+class _ReponseFactice:
+    """Corps d'un get_object : contenu synthétique de la taille de l'objet."""
+
+    def __init__(self, taille):
+        self.taille = taille
+        self._position = 0
+
+    def stream(self, amt=TAILLE_LECTURE):
+        while self._position < self.taille:
+            morceau = self.read(amt)
+            yield morceau
+
+    def read(self, amt=None):
+        reste = self.taille - self._position
+        n = reste if amt is None else min(amt, reste)
+        decalage = self._position % len(BLOC)
+        morceau = (BLOC[decalage:] + BLOC * (n // len(BLOC) + 1))[:n]
+        self._position += n
+        return morceau
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class MinioFactice:
+    """
+    Client MinIO en mémoire ; accepte les mêmes arguments de construction que minio.Minio.
+    """
+    _buckets = {}
+    _verrou = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @classmethod
+    def reinitialiser(cls):
+        with cls._verrou:
+            cls._buckets.clear()
+
+    @classmethod
+    def remplir(cls, bucket, nombre, taille, prefixe="seed"):
+        """Crée nombre objets de taille octets dans le bucket (données de départ d'un scénario)."""
+        with cls._verrou:
+            objets = cls._buckets.setdefault(bucket, {})
+            for i in range(nombre):
+                nom = f"{prefixe}{i:06d}.mp3"
+                objets[nom] = ObjetFactice(nom, taille, hashlib.md5(nom.encode()).hexdigest(), "audio/mpeg")
+
+    def bucket_exists(self, bucket):
+        return bucket in self._buckets
+
+    def make_bucket(self, bucket):
+        with self._verrou:
+            self._buckets.setdefault(bucket, {})
+
+    def put_object(self, bucket, object_name, data, length, content_type="application/octet-stream", part_size=0, **kwargs):
+        empreinte = hashlib.md5()
+        taille = 0
+        bloc = part_size or TAILLE_LECTURE
+        while length < 0 or taille < length:
+            morceau = data.read(bloc if length < 0 else min(bloc, length - taille))
+            if not morceau:
+                break
+            empreinte.update(morceau)
+            taille += len(morceau)
+        if length >= 0 and taille != length:
+            raise IOError(f"flux incomplet pour {object_name}: {taille}/{length} octets")
+        with self._verrou:
+            self._buckets.setdefault(bucket, {})[object_name] = ObjetFactice(object_name, taille, empreinte.hexdigest(), content_type)
+        return self._buckets[bucket][object_name]
+
+    def fput_object(self, bucket, object_name, file_path, content_type="application/octet-stream", **kwargs):
+        with open(file_path, "rb") as f:
+            return self.put_object(bucket, object_name, f, -1, content_type=content_type)
+
+    def stat_object(self, bucket, object_name, **kwargs):
+        objet = self._buckets.get(bucket, {}).get(object_name)
+        if objet is None:
+            from minio.error import S3Error
+            raise S3Error(None, "NoSuchKey", "objet absent", f"/{bucket}/{object_name}", None, None, bucket, object_name)
+        return objet
+
+    def list_objects(self, bucket, prefix=None, recursive=False, **kwargs):
+        with self._verrou:
+            objets = sorted(self._buckets.get(bucket, {}).values(), key=lambda o: o.object_name)
+        return iter([o for o in objets if not prefix or o.object_name.startswith(prefix)])
+
+    def remove_object(self, bucket, object_name, **kwargs):
+        with self._verrou:
+            self._buckets.get(bucket, {}).pop(object_name, None)
+
+    def get_object(self, bucket, object_name, **kwargs):
+        return _ReponseFactice(self.stat_object(bucket, object_name).size)
+
+
+class _ProprietesBlob:
+    def __init__(self, name, size, metadata):
+        self.name = name
+        self.size = size
+        self.metadata = metadata
+
+
+class _BlobFactice:
+    def __init__(self, blobs, nom, verrou):
+        self._blobs = blobs
+        self._nom = nom
+        self._verrou = verrou
+        self._blocs = {}
+
+    def stage_block(self, block_id, data, length=None, **kwargs):
+        self._blocs[block_id] = len(data) if length is None else length
+
+    def commit_block_list(self, block_list, metadata=None, **kwargs):
+        taille = sum(self._blocs[getattr(bloc, "id", None) or bloc.block_id] for bloc in block_list)
+        with self._verrou:
+            self._blobs[self._nom] = _ProprietesBlob(self._nom, taille, dict(metadata or {}))
+        self._blocs = {}
+
+
+class _ConteneurFactice:
+    def __init__(self, blobs, verrou):
+        self._blobs = blobs
+        self._verrou = verrou
+
+    def list_blobs(self, name_starts_with=None, include=None, **kwargs):
+        with self._verrou:
+            blobs = list(self._blobs.values())
+        return iter([b for b in blobs if not name_starts_with or b.name.startswith(name_starts_with)])
+
+    def get_blob_client(self, nom):
+        return _BlobFactice(self._blobs, nom, self._verrou)
+
+
+class BlobServiceFactice:
+    """
+    Compte Azure Blob Storage en mémoire ; accepte les mêmes arguments de construction que BlobServiceClient.
+    """
+    _conteneurs = {}
+    _verrou = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @classmethod
+    def reinitialiser(cls):
+        with cls._verrou:
+            cls._conteneurs.clear()
+
+    def get_container_client(self, nom):
+        with self._verrou:
+            blobs = self._conteneurs.setdefault(nom, {})
+        return _ConteneurFactice(blobs, self._verrou)
+
+
+def _corriger_mongomock():
+    """
+    pymongo 4.9+ transmet sort= aux opérations UpdateOne d'un bulk_write, argument que mongomock ignore :
+    il est retiré avant l'appel pour que les écritures groupées de mongo_utils fonctionnent.
+    """
+    from mongomock.collection import BulkOperationBuilder
+    ajouter = BulkOperationBuilder.add_update
+    if getattr(ajouter, "_bench", False):
+        return
+
+    def add_update(self, *args, sort=None, **kwargs):
+        return ajouter(self, *args, **kwargs)
+
+    add_update._bench = True
+    BulkOperationBuilder.add_update = add_update
+
+
+def installer():
+    """
+    Remplace MongoClient (mongomock, base partagée par tous les clients du processus), minio.Minio et
+    azure.storage.blob.BlobServiceClient par les doublures. A appeler avant d'importer les modules du projet.
+    Returns:
+        None
+    """
+    import pymongo
+    import mongomock
+    import minio
+    import azure.storage.blob as azure_blob
+    from mongomock.store import ServerStore
+
+    _corriger_mongomock()
+    base = ServerStore()
+
+    class MongoClientFactice(mongomock.MongoClient):
+        def __init__(self, *args, **kwargs):
+            kwargs.setdefault("_store", base)
+            super().__init__(*args, **kwargs)
+
+    pymongo.MongoClient = MongoClientFactice
+    minio.Minio = MinioFactice
+    azure_blob.BlobServiceClient = BlobServiceFactice
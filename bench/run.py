@@ -0,0 +1,283 @@
+"""
+Benchmark hors ligne de bout en bout du projet Youtube-Fon-Scrapping.
+
+Mesure le débit des chemins critiques sans aucun service externe :
+- scrape : scraper.main() sur un catalogue de playlists servi par le bouchon YouTube Data / SaveTube / CDN
+- retry : retry_failed.retry_failed_downloads() sur autant d'échecs préenregistrés dans MongoDB
+- azure : azure_sync.sync_to_azure() d'un bucket MinIO prérempli vers Azure
+
+MongoDB est remplacé par mongomock, MinIO et Azure par les doublures en mémoire de fakes.py. Chaque
+mesure s'exécute dans un processus neuf (caches, pools et registre de métriques vides, RSS propre),
+dans un répertoire temporaire. Les scénarios sont croisés avec les nombres de workers et les tailles
+de catalogue demandés ; le rapport donne vidéos/minute, octets/seconde, RSS maximal et appels d'API par vidéo.
+
+Avec --reference, les résultats sont comparés à un rapport précédent : une baisse de vidéos/minute
+au-delà de --tolerance est signalée et le script sort en erreur, ce qui permet de l'utiliser avant un déploiement.
+
+Exemple :
+    python bench/run.py --scenarios scrape,retry --workers 4,16 --videos 100,500 --rapport bench.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import functools
+import subprocess
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("scrape", "retry", "azure")
+BUCKET = "audios"
+
+
+def _liste_entiers(valeur):
+    return [int(v) for v in valeur.split(",") if v]
+
+
+def _executer_scenario(config):
+    """
+    Exécute un scénario dans le processus courant (processus enfant) et renvoie ses mesures.
+    Args:
+        config (dict): Scénario, nombre de workers et catalogue.
+    Returns:
+        dict: duree, videos traitées avec succès, octets transférés, rss_max et instantané des métriques.
+    """
+    import resource
+    import fakes
+    from stubs import identifiant_playlist, identifiant_video
+    fakes.installer()
+    import metrics
+
+    stats = {}
+    if config["scenario"] == "scrape":
+        import scraper
+        import googleapiclient.discovery as discovery
+        # scraper importe build au premier client YouTube : la version pointant sur le bouchon est installée avant
+        discovery.build = functools.partial(discovery.build, client_options={"api_endpoint": config["url"] + "/"})
+        scraper.PLAYLISTS = [identifiant_playlist(p) for p in range(config["playlists"])]
+        executer = scraper.main
+    elif config["scenario"] == "retry":
+        import mongo_utils
+        import retry_failed
+        mongo_utils.collection.insert_many([{
+            "video_id": video_id,
+            "url": f"https://www.youtube.com/watch?v={video_id}",
+            "title": f"Bench {video_id}",
+            "status": "failed",
+            "next_retry_at": 0,
+            "timestamp": time.time()
+        } for video_id in (identifiant_video(p, i) for p in range(config["playlists"]) for i in range(config["videos_par_playlist"]))])
+        retry_failed.preparer_planification()
+
+        def executer():
+            while retry_failed.retry_failed_downloads(config["workers"]):
+                pass
+            mongo_utils.close_writes()
+    else:
+        import azure_sync
+        fakes.MinioFactice.remplir(BUCKET, config["playlists"] * config["videos_par_playlist"], config["taille_fichier"])
+
+        def executer():
+            stats.update(azure_sync.sync_to_azure(config["workers"], force=True))
+
+    debut = time.perf_counter()
+    executer()
+    duree = time.perf_counter() - debut
+    instantane = metrics.registre.instantane()["metriques"]
+    if config["scenario"] == "azure":
+        videos, octets = stats["transferes"], stats["octets"]
+    else:
+        import mongo_utils
+        videos = mongo_utils.video_meta_collection.count_documents({"status": "success"})
+        octets = sum(instantane.get("download_bytes_total", {}).values())
+    return {
+        "duree": duree,
+        "videos": videos,
+        "octets": octets,
+        "rss_max": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "metriques": instantane,
+    }
+
+
+def _environnement(url, workers):
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [RACINE, env.get("PYTHONPATH")])),
+        "GOOGLE_API": "bench",
+        "GOOGLE_API_2": "",
+        "SAVETUBE_API_BASE": f"{url}/api",
+        "SAVETUBE_RESOLVER": "http",
+        "PLAYLIST_FULL_CRAWL": "1",
+        "STREAM_TO_MINIO": os.getenv("STREAM_TO_MINIO", "1"),
+        "LINK_CACHE_MONGO": "0",
+        "METRICS_PORT": "0",
+        "MINIO_BUCKET": BUCKET,
+        "AZURE_ACCOUNT_URL": "http://azure.invalid",
+        "AZURE_CONTAINER": "bench",
+        "PIPELINE_RESOLVE_WORKERS": str(workers),
+        "PIPELINE_DOWNLOAD_WORKERS": str(workers),
+        "PIPELINE_UPLOAD_WORKERS": str(workers),
+        "RETRY_WORKERS": str(workers),
+        "AZURE_SYNC_WORKERS": str(workers),
+        "HTTP_POOL_SIZE": str(max(workers, 32)),
+    })
+    return env
+
+
+def mesurer(bouchon, scenario, workers, playlists, videos_par_playlist, taille_fichier, timeout):
+    """
+    Lance un scénario dans un processus enfant et calcule ses indicateurs.
+    Args:
+        bouchon (ServeurBouchon): Serveur local servant le catalogue.
+        scenario (str): scrape, retry ou azure.
+        workers (int): Nombre de workers par étape ou de transferts simultanés.
+        playlists (int): Nombre de playlists du catalogue.
+        videos_par_playlist (int): Nombre de vidéos par playlist.
+        taille_fichier (int): Taille de chaque fichier audio en octets.
+        timeout (float): Durée maximale du scénario en secondes.
+    Returns:
+        dict: Indicateurs du scénario (ou erreur).
+    """
+    bouchon.reinitialiser()
+    catalogue = playlists * videos_par_playlist
+    resultat = {"scenario": scenario, "workers": workers, "catalogue": catalogue}
+    with tempfile.TemporaryDirectory(prefix=f"bench-{scenario}-") as dossier:
+        config = {
+            "scenario": scenario, "workers": workers, "url": bouchon.url, "playlists": playlists,
+            "videos_par_playlist": videos_par_playlist, "taille_fichier": taille_fichier
+        }
+        chemin_config = os.path.join(dossier, "config.json")
+        with open(chemin_config, "w") as f:
+            json.dump(config, f)
+        journal = os.path.join(dossier, "enfant.log")
+        try:
+            with open(journal, "w") as sortie:
+                code = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--enfant", chemin_config],
+                    cwd=dossier, env=_environnement(bouchon.url, workers),
+                    stdout=sortie, stderr=subprocess.STDOUT, timeout=timeout
+                ).returncode
+        except subprocess.TimeoutExpired:
+            return {**resultat, "erreur": f"délai de {timeout:.0f}s dépassé"}
+        chemin_resultat = os.path.join(dossier, "resultat.json")
+        if code != 0 or not os.path.exists(chemin_resultat):
+            with open(journal) as f:
+                return {**resultat, "erreur": f"code {code}: {f.read()[-2000:]}"}
+        with open(chemin_resultat) as f:
+            mesure = json.load(f)
+    appels = dict(bouchon.appels)
+    videos = max(mesure["videos"], 1)
+    duree = max(mesure["duree"], 1e-9)
+    return {
+        **resultat,
+        "videos": mesure["videos"],
+        "duree": round(duree, 3),
+        "videos_par_minute": round(mesure["videos"] / duree * 60, 1),
+        "octets_par_seconde": round(mesure["octets"] / duree),
+        "rss_max_mo": round(mesure["rss_max"] / 1024 / 1024, 1),
+        "appels_api_par_video": round(sum(n for r, n in appels.items() if r.startswith("youtube.")) / videos, 3),
+        "appels_savetube_par_video": round(sum(n for r, n in appels.items() if r.startswith("savetube.")) / videos, 3),
+        "appels": appels,
+        "metriques": mesure["metriques"],
+    }
+
+
+def comparer(resultats, reference, tolerance):
+    """
+    Compare vidéos/minute à un rapport de référence, scénario par scénario.
+    Args:
+        resultats (list): Résultats de l'exécution courante.
+        reference (list): Résultats du rapport de référence.
+        tolerance (float): Baisse relative tolérée (0.2 = 20 %).
+    Returns:
+        list: Messages décrivant les régressions détectées.
+    """
+    index = {(r["scenario"], r["workers"], r["catalogue"]): r for r in reference if "erreur" not in r}
+    regressions = []
+    for r in resultats:
+        ancien = index.get((r["scenario"], r["workers"], r["catalogue"]))
+        if ancien is None or "erreur" in r:
+            continue
+        if r["videos_par_minute"] < ancien["videos_par_minute"] * (1 - tolerance):
+            regressions.append(
+                f"{r['scenario']} workers={r['workers']} catalogue={r['catalogue']}: "
+                f"{r['videos_par_minute']} vidéos/min contre {ancien['videos_par_minute']} en référence"
+            )
+    return regressions
+
+
+def afficher(resultats):
+    """Affiche les résultats sous forme de tableau."""
+    print(f"{'scénario':<8} {'workers':>7} {'vidéos':>7} {'durée s':>8} {'vid/min':>8} {'Mo/s':>8} {'RSS Mo':>7} {'API/vid':>8} {'ST/vid':>7}")
+    for r in resultats:
+        if "erreur" in r:
+            print(f"{r['scenario']:<8} {r['workers']:>7} {r['catalogue']:>7}  ERREUR {r['erreur'].splitlines()[-1] if r['erreur'] else ''}")
+            continue
+        print(
+            f"{r['scenario']:<8} {r['workers']:>7} {r['videos']:>7} {r['duree']:>8.2f} {r['videos_par_minute']:>8.1f} "
+            f"{r['octets_par_seconde'] / 1024 / 1024:>8.2f} {r['rss_max_mo']:>7.1f} "
+            f"{r['appels_api_par_video']:>8.3f} {r['appels_savetube_par_video']:>7.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne du scraper, du retry et de la synchronisation Azure")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Scénarios à exécuter (scrape,retry,azure)")
+    parser.add_argument("--workers", type=_liste_entiers, default=[4, 16], help="Nombres de workers à comparer")
+    parser.add_argument("--videos", type=_liste_entiers, default=[100], help="Tailles de catalogue à comparer")
+    parser.add_argument("--playlists", type=int, default=2, help="Nombre de playlists du catalogue")
+    parser.add_argument("--taille", type=int, default=1024 * 1024, help="Taille de chaque fichier audio (octets)")
+    parser.add_argument("--latence-api", type=float, default=0.02, help="Latence des appels YouTube Data (s)")
+    parser.add_argument("--latence-savetube", type=float, default=0.05, help="Latence des appels SaveTube (s)")
+    parser.add_argument("--latence-fichier", type=float, default=0.0, help="Latence avant chaque réponse du CDN (s)")
+    parser.add_argument("--taux-echec", type=float, default=0.0, help="Probabilité d'échec de /download et des fichiers")
+    parser.add_argument("--taux-doublons", type=float, default=0.0, help="Part des vidéos dont l'audio est un doublon")
+    parser.add_argument("--timeout", type=float, default=1800, help="Durée maximale d'un scénario (s)")
+    parser.add_argument("--rapport", help="Fichier JSON où écrire les résultats")
+    parser.add_argument("--reference", help="Rapport JSON précédent auquel comparer vidéos/minute")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Baisse relative tolérée par rapport à la référence")
+    parser.add_argument("--enfant", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.enfant:
+        with open(args.enfant) as f:
+            config = json.load(f)
+        mesure = _executer_scenario(config)
+        with open(os.path.join(os.path.dirname(args.enfant), "resultat.json"), "w") as f:
+            json.dump(mesure, f)
+        # Les threads d'arrière-plan (écritures MongoDB, pools) ne doivent pas retarder la fin de la mesure
+        os._exit(0)
+
+    from stubs import Catalogue, ServeurBouchon
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    inconnus = set(scenarios) - set(SCENARIOS)
+    if inconnus:
+        parser.error(f"scénarios inconnus: {', '.join(sorted(inconnus))}")
+    resultats = []
+    for nombre in args.videos:
+        videos_par_playlist = math.ceil(nombre / args.playlists)
+        catalogue = Catalogue(args.playlists, videos_par_playlist, args.taille, args.taux_doublons)
+        with ServeurBouchon(catalogue, args.latence_api, args.latence_savetube, args.latence_fichier, args.taux_echec) as bouchon:
+            for scenario in scenarios:
+                for workers in args.workers:
+                    print(f"-> {scenario} workers={workers} catalogue={args.playlists * videos_par_playlist}", flush=True)
+                    resultats.append(mesurer(bouchon, scenario, workers, args.playlists, videos_par_playlist, args.taille, args.timeout))
+    afficher(resultats)
+    if args.rapport:
+        with open(args.rapport, "w") as f:
+            json.dump({"date": time.time(), "parametres": vars(args), "resultats": resultats}, f, indent=2)
+    if args.reference:
+        with open(args.reference) as f:
+            regressions = comparer(resultats, json.load(f)["resultats"], args.tolerance)
+        for message in regressions:
+            print(f"RÉGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+    if any("erreur" in r for r in resultats):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Serveurs locaux remplaçant les services externes pendant les benchmarks de Youtube-Fon-Scrapping.
+
+Un seul serveur HTTP (threadé) rejoue :
+- L'API YouTube Data v3 : /youtube/v3/playlistItems (pagination, ETag/If-None-Match) et /youtube/v3/videos
+- L'API JSON appelée par la page SaveTube : /api/random-cdn, /cdn/v2/info et /cdn/download
+- Le serveur de fichiers du CDN : /files/{video_id}.mp3, contenu synthétique avec Content-Length, ETag et Range ;
+  le contenu commence par l'identifiant de la vidéo, sauf pour une part configurable de doublons qui reprennent
+  à l'octet près le fichier de la première vidéo de leur playlist (réuploads)
+
+Le catalogue est déterministe (playlists "PLbench…" de videos_par_playlist vidéos chacune), la latence
+de chaque famille d'appels et le taux d'échec des appels SaveTube et des fichiers sont configurables.
+Chaque route compte ses appels pour calculer le nombre d'appels par vidéo.
+"""
+import json
+import time
+import random
+import threading
+from collections import Counter
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TAILLE_PAGE = 50
+BLOC = bytes(range(256)) * 4096  # 1 Mio de contenu synthétique, répété pour former les fichiers
+
+
+def identifiant_playlist(p):
+    """Identifiant de la p-ième playlist du catalogue (accepté tel quel par scraper.extraire_playlist_id)."""
+    return f"PLbench{p:04d}"
+
+
+def identifiant_video(p, i):
+    """Identifiant (11 caractères, comme YouTube) de la i-ième vidéo de la p-ième playlist."""
+    return f"b{p:03d}x{i:06d}"
+
+
+class Catalogue:
+    """
+    Catalogue synthétique servi par le serveur.
+    Args:
+        playlists (int): Nombre de playlists.
+        videos_par_playlist (int): Nombre de vidéos par playlist.
+        taille_fichier (int): Taille en octets de chaque fichier audio servi.
+        taux_doublons (float): Part des vidéos dont le fichier est identique à celui de la première de leur playlist.
+        graine (int): Graine du tirage des doublons.
+    """
+
+    def __init__(self, playlists, videos_par_playlist, taille_fichier, taux_doublons=0.0, graine=0):
+        self.taille_fichier = taille_fichier
+        self.playlists = {
+            identifiant_playlist(p): [identifiant_video(p, i) for i in range(videos_par_playlist)]
+            for p in range(playlists)
+        }
+        aleatoire = random.Random(graine)
+        self._sources = {
+            video_id: ids[0]
+            for ids in self.playlists.values() for video_id in ids[1:]
+            if aleatoire.random() < taux_doublons
+        }
+
+    def source(self, video_id):
+        """Vidéo dont le fichier est servi pour video_id (elle-même, ou l'original pour un doublon)."""
+        return self._sources.get(video_id, video_id)
+
+    def videos(self):
+        """Liste de tous les identifiants de vidéos du catalogue."""
+        return [video_id for ids in self.playlists.values() for video_id in ids]
+
+
+class _Gestionnaire(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def bouchon(self):
+        return self.server.bouchon
+
+    def _json(self, corps, statut=200, entetes=None):
+        donnees = json.dumps(corps).encode()
+        self.send_response(statut)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(donnees)))
+        for nom, valeur in (entetes or {}).items():
+            self.send_header(nom, valeur)
+        self.end_headers()
+        self.wfile.write(donnees)
+
+    def _vide(self, statut):
+        self.send_response(statut)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _corps(self):
+        longueur = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(longueur) or b"{}")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {cle: valeurs[0] for cle, valeurs in parse_qs(url.query).items()}
+        if url.path == "/youtube/v3/playlistItems":
+            self.bouchon.compter("youtube.playlistItems", self.bouchon.latence_api)
+            return self._playlist_items(params)
+        if url.path == "/youtube/v3/videos":
+            self.bouchon.compter("youtube.videos", self.bouchon.latence_api)
+            return self._videos(params)
+        if url.path == "/api/random-cdn":
+            self.bouchon.compter("savetube.random-cdn", self.bouchon.latence_savetube)
+            return self._json({"cdn": f"{self.bouchon.url}/cdn"})
+        if url.path.startswith("/files/"):
+            self.bouchon.compter("cdn.fichier", self.bouchon.latence_fichier)
+            if self.bouchon.echec():
+                return self._vide(503)
+            return self._fichier(url.path[len("/files/"):].rsplit(".", 1)[0])
+        self._vide(404)
+
+    def do_HEAD(self):
+        self._vide(405)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        corps = self._corps()
+        if url.path == "/cdn/v2/info":
+            self.bouchon.compter("savetube.info", self.bouchon.latence_savetube)
+            video_id = parse_qs(urlparse(corps.get("url", "")).query).get("v", [""])[0]
+            return self._json({"status": True, "data": {"key": video_id, "title": f"Bench {video_id}", "duration": 200}})
+        if url.path == "/cdn/download":
+            self.bouchon.compter("savetube.download", self.bouchon.latence_savetube)
+            if self.bouchon.echec():
+                return self._vide(500)
+            lien = f"{self.bouchon.url}/files/{corps.get('key')}.mp3"
+            return self._json({"status": True, "data": {"downloadUrl": lien}})
+        self._vide(404)
+
+    def _playlist_items(self, params):
+        ids = self.bouchon.catalogue.playlists.get(params.get("playlistId"))
+        if ids is None:
+            return self._json({"error": {"code": 404, "message": "playlistNotFound"}}, 404)
+        etag = f'"{params.get("playlistId")}-{len(ids)}"'
+        if not params.get("pageToken") and self.headers.get("If-None-Match") == etag:
+            return self._vide(304)
+        debut = int(params.get("pageToken") or 0)
+        page = ids[debut:debut + TAILLE_PAGE]
+        reponse = {
+            "etag": etag,
+            "pageInfo": {"totalResults": len(ids)},
+            "items": [{"snippet": {"resourceId": {"videoId": video_id}}} for video_id in page]
+        }
+        if debut + TAILLE_PAGE < len(ids):
+            reponse["nextPageToken"] = str(debut + TAILLE_PAGE)
+        self._json(reponse, entetes={"ETag": etag})
+
+    def _videos(self, params):
+        ids = [video_id for video_id in params.get("id", "").split(",") if video_id]
+        self._json({"items": [{
+            "id": video_id,
+            "snippet": {"title": f"Bench {video_id}"},
+            "contentDetails": {"duration": "PT3M20S", "caption": "false"}
+        } for video_id in ids]})
+
+    def _fichier(self, video_id):
+        taille = self.bouchon.catalogue.taille_fichier
+        entete = self.bouchon.catalogue.source(video_id).encode()
+        debut, fin = 0, taille - 1
+        plage = self.headers.get("Range", "")
+        if plage.startswith("bytes="):
+            bornes = plage[len("bytes="):].split("-")
+            debut = int(bornes[0] or 0)
+            fin = min(int(bornes[1]), taille - 1) if bornes[1] else taille - 1
+            if debut >= taille:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{taille}")
+                self.send_header("Content-Length", "0")
+                return self.end_headers()
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {debut}-{fin}/{taille}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(fin - debut + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"{video_id}-{taille}"')
+        self.end_headers()
+        position = debut
+        while position <= fin:
+            if position < len(entete):
+                morceau = entete[position:min(len(entete), fin + 1)]
+            else:
+                decalage = position % len(BLOC)
+                morceau = BLOC[decalage:decalage + min(len(BLOC) - decalage, fin - position + 1)]
+            self.wfile.write(morceau)
+            position += len(morceau)
+
+
+class ServeurBouchon:
+    """
+    Serveur HTTP local simulant YouTube Data, SaveTube et son CDN.
+    S'utilise comme gestionnaire de contexte : le serveur écoute en entrée et s'arrête en sortie.
+    Args:
+        catalogue (Catalogue): Catalogue servi.
+        latence_api (float): Latence ajoutée à chaque appel YouTube Data (secondes).
+        latence_savetube (float): Latence ajoutée à chaque appel JSON SaveTube (secondes).
+        latence_fichier (float): Latence ajoutée avant chaque réponse du serveur de fichiers (secondes).
+        taux_echec (float): Probabilité qu'un appel /download ou un fichier réponde en erreur (500/503).
+        graine (int): Graine du tirage des échecs, pour des exécutions reproductibles.
+    """
+
+    def __init__(self, catalogue, latence_api=0.0, latence_savetube=0.0, latence_fichier=0.0, taux_echec=0.0, graine=0):
+        self.catalogue = catalogue
+        self.latence_api = latence_api
+        self.latence_savetube = latence_savetube
+        self.latence_fichier = latence_fichier
+        self.taux_echec = taux_echec
+        self.appels = Counter()
+        self._aleatoire = random.Random(graine)
+        self._verrou = threading.Lock()
+        self._serveur = ThreadingHTTPServer(("127.0.0.1", 0), _Gestionnaire)
+        self._serveur.daemon_threads = True
+        self._serveur.bouchon = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """URL de base du serveur (http://127.0.0.1:port)."""
+        return f"http://127.0.0.1:{self._serveur.server_address[1]}"
+
+    def compter(self, route, latence=0.0):
+        """Compte un appel sur une route puis applique la latence configurée."""
+        with self._verrou:
+            self.appels[route] += 1
+        if latence:
+            time.sleep(latence)
+
+    def echec(self):
+        """Tire au sort l'échec d'un appel selon taux_echec."""
+        with self._verrou:
+            return self._aleatoire.random() < self.taux_echec
+
+    def reinitialiser(self):
+        """Remet les compteurs d'appels à zéro (entre deux scénarios)."""
+        with self._verrou:
+            self.appels.clear()
+
+    def demarrer(self):
+        self._thread = threading.Thread(target=self._serveur.serve_forever, name="bench-bouchon", daemon=True)
+        self._thread.start()
+        return self
+
+    def arreter(self):
+        self._serveur.shutdown()
+        self._serveur.server_close()
+
+    def __enter__(self):
+        return self.demarrer()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.arreter()
+        return False
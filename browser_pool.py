@@ -0,0 +1,184 @@
+"""
+Pool de navigateurs Playwright pour le projet Youtube-Fon-Scrapping.
+
+Ce module fournit :
+- Un ensemble fixe de threads résolveurs, chacun propriétaire d'un navigateur Chromium et d'un contexte persistants
+- L'exécution d'une tâche sur une page neuve d'un de ces contextes
+- Le recyclage d'un navigateur après un nombre d'utilisations donné ou en cas de crash
+
+L'API synchrone de Playwright impose d'utiliser un navigateur depuis le thread qui l'a lancé :
+chaque navigateur vit donc dans son propre thread et les workers de téléchargement lui soumettent des tâches.
+
+Variables d'environnement utilisées :
+- BROWSER_POOL_SIZE : Nombre de navigateurs persistants
+- BROWSER_MAX_USES : Nombre de pages servies par un navigateur avant son recyclage
+"""
+import os
+import queue
+import logging
+import threading
+import concurrent.futures
+from dotenv import load_dotenv
+from metrics import registre
+
+load_dotenv()
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "4"))
+BROWSER_MAX_USES = int(os.getenv("BROWSER_MAX_USES", "50"))
+
+logger = logging.getLogger()
+
+
+class _Emplacement:
+    """
+    Navigateur, contexte et état associé appartenant à un thread résolveur.
+    L'attribut etat est un dictionnaire libre conservé tant que le contexte vit
+    (par exemple pour mémoriser qu'une bannière de consentement a déjà été fermée).
+    """
+
+    def __init__(self, browser, context):
+        self.browser = browser
+        self.context = context
+        self.etat = {}
+        self.utilisations = 0
+
+
+class PoolNavigateurs:
+    """
+    Pool de navigateurs Chromium persistants servant des pages neuves à la demande.
+    Args:
+        taille (int): Nombre de navigateurs (et de threads résolveurs).
+        max_utilisations (int): Nombre de tâches servies avant de recycler un navigateur.
+        options_contexte (callable, optionnel): Fonction sans argument renvoyant les kwargs de browser.new_context.
+        initialiser_contexte (callable, optionnel): Fonction appelée une fois par contexte créé (routes, scripts...).
+    """
+
+    def __init__(self, taille=BROWSER_POOL_SIZE, max_utilisations=BROWSER_MAX_USES,
+                 options_contexte=None, initialiser_contexte=None):
+        self.taille = taille
+        self.max_utilisations = max_utilisations
+        self.options_contexte = options_contexte
+        self.initialiser_contexte = initialiser_contexte
+        self._taches = queue.Queue()
+        self._ferme = False
+        self._threads = []
+        for i in range(taille):
+            thread = threading.Thread(target=self._boucle, name=f"navigateur-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def executer(self, tache):
+        """
+        Exécute une tâche sur une page neuve d'un navigateur du pool et attend son résultat.
+        Args:
+            tache (callable): Fonction tache(page, etat_contexte) exécutée dans le thread du navigateur.
+        Returns:
+            Valeur renvoyée par la tâche (les exceptions de la tâche sont propagées).
+        """
+        if self._ferme:
+            raise RuntimeError("Pool de navigateurs fermé")
+        future = concurrent.futures.Future()
+        self._taches.put((tache, future))
+        return future.result()
+
+    def fermer(self):
+        """
+        Ferme tous les navigateurs du pool après la fin des tâches en cours.
+        Returns:
+            None
+        """
+        if self._ferme:
+            return
+        self._ferme = True
+        for _ in self._threads:
+            self._taches.put(None)
+        for thread in self._threads:
+            thread.join(timeout=30)
+
+    def _lancer(self, playwright):
+        """
+        Lance un navigateur et prépare son contexte (options et initialisation une seule fois).
+        Args:
+            playwright: instance Playwright du thread courant.
+        Returns:
+            _Emplacement: navigateur et contexte prêts à servir des pages.
+        """
+        with registre.histogramme("browser_launch_seconds", "Durée de lancement d'un navigateur et de son contexte").chronometrer():
+            browser = playwright.chromium.launch(headless=True)
+            options = self.options_contexte() if self.options_contexte else {}
+            context = browser.new_context(**options)
+            if self.initialiser_contexte:
+                self.initialiser_contexte(context)
+        registre.compteur("browser_launches_total", "Navigateurs lancés (démarrage et recyclage)").inc()
+        logger.info(f"Navigateur lancé ({threading.current_thread().name})")
+        return _Emplacement(browser, context)
+
+    @staticmethod
+    def _fermer_emplacement(emplacement):
+        """
+        Ferme proprement un navigateur, en ignorant les erreurs d'un navigateur déjà mort.
+        Args:
+            emplacement (_Emplacement): navigateur à fermer.
+        Returns:
+            None
+        """
+        try:
+            emplacement.context.close()
+        except Exception:
+            pass
+        try:
+            emplacement.browser.close()
+        except Exception:
+            pass
+
+    def _boucle(self):
+        """
+        Boucle d'un thread résolveur : lance Playwright, sert les tâches et recycle son navigateur.
+        Returns:
+            None
+        """
+        from playwright.sync_api import sync_playwright
+        playwright = None
+        emplacement = None
+        try:
+            while True:
+                job = self._taches.get()
+                if job is None:
+                    break
+                tache, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if playwright is None:
+                        playwright = sync_playwright().start()
+                    if emplacement is None:
+                        emplacement = self._lancer(playwright)
+                    page = emplacement.context.new_page()
+                    try:
+                        future.set_result(tache(page, emplacement.etat))
+                    finally:
+                        try:
+                            page.close()
+                        except Exception:
+                            pass
+                except BaseException as e:
+                    future.set_exception(e)
+                finally:
+                    if emplacement is not None:
+                        emplacement.utilisations += 1
+                        if not emplacement.browser.is_connected():
+                            logger.warning(f"Navigateur planté ({threading.current_thread().name}), relance au prochain usage")
+                            self._fermer_emplacement(emplacement)
+                            emplacement = None
+                        elif emplacement.utilisations >= self.max_utilisations:
+                            logger.info(f"Recyclage du navigateur après {emplacement.utilisations} utilisations")
+                            self._fermer_emplacement(emplacement)
+                            emplacement = None
+        finally:
+            if emplacement is not None:
+                self._fermer_emplacement(emplacement)
+            if playwright is not None:
+                try:
+                    playwright.stop()
+                except Exception:
+                    pass
@@ -0,0 +1,138 @@
+"""
+Point d'entrée unique du projet Youtube-Fon-Scrapping.
+
+Sous-commandes :
+- scrape : scraping des playlists (modes local, enqueue ou worker, comme scraper.py)
+- retry : gestionnaire de retry des téléchargements échoués (comme retry_failed.py)
+- sync : synchronisation MinIO vers Azure, listing ou statistiques des blobs (comme azure_sync.py)
+- stats : état du pipeline dans MongoDB (logs par statut, vidéos, doublons, file de jobs)
+
+Seul le module de la sous-commande demandée est importé : les commandes courtes (stats, sync --stats)
+ne chargent ni googleapiclient ni la pile navigateur, et les clients MongoDB, MinIO et Azure
+sont créés au premier usage puis partagés par tout le processus.
+
+Exemples :
+    python cli.py scrape --mode worker
+    python cli.py scrape --resume
+    python cli.py retry --once
+    python cli.py sync --workers 16
+    python cli.py stats
+"""
+import os
+import argparse
+from log_utils import configurer_logging
+
+
+def commande_scrape(args):
+    """
+    Lance le scraping dans le mode demandé.
+    Args:
+        args (argparse.Namespace): Arguments de la sous-commande.
+    Returns:
+        None
+    """
+    configurer_logging("youtube_download.log")
+    import scraper
+    mode = args.mode or os.getenv("SCRAPER_MODE", "local")
+    if mode == 'enqueue':
+        scraper.enqueue_catalogue()
+    elif mode == 'worker':
+        scraper.executer_worker(sortir_si_vide=args.exit_when_empty)
+    else:
+        scraper.main(reprise=args.resume)
+
+
+def commande_retry(args):
+    """
+    Lance le gestionnaire de retry (en boucle, ou un seul scan avec --once).
+    Args:
+        args (argparse.Namespace): Arguments de la sous-commande.
+    Returns:
+        None
+    """
+    configurer_logging("youtube_retry_download.log")
+    import retry_failed
+    retry_failed.executer_retry(une_fois=args.once, workers=args.workers or retry_failed.RETRY_WORKERS)
+
+
+def commande_sync(args):
+    """
+    Synchronise MinIO vers Azure, ou liste les blobs Azure (--list, --stats).
+    Args:
+        args (argparse.Namespace): Arguments de la sous-commande.
+    Returns:
+        None
+    """
+    configurer_logging("azure_sync.log")
+    import azure_sync
+    if args.list or args.stats:
+        azure_sync.list_azure_blobs(verbose=args.list)
+    else:
+        azure_sync.sync_to_azure(workers=args.workers or azure_sync.AZURE_SYNC_WORKERS, force=args.force)
+
+
+def commande_stats(args):
+    """
+    Affiche l'état du pipeline : logs par statut, vidéos enregistrées, doublons et file de jobs.
+    Args:
+        args (argparse.Namespace): Arguments de la sous-commande.
+    Returns:
+        None
+    """
+    import mongo_utils
+    import job_queue
+    logs = mongo_utils.get_collection(mongo_utils.MONGO_COLLECTION)
+    videos = mongo_utils.get_collection(mongo_utils.MONGO_VIDEO_COLLECTION)
+    par_statut = {doc["_id"]: doc["count"] for doc in logs.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])}
+    print(f"Logs par statut: {par_statut or 'aucun'}")
+    print(f"Vidéos enregistrées: {videos.count_documents({})} (dont doublons audio: {videos.count_documents({'alias_of': {'$exists': True}})})")
+    print(f"File de jobs: {job_queue.job_stats() or 'vide'}")
+
+
+def construire_parser():
+    """
+    Construit le parser des sous-commandes.
+    Returns:
+        argparse.ArgumentParser: parser du CLI.
+    """
+    parser = argparse.ArgumentParser(description='Youtube-Fon-Scrapping : scraping, retry, synchronisation Azure et statistiques')
+    sous_commandes = parser.add_subparsers(dest='commande', required=True)
+
+    scrape = sous_commandes.add_parser('scrape', help='Scraping massif YouTube vers MinIO')
+    scrape.add_argument('--mode', choices=['local', 'enqueue', 'worker'], default=None,
+                        help="local: énumère et télécharge dans ce processus | enqueue: alimente la file de jobs MongoDB | worker: traite la file de jobs (défaut: SCRAPER_MODE ou local)")
+    scrape.add_argument('--exit-when-empty', action='store_true', help='Mode worker: s\'arrêter quand la file est vide')
+    scrape.add_argument('--resume', action='store_true', help='Mode local: reprendre le dernier run interrompu (manifeste de run)')
+    scrape.set_defaults(fonction=commande_scrape)
+
+    retry = sous_commandes.add_parser('retry', help='Relance des téléchargements échoués')
+    retry.add_argument('--once', action='store_true', help='Un seul scan des échecs dus, puis arrêt')
+    retry.add_argument('--workers', type=int, default=None, help='Nombre de téléchargements relancés simultanément')
+    retry.set_defaults(fonction=commande_retry)
+
+    sync = sous_commandes.add_parser('sync', help='Synchronisation MinIO vers Azure Blob Storage')
+    sync.add_argument('--list', action='store_true', help='Lister les blobs Azure au lieu de synchroniser')
+    sync.add_argument('--stats', action='store_true', help='Afficher les statistiques de stockage')
+    sync.add_argument('--workers', type=int, default=None, help='Nombre de transferts simultanés')
+    sync.add_argument('--force', action='store_true', help='Recopier tous les objets, même déjà à jour dans Azure')
+    sync.set_defaults(fonction=commande_sync)
+
+    stats = sous_commandes.add_parser('stats', help='Etat du pipeline dans MongoDB')
+    stats.set_defaults(fonction=commande_stats)
+    return parser
+
+
+def main(argv=None):
+    """
+    Point d'entrée du CLI.
+    Args:
+        argv (list, optionnel): Arguments de la ligne de commande (sys.argv par défaut).
+    Returns:
+        None
+    """
+    args = construire_parser().parse_args(argv)
+    args.fonction(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Client HTTP partagé pour les téléchargements du projet Youtube-Fon-Scrapping.
+
+Ce module fournit :
+- Un HTTPAdapter unique (pools de connexions par hôte, keep-alive) partagé par tous les threads
+- Une session requests par thread montée sur cet adapter : l'état de session (cookies) reste propre au thread
+  tandis que les connexions TCP/TLS vers les CDN sont réutilisées d'un téléchargement à l'autre
+- La copie d'une réponse vers un fichier ou un tampon d'upload par blocs de grande taille (readinto)
+- Des statistiques de réutilisation des connexions
+
+Variables d'environnement utilisées :
+- HTTP_POOL_HOSTS : Nombre d'hôtes dont le pool de connexions est conservé
+- HTTP_POOL_SIZE : Nombre de connexions conservées par hôte (à aligner sur le nombre de workers)
+- HTTP_BUFFER_SIZE : Taille des blocs de lecture en octets
+- HTTP_TIMEOUT : Délai maximal de connexion et de lecture en secondes
+"""
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "16"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+HTTP_BUFFER_SIZE = int(os.getenv("HTTP_BUFFER_SIZE", str(1024 * 1024)))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+
+_adapter = None
+_adapter_lock = threading.Lock()
+_sessions = threading.local()
+
+
+def _get_adapter():
+    """
+    Retourne l'adapter partagé, créé au premier usage.
+    Returns:
+        HTTPAdapter: adapter dont les pools de connexions sont communs à tous les threads.
+    """
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            _adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE)
+        return _adapter
+
+
+def get_session():
+    """
+    Retourne la session HTTP du thread courant, montée sur l'adapter partagé.
+    Returns:
+        requests.Session: session réutilisant les connexions ouvertes par tous les threads.
+    """
+    session = getattr(_sessions, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = _get_adapter()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _sessions.session = session
+    return session
+
+
+def ouvrir(url, headers=None, timeout=HTTP_TIMEOUT):
+    """
+    Envoie une requête GET en flux via la session partagée (le corps n'est pas lu).
+    S'utilise comme gestionnaire de contexte pour rendre la connexion au pool.
+    Args:
+        url (str): URL à télécharger.
+        headers (dict, optionnel): En-têtes supplémentaires (Range, If-Range...).
+        timeout (float): Délai maximal de connexion et de lecture.
+    Returns:
+        requests.Response: réponse en flux.
+    """
+    return get_session().get(url, headers=headers, stream=True, timeout=timeout)
+
+
+def copier_reponse(response, destination, progression=None, taille_tampon=HTTP_BUFFER_SIZE, empreinte=None):
+    """
+    Copie le corps d'une réponse en flux vers un fichier (ou tout objet ayant write) par blocs de taille_tampon,
+    lus directement dans un tampon réutilisé plutôt que par petits morceaux.
+    Args:
+        response (requests.Response): Réponse ouverte avec stream=True.
+        destination: Objet fichier ouvert en écriture binaire.
+        progression (callable, optionnel): Appelée avec le nombre d'octets de chaque bloc écrit.
+        taille_tampon (int): Taille du tampon de lecture en octets.
+        empreinte (hashlib, optionnel): Condensat mis à jour avec chaque bloc copié.
+    Returns:
+        int: Nombre d'octets copiés.
+    """
+    raw = response.raw
+    raw.decode_content = True
+    tampon = memoryview(bytearray(taille_tampon))
+    total = 0
+    while True:
+        lus = raw.readinto(tampon)
+        if not lus:
+            return total
+        destination.write(tampon[:lus])
+        if empreinte is not None:
+            empreinte.update(tampon[:lus])
+        total += lus
+        if progression is not None:
+            progression(lus)
+
+
+def stats_connexions():
+    """
+    Calcule la réutilisation des connexions : requêtes envoyées et connexions ouvertes sur l'ensemble des pools.
+    Returns:
+        dict: hotes, requetes, connexions, reutilisation (part des requêtes servies par une connexion existante).
+    """
+    if _adapter is None:
+        return {"hotes": 0, "requetes": 0, "connexions": 0, "reutilisation": 0.0}
+    pools = _adapter.poolmanager.pools
+    liste = [pool for pool in (pools.get(cle) for cle in pools.keys()) if pool is not None]
+    requetes = sum(pool.num_requests for pool in liste)
+    connexions = sum(pool.num_connections for pool in liste)
+    return {
+        "hotes": len(liste),
+        "requetes": requetes,
+        "connexions": connexions,
+        "reutilisation": 1 - connexions / requetes if requetes else 0.0,
+    }
+
+
+def etat_connexions():
+    """
+    Décrit la réutilisation des connexions pour l'affichage de la progression.
+    Returns:
+        str: "http=connexions/requêtes (xx% réutilisées)"
+    """
+    stats = stats_connexions()
+    return f"http={stats['connexions']}/{stats['requetes']} ({stats['reutilisation'] * 100:.0f}% réutilisées)"
@@ -0,0 +1,193 @@
+"""
+File de travail distribuée dans MongoDB pour le projet Youtube-Fon-Scrapping.
+
+Ce module permet à plusieurs conteneurs scraper de se partager un même catalogue :
+- Ajouter les vidéos énumérées dans une collection de jobs (sans doublon, upsert sur video_id)
+- Réserver atomiquement un job avec un bail (find_one_and_update : propriétaire, expiration, heartbeat)
+- Prolonger les baux des jobs en cours et faire avancer leur état
+- Récupérer les jobs dont le bail a expiré (worker arrêté ou planté)
+
+Etats d'un job : pending -> resolving -> downloading -> uploaded, ou failed après JOB_MAX_ATTEMPTS tentatives.
+
+Variables d'environnement utilisées :
+- MONGO_JOB_COLLECTION : Nom de la collection des jobs
+- JOB_LEASE_SECONDS : Durée du bail d'un job réservé (secondes)
+- JOB_MAX_ATTEMPTS : Nombre maximal de tentatives par job
+"""
+import os
+import time
+from pymongo import UpdateOne, ReturnDocument, ASCENDING
+from dotenv import load_dotenv
+from mongo_utils import get_collection
+
+load_dotenv()
+
+JOB_COLLECTION = os.getenv("MONGO_JOB_COLLECTION", "jobs")
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+PENDING = "pending"
+RESOLVING = "resolving"
+DOWNLOADING = "downloading"
+UPLOADED = "uploaded"
+FAILED = "failed"
+ETATS_ACTIFS = [RESOLVING, DOWNLOADING]
+
+
+
+def _jobs():
+    """Collection des jobs (client MongoDB partagé de mongo_utils, créé au premier usage)."""
+    return get_collection(JOB_COLLECTION)
+
+
+def ensure_job_indexes():
+    """
+    Crée les index de la collection des jobs (video_id unique, recherche des jobs réservables).
+    Returns:
+        bool: True si les index sont en place, False en cas d'échec.
+    """
+    try:
+        _jobs().create_index([("video_id", ASCENDING)], unique=True)
+        _jobs().create_index([("state", ASCENDING), ("lease_expires", ASCENDING)])
+        return True
+    except Exception as e:
+        print(f"Erreur création des index de la file de jobs: {e}")
+        return False
+
+
+def enqueue_jobs(videos, taille_lot=500):
+    """
+    Ajoute des vidéos à la file de jobs ; les vidéos déjà présentes (quel que soit leur état) sont ignorées.
+    Args:
+        videos (iterable): Dictionnaires vidéo (video_id, url, title, duration...).
+        taille_lot (int): Nombre d'upserts envoyés par bulk_write.
+    Returns:
+        int: Nombre de jobs réellement créés.
+    """
+    crees = 0
+    lot = []
+
+    def _envoyer():
+        nonlocal crees
+        if lot:
+            crees += _jobs().bulk_write(lot, ordered=False).upserted_count
+            lot.clear()
+
+    for video in videos:
+        job = {k: v for k, v in video.items() if k not in ("status", "audio_path")}
+        job.update({"state": PENDING, "attempts": 0, "created_at": time.time()})
+        lot.append(UpdateOne({"video_id": video["video_id"]}, {"$setOnInsert": job}, upsert=True))
+        if len(lot) >= taille_lot:
+            _envoyer()
+    _envoyer()
+    return crees
+
+
+def claim_job(owner, lease=JOB_LEASE_SECONDS):
+    """
+    Réserve atomiquement un job disponible (en attente, ou actif avec un bail expiré),
+    en privilégiant les jobs jamais tentés puis les plus anciens.
+    Args:
+        owner (str): Identifiant du worker (hôte + pid).
+        lease (int): Durée du bail en secondes.
+    Returns:
+        dict ou None: Job réservé (état resolving), ou None si la file est vide.
+    """
+    now = time.time()
+    return _jobs().find_one_and_update(
+        {
+            "attempts": {"$lt": JOB_MAX_ATTEMPTS},
+            "$or": [
+                {"state": PENDING},
+                {"state": {"$in": ETATS_ACTIFS}, "lease_expires": {"$lt": now}}
+            ]
+        },
+        {
+            "$set": {"state": RESOLVING, "owner": owner, "lease_expires": now + lease, "heartbeat": now},
+            "$inc": {"attempts": 1}
+        },
+        sort=[("attempts", ASCENDING), ("created_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def heartbeat(video_ids, owner, lease=JOB_LEASE_SECONDS):
+    """
+    Prolonge le bail des jobs en cours d'un worker.
+    Args:
+        video_ids (iterable): Identifiants des vidéos en cours de traitement.
+        owner (str): Identifiant du worker propriétaire.
+        lease (int): Nouvelle durée du bail en secondes.
+    Returns:
+        int: Nombre de jobs prolongés.
+    """
+    video_ids = list(video_ids)
+    if not video_ids:
+        return 0
+    now = time.time()
+    result = _jobs().update_many(
+        {"video_id": {"$in": video_ids}, "owner": owner, "state": {"$in": ETATS_ACTIFS}},
+        {"$set": {"lease_expires": now + lease, "heartbeat": now}}
+    )
+    return result.modified_count
+
+
+def set_job_state(video_id, owner, state, **champs):
+    """
+    Fait avancer l'état d'un job, uniquement s'il appartient encore au worker appelant.
+    Args:
+        video_id (str): Identifiant de la vidéo.
+        owner (str): Identifiant du worker propriétaire.
+        state (str): Nouvel état (resolving, downloading, uploaded, failed ou pending pour le remettre en file).
+        **champs: Champs supplémentaires à enregistrer sur le job.
+    Returns:
+        bool: True si le job a été mis à jour.
+    """
+    update = {"$set": {"state": state, "updated_at": time.time(), **champs}}
+    if state not in ETATS_ACTIFS:
+        update["$unset"] = {"lease_expires": "", "owner": ""}
+    result = _jobs().update_one({"video_id": video_id, "owner": owner}, update)
+    return result.modified_count == 1
+
+
+def finish_job(video_id, owner, success, attempts):
+    """
+    Termine un job : uploaded en cas de succès, remis en attente s'il reste des tentatives, failed sinon.
+    Args:
+        video_id (str): Identifiant de la vidéo.
+        owner (str): Identifiant du worker propriétaire.
+        success (bool): Résultat du traitement.
+        attempts (int): Nombre de tentatives déjà consommées.
+    Returns:
+        str: Etat final enregistré.
+    """
+    if success:
+        state = UPLOADED
+    elif attempts < JOB_MAX_ATTEMPTS:
+        state = PENDING
+    else:
+        state = FAILED
+    set_job_state(video_id, owner, state)
+    return state
+
+
+def expire_stale_jobs():
+    """
+    Passe en failed les jobs actifs dont le bail a expiré et qui n'ont plus de tentative disponible.
+    Returns:
+        int: Nombre de jobs marqués en échec.
+    """
+    result = _jobs().update_many(
+        {"state": {"$in": ETATS_ACTIFS}, "lease_expires": {"$lt": time.time()}, "attempts": {"$gte": JOB_MAX_ATTEMPTS}},
+        {"$set": {"state": FAILED, "updated_at": time.time()}, "$unset": {"lease_expires": "", "owner": ""}}
+    )
+    return result.modified_count
+
+
+def job_stats():
+    """
+    Compte les jobs par état.
+    Returns:
+        dict: état -> nombre de jobs.
+    """
+    return {doc["_id"]: doc["count"] for doc in _jobs().aggregate([{"$group": {"_id": "$state", "count": {"$sum": 1}}}])}
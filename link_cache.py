@@ -0,0 +1,176 @@
+"""
+Cache des liens de téléchargement SaveTube pour le projet Youtube-Fon-Scrapping.
+
+Résoudre un lien SaveTube coûte une session navigateur complète ; un lien obtenu reste pourtant valable
+un certain temps. Ce module conserve les liens résolus par (video_id, qualité) :
+- Un niveau en mémoire (LRU borné) propre au processus
+- Un niveau MongoDB optionnel partagé entre conteneurs (scraper, workers, service de retry),
+  purgé automatiquement par un index TTL
+- Une durée de validité configurable, et une invalidation explicite quand le serveur répond 403/404/410
+
+Variables d'environnement utilisées :
+- LINK_CACHE_TTL : Durée de validité d'un lien résolu (secondes)
+- LINK_CACHE_SIZE : Nombre maximal de liens conservés en mémoire
+- LINK_CACHE_MONGO : "1" pour partager les liens via MongoDB, "0" pour le cache en mémoire seul
+- MONGO_LINK_COLLECTION : Nom de la collection des liens
+"""
+import os
+import time
+import threading
+from datetime import datetime, timezone
+from collections import OrderedDict
+from pymongo import ASCENDING
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LINK_CACHE_TTL = float(os.getenv("LINK_CACHE_TTL", "1800"))
+LINK_CACHE_SIZE = int(os.getenv("LINK_CACHE_SIZE", "1000"))
+LINK_CACHE_MONGO = os.getenv("LINK_CACHE_MONGO", "0") == "1"
+MONGO_LINK_COLLECTION = os.getenv("MONGO_LINK_COLLECTION", "download_links")
+
+# Statuts HTTP indiquant qu'un lien a expiré ou n'est plus servi
+STATUTS_LIEN_EXPIRE = (403, 404, 410)
+
+
+def est_lien_expire(erreur):
+    """
+    Indique si une erreur de téléchargement signifie que le lien n'est plus valable (HTTP 403, 404 ou 410).
+    Args:
+        erreur (Exception): Erreur levée pendant le téléchargement.
+    Returns:
+        bool: True si le lien doit être retiré du cache.
+    """
+    response = getattr(erreur, "response", None)
+    return getattr(response, "status_code", None) in STATUTS_LIEN_EXPIRE
+
+
+class CacheLiens:
+    """
+    Cache à deux niveaux des liens résolus : LRU en mémoire, puis collection MongoDB optionnelle.
+    Args:
+        taille (int): Nombre maximal d'entrées en mémoire.
+        ttl (float): Durée de validité d'un lien en secondes.
+        collection (Collection, optionnel): Collection MongoDB partagée ; None pour le cache en mémoire seul.
+    """
+
+    def __init__(self, taille=LINK_CACHE_SIZE, ttl=LINK_CACHE_TTL, collection=None):
+        self.taille = taille
+        self.ttl = ttl
+        self.collection = collection
+        self.hits = 0
+        self.misses = 0
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    @staticmethod
+    def _cle(video_id, qualite):
+        return f"{video_id}:{qualite}"
+
+    def _memoriser(self, cle, titre, lien, expire):
+        with self._verrou:
+            self._entrees[cle] = (expire, titre, lien)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille:
+                self._entrees.popitem(last=False)
+
+    def get(self, video_id, qualite):
+        """
+        Retourne le lien encore valable d'une vidéo, depuis la mémoire ou MongoDB.
+        Args:
+            video_id (str): Identifiant de la vidéo.
+            qualite (str): Qualité demandée à SaveTube.
+        Returns:
+            tuple ou None: (titre, lien), None si absent ou expiré.
+        """
+        cle = self._cle(video_id, qualite)
+        now = time.time()
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                if entree[0] > now:
+                    self._entrees.move_to_end(cle)
+                    self.hits += 1
+                    return entree[1], entree[2]
+                del self._entrees[cle]
+        if self.collection is not None:
+            try:
+                doc = self.collection.find_one({"_id": cle, "expire_at": {"$gt": datetime.now(timezone.utc)}})
+            except Exception as e:
+                print(f"Erreur lecture du cache de liens: {e}")
+                doc = None
+            if doc:
+                expire = doc["expire_at"].replace(tzinfo=timezone.utc).timestamp()
+                self._memoriser(cle, doc["titre"], doc["lien"], expire)
+                self.hits += 1
+                return doc["titre"], doc["lien"]
+        self.misses += 1
+        return None
+
+    def put(self, video_id, qualite, titre, lien):
+        """
+        Enregistre un lien résolu pour LINK_CACHE_TTL secondes.
+        Args:
+            video_id (str): Identifiant de la vidéo.
+            qualite (str): Qualité demandée à SaveTube.
+            titre (str): Titre de la vidéo renvoyé par SaveTube.
+            lien (str): Lien de téléchargement.
+        Returns:
+            None
+        """
+        cle = self._cle(video_id, qualite)
+        expire = time.time() + self.ttl
+        self._memoriser(cle, titre, lien, expire)
+        if self.collection is not None:
+            try:
+                self.collection.replace_one(
+                    {"_id": cle},
+                    {"titre": titre, "lien": lien, "expire_at": datetime.fromtimestamp(expire, timezone.utc)},
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"Erreur écriture du cache de liens: {e}")
+
+    def invalider(self, video_id, qualite):
+        """
+        Retire un lien du cache (lien expiré ou refusé par le serveur).
+        Args:
+            video_id (str): Identifiant de la vidéo.
+            qualite (str): Qualité demandée à SaveTube.
+        Returns:
+            None
+        """
+        cle = self._cle(video_id, qualite)
+        with self._verrou:
+            self._entrees.pop(cle, None)
+        if self.collection is not None:
+            try:
+                self.collection.delete_one({"_id": cle})
+            except Exception as e:
+                print(f"Erreur invalidation du cache de liens: {e}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_link_cache():
+    """
+    Retourne le cache de liens partagé, créé au premier usage (avec l'index TTL MongoDB si LINK_CACHE_MONGO est activé).
+    Returns:
+        CacheLiens: cache de liens du processus.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            collection = None
+            if LINK_CACHE_MONGO:
+                from mongo_utils import db
+                collection = db[MONGO_LINK_COLLECTION]
+                try:
+                    # Le moniteur TTL de MongoDB supprime les documents dès que expire_at est dépassé
+                    collection.create_index([("expire_at", ASCENDING)], expireAfterSeconds=0)
+                except Exception as e:
+                    print(f"Erreur création de l'index TTL du cache de liens: {e}")
+            _cache = CacheLiens(collection=collection)
+        return _cache
@@ -0,0 +1,294 @@
+"""
+Configuration des logs pour le projet Youtube-Fon-Scrapping.
+
+Les modules ne configurent plus les logs à l'import : chaque point d'entrée (scripts, sous-commandes du CLI)
+appelle configurer_logging avec son propre fichier, ce qui évite qu'un module importé impose le sien.
+
+Ce module fournit :
+- Une chaîne de logs non bloquante : les threads déposent les enregistrements dans une file (QueueHandler),
+  un thread unique (QueueListener) les écrit dans le fichier et sur la console
+- Un format JSON par ligne pour le fichier (horodatage, niveau, thread, message, champs passés en extra=)
+- Des captures HTML compressées (gzip) dans des fichiers séparés, dédupliquées par empreinte et limitées en débit
+- Une barre de progression unique agrégeant tous les transferts en cours
+
+Variables d'environnement utilisées :
+- LOG_JSON : Fichier de log au format JSON par ligne (1) ou texte (0)
+- LOG_SNAPSHOT_DIR : Dossier des captures HTML compressées
+- LOG_SNAPSHOTS_PER_MINUTE : Nombre maximal de captures HTML écrites par minute
+- PROGRESS_BAR : Barre de progression agrégée : auto (terminal uniquement), 1 (toujours) ou 0 (jamais)
+"""
+import os
+import copy
+import json
+import gzip
+import time
+import queue
+import atexit
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+FORMAT_LOG = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_JSON = os.getenv("LOG_JSON", "1") == "1"
+LOG_SNAPSHOT_DIR = os.getenv("LOG_SNAPSHOT_DIR", os.path.join("logs", "snapshots"))
+LOG_SNAPSHOTS_PER_MINUTE = float(os.getenv("LOG_SNAPSHOTS_PER_MINUTE", "6"))
+PROGRESS_BAR = os.getenv("PROGRESS_BAR", "auto")
+
+# Attributs présents sur tout LogRecord : les autres proviennent de extra= et sont ajoutés au JSON
+_ATTRIBUTS_STANDARD = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "taskName"}
+
+
+class FormatJSON(logging.Formatter):
+    """
+    Formate chaque enregistrement en une ligne JSON : ts, niveau, logger, thread, message,
+    exception éventuelle et champs passés avec extra= (video_id, etape, capture...).
+    """
+
+    def format(self, record):
+        document = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "niveau": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for cle, valeur in record.__dict__.items():
+            if cle not in _ATTRIBUTS_STANDARD and not cle.startswith("_"):
+                document[cle] = valeur
+        if record.exc_info:
+            record.exc_text = record.exc_text or self.formatException(record.exc_info)
+        if record.exc_text:
+            document["exception"] = record.exc_text
+        return json.dumps(document, ensure_ascii=False, default=str)
+
+
+class _HandlerFile(QueueHandler):
+    """
+    QueueHandler qui conserve séparément le message et la trace d'exception (le QueueHandler standard
+    les fusionne dans le message), pour que le JSON garde un champ "exception" distinct.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener = None
+
+
+def configurer_logging(fichier, niveau=logging.INFO):
+    """
+    Configure le logger racine : les threads ne font que déposer leurs enregistrements dans une file,
+    un thread dédié les écrit dans le fichier de log du point d'entrée (JSON si LOG_JSON) et sur la console.
+    Sans effet si les logs sont déjà configurés.
+    Args:
+        fichier (str): Chemin du fichier de log.
+        niveau (int): Niveau minimal des messages.
+    Returns:
+        None
+    """
+    global _listener
+    racine = logging.getLogger()
+    if racine.handlers:
+        return
+    handler_fichier = logging.FileHandler(fichier)
+    handler_fichier.setFormatter(FormatJSON() if LOG_JSON else logging.Formatter(FORMAT_LOG))
+    handler_console = logging.StreamHandler()
+    handler_console.setFormatter(logging.Formatter(FORMAT_LOG))
+    file_logs = queue.SimpleQueue()
+    _listener = QueueListener(file_logs, handler_fichier, handler_console, respect_handler_level=True)
+    _listener.start()
+    racine.setLevel(niveau)
+    racine.addHandler(_HandlerFile(file_logs))
+    atexit.register(arreter_logging)
+
+
+def arreter_logging():
+    """
+    Vide la file de logs et arrête le thread d'écriture ; les messages émis ensuite (autres
+    fonctions de sortie du programme) sont écrits directement par les handlers du fichier et de la console.
+    Returns:
+        None
+    """
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    racine = logging.getLogger()
+    for handler in list(racine.handlers):
+        if isinstance(handler, QueueHandler):
+            racine.removeHandler(handler)
+    for handler in listener.handlers:
+        racine.addHandler(handler)
+
+
+class _CapturesHTML:
+    """
+    Ecrit les captures HTML dans LOG_SNAPSHOT_DIR : une page déjà capturée (même empreinte) n'est pas réécrite,
+    et au plus LOG_SNAPSHOTS_PER_MINUTE captures sont écrites par minute (seau à jetons).
+    """
+
+    def __init__(self, par_minute=LOG_SNAPSHOTS_PER_MINUTE, dossier=LOG_SNAPSHOT_DIR, memoire=1024):
+        self.dossier = dossier
+        self.par_minute = par_minute
+        self.jetons = max(par_minute, 1)
+        self.dernier = time.monotonic()
+        self.empreintes = OrderedDict()
+        self.memoire = memoire
+        self.stats = {"ecrites": 0, "doublons": 0, "limitees": 0}
+        self.verrou = threading.Lock()
+
+    def _recharger(self):
+        maintenant = time.monotonic()
+        self.jetons = min(max(self.par_minute, 1), self.jetons + (maintenant - self.dernier) * self.par_minute / 60)
+        self.dernier = maintenant
+
+    def capturer(self, source, contexte, video_id=None):
+        with self.verrou:
+            self._recharger()
+            if self.par_minute <= 0 or self.jetons < 1:
+                self.stats["limitees"] += 1
+                return None
+        # La page n'est lue (page.content() peut coûter cher) que si une capture peut être écrite
+        html = source() if callable(source) else source
+        if not html:
+            return None
+        empreinte = hashlib.sha1(html.encode("utf-8", "replace")).hexdigest()
+        with self.verrou:
+            if empreinte in self.empreintes:
+                self.empreintes.move_to_end(empreinte)
+                self.stats["doublons"] += 1
+                return self.empreintes[empreinte]
+            self.jetons -= 1
+            horodatage = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+            chemin = os.path.join(self.dossier, f"{horodatage}-{contexte}-{video_id or 'inconnu'}-{empreinte[:12]}.html.gz")
+            self.empreintes[empreinte] = chemin
+            if len(self.empreintes) > self.memoire:
+                self.empreintes.popitem(last=False)
+            self.stats["ecrites"] += 1
+        os.makedirs(self.dossier, exist_ok=True)
+        with gzip.open(chemin, "wt", encoding="utf-8") as f:
+            f.write(html)
+        return chemin
+
+
+_captures = _CapturesHTML()
+
+
+def capturer_html(source, contexte, video_id=None):
+    """
+    Enregistre une page HTML dans un fichier compressé séparé, pour analyse, au lieu de la recopier dans les logs.
+    Args:
+        source (str ou callable): Contenu HTML, ou fonction le renvoyant (appelée seulement si la capture est permise).
+        contexte (str): Origine de la capture (utilisée dans le nom du fichier).
+        video_id (str, optionnel): Vidéo concernée.
+    Returns:
+        str ou None: Chemin de la capture (existante si la même page a déjà été capturée), None si limitée ou vide.
+    """
+    try:
+        return _captures.capturer(source, contexte, video_id)
+    except Exception as e:
+        logging.getLogger().warning(f"Capture HTML impossible ({contexte}): {e}")
+        return None
+
+
+def stats_captures():
+    """
+    Retourne les compteurs des captures HTML : écrites, doublons ignorés et captures limitées par le débit.
+    Returns:
+        dict: compteurs des captures.
+    """
+    with _captures.verrou:
+        return dict(_captures.stats)
+
+
+_barre = None
+_barre_lock = threading.Lock()
+
+
+class SuiviTransfert:
+    """
+    Suivi d'un transfert (fichier ou flux) reporté sur la barre de progression agrégée.
+    Expose n, total, update() et reset() comme une barre tqdm ; le total restant d'un transfert
+    interrompu est retiré du total global à la sortie.
+    """
+
+    def __init__(self, barre, total=None):
+        self._barre = barre
+        self.n = 0
+        self._total = 0
+        self.total = total
+
+    @property
+    def total(self):
+        return self._total or None
+
+    @total.setter
+    def total(self, valeur):
+        valeur = valeur or 0
+        with _barre_lock:
+            if self._barre is not None:
+                self._barre.total = (self._barre.total or 0) + valeur - self._total
+                self._barre.refresh()
+        self._total = valeur
+
+    def update(self, taille):
+        # Un même transfert peut être alimenté par plusieurs threads (téléchargement par plages)
+        with _barre_lock:
+            self.n += taille
+            if self._barre is not None:
+                self._barre.update(taille)
+
+    def reset(self):
+        self.update(-self.n)
+
+    def __enter__(self):
+        if self._barre is not None:
+            with _barre_lock:
+                self._barre.set_postfix(transferts=_actifs(1), refresh=False)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._total > self.n:
+            self.total = self.n
+        if self._barre is not None:
+            with _barre_lock:
+                self._barre.set_postfix(transferts=_actifs(-1), refresh=False)
+        return False
+
+
+_transferts_actifs = 0
+
+
+def _actifs(delta):
+    global _transferts_actifs
+    _transferts_actifs += delta
+    return _transferts_actifs
+
+
+def suivi_transfert(total=None):
+    """
+    Retourne le suivi d'un nouveau transfert, agrégé dans une barre de progression unique (octets reçus /
+    octets attendus de tous les transferts en cours), rafraîchie au plus une fois par seconde.
+    Args:
+        total (int, optionnel): Taille attendue du transfert si connue.
+    Returns:
+        SuiviTransfert: suivi utilisable comme gestionnaire de contexte.
+    """
+    global _barre
+    if PROGRESS_BAR != "0":
+        with _barre_lock:
+            if _barre is None:
+                from tqdm import tqdm
+                _barre = tqdm(desc="Transferts", total=0, unit='B', unit_scale=True, unit_divisor=1024,
+                              mininterval=1.0, disable=None if PROGRESS_BAR == "auto" else False)
+    return SuiviTransfert(_barre if _barre is not None and not _barre.disable else None, total)
@@ -0,0 +1,396 @@
+"""
+Métriques et traces d'exécution pour le projet Youtube-Fon-Scrapping.
+
+Ce module fournit un registre de métriques léger, en mémoire et thread-safe :
+- Compteurs (octets téléchargés, appels API, écritures MongoDB...) et histogrammes de durées, avec étiquettes
+- Jauges calculées à la lecture (profondeur des files du pipeline, limites de concurrence...)
+- Exposition au format texte Prometheus sur http://0.0.0.0:METRICS_PORT/metrics (et /metrics.json)
+- Instantanés JSON périodiques dans un fichier
+- Une trace optionnelle au format Chrome Trace (chrome://tracing, Perfetto) : une ligne par vidéo,
+  un segment par étape (résolution, téléchargement, upload...)
+
+Variables d'environnement utilisées :
+- METRICS_PORT : Port du serveur /metrics (0 pour le désactiver)
+- METRICS_SNAPSHOT_FILE : Fichier JSON réécrit périodiquement avec l'état du registre (vide pour désactiver)
+- METRICS_SNAPSHOT_INTERVAL : Intervalle entre deux instantanés (secondes)
+- TRACE_FILE : Fichier de trace Chrome écrit à la fin de l'exécution (vide pour désactiver)
+"""
+import os
+import json
+import time
+import atexit
+import bisect
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+load_dotenv()
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_SNAPSHOT_FILE = os.getenv("METRICS_SNAPSHOT_FILE", "")
+METRICS_SNAPSHOT_INTERVAL = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "30"))
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+
+# Seuils (secondes) des histogrammes de durée : de la requête MongoDB à la vidéo de plusieurs heures
+SEUILS_DUREE = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+# Seuils (octets/s) des histogrammes de débit
+SEUILS_DEBIT = (64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6)
+
+
+def _cle_etiquettes(etiquettes):
+    return tuple(sorted(etiquettes.items()))
+
+
+def _format_etiquettes(cle, supplement=None):
+    paires = list(cle) + ([supplement] if supplement else [])
+    if not paires:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in paires) + "}"
+
+
+class Compteur:
+    """
+    Compteur monotone, une valeur par combinaison d'étiquettes.
+    Args:
+        nom (str): Nom de la métrique.
+        aide (str): Description de la métrique.
+    """
+    type = "counter"
+
+    def __init__(self, nom, aide):
+        self.nom = nom
+        self.aide = aide
+        self._valeurs = {}
+        self._verrou = threading.Lock()
+
+    def inc(self, valeur=1, **etiquettes):
+        """Ajoute valeur au compteur des étiquettes données."""
+        cle = _cle_etiquettes(etiquettes)
+        with self._verrou:
+            self._valeurs[cle] = self._valeurs.get(cle, 0) + valeur
+
+    def valeur(self, **etiquettes):
+        """Valeur courante pour les étiquettes données."""
+        return self._valeurs.get(_cle_etiquettes(etiquettes), 0)
+
+    def exporter(self):
+        with self._verrou:
+            return [(f"{self.nom}{_format_etiquettes(cle)}", valeur) for cle, valeur in self._valeurs.items()]
+
+    def instantane(self):
+        with self._verrou:
+            return {_format_etiquettes(cle) or "total": valeur for cle, valeur in self._valeurs.items()}
+
+
+class Histogramme:
+    """
+    Histogramme à seuils fixes (cumulés à l'export), avec somme et nombre d'observations.
+    Args:
+        nom (str): Nom de la métrique.
+        aide (str): Description de la métrique.
+        seuils (tuple): Bornes supérieures des intervalles.
+    """
+    type = "histogram"
+
+    def __init__(self, nom, aide, seuils=SEUILS_DUREE):
+        self.nom = nom
+        self.aide = aide
+        self.seuils = tuple(seuils)
+        self._series = {}
+        self._verrou = threading.Lock()
+
+    def observer(self, valeur, **etiquettes):
+        """Enregistre une observation pour les étiquettes données."""
+        cle = _cle_etiquettes(etiquettes)
+        with self._verrou:
+            serie = self._series.get(cle)
+            if serie is None:
+                serie = self._series[cle] = [[0] * (len(self.seuils) + 1), 0.0, 0]
+            serie[0][bisect.bisect_left(self.seuils, valeur)] += 1
+            serie[1] += valeur
+            serie[2] += 1
+
+    @contextmanager
+    def chronometrer(self, **etiquettes):
+        """Mesure la durée du bloc et l'enregistre, que le bloc réussisse ou non."""
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observer(time.perf_counter() - debut, **etiquettes)
+
+    def exporter(self):
+        lignes = []
+        with self._verrou:
+            for cle, (intervalles, somme, nombre) in self._series.items():
+                cumul = 0
+                for seuil, n in zip(self.seuils + ("+Inf",), intervalles):
+                    cumul += n
+                    lignes.append((f"{self.nom}_bucket{_format_etiquettes(cle, ('le', seuil))}", cumul))
+                lignes.append((f"{self.nom}_sum{_format_etiquettes(cle)}", somme))
+                lignes.append((f"{self.nom}_count{_format_etiquettes(cle)}", nombre))
+        return lignes
+
+    def instantane(self):
+        with self._verrou:
+            return {
+                _format_etiquettes(cle) or "total": {"count": nombre, "sum": round(somme, 6), "mean": round(somme / nombre, 6) if nombre else 0}
+                for cle, (_, somme, nombre) in self._series.items()
+            }
+
+
+class Jauge:
+    """
+    Jauge calculée à la lecture par une fonction (aucun état conservé).
+    Args:
+        nom (str): Nom de la métrique.
+        aide (str): Description de la métrique.
+        fonction (callable): Renvoie un nombre, ou un dictionnaire {valeur d'étiquette: nombre}.
+        etiquette (str): Nom de l'étiquette si la fonction renvoie un dictionnaire.
+    """
+    type = "gauge"
+
+    def __init__(self, nom, aide, fonction, etiquette="nom"):
+        self.nom = nom
+        self.aide = aide
+        self.fonction = fonction
+        self.etiquette = etiquette
+
+    def _lire(self):
+        try:
+            valeur = self.fonction()
+        except Exception:
+            return {}
+        if isinstance(valeur, dict):
+            return {((self.etiquette, k),): v for k, v in valeur.items()}
+        return {(): valeur}
+
+    def exporter(self):
+        return [(f"{self.nom}{_format_etiquettes(cle)}", valeur) for cle, valeur in self._lire().items()]
+
+    def instantane(self):
+        return {_format_etiquettes(cle) or "total": valeur for cle, valeur in self._lire().items()}
+
+
+class Registre:
+    """
+    Ensemble des métriques du processus, créées à la demande par leur nom.
+    """
+
+    def __init__(self):
+        self._metriques = {}
+        self._verrou = threading.Lock()
+
+    def _obtenir(self, nom, fabrique):
+        with self._verrou:
+            metrique = self._metriques.get(nom)
+            if metrique is None:
+                metrique = self._metriques[nom] = fabrique()
+            return metrique
+
+    def compteur(self, nom, aide=""):
+        """Retourne le compteur nom, créé au premier appel."""
+        return self._obtenir(nom, lambda: Compteur(nom, aide))
+
+    def histogramme(self, nom, aide="", seuils=SEUILS_DUREE):
+        """Retourne l'histogramme nom, créé au premier appel."""
+        return self._obtenir(nom, lambda: Histogramme(nom, aide, seuils))
+
+    def jauge(self, nom, aide, fonction, etiquette="nom"):
+        """Enregistre (ou remplace) la jauge nom calculée par fonction."""
+        with self._verrou:
+            self._metriques[nom] = Jauge(nom, aide, fonction, etiquette)
+            return self._metriques[nom]
+
+    def exporter_texte(self):
+        """
+        Exporte le registre au format texte Prometheus.
+        Returns:
+            str: une ligne HELP/TYPE par métrique puis une ligne par série.
+        """
+        with self._verrou:
+            metriques = list(self._metriques.values())
+        lignes = []
+        for metrique in metriques:
+            lignes.append(f"# HELP {metrique.nom} {metrique.aide}")
+            lignes.append(f"# TYPE {metrique.nom} {metrique.type}")
+            lignes.extend(f"{nom} {valeur}" for nom, valeur in metrique.exporter())
+        return "\n".join(lignes) + "\n"
+
+    def instantane(self):
+        """
+        Retourne l'état du registre sous forme de dictionnaire sérialisable en JSON.
+        Returns:
+            dict: horodatage et valeurs de chaque métrique.
+        """
+        with self._verrou:
+            metriques = list(self._metriques.values())
+        return {"timestamp": time.time(), "metriques": {m.nom: m.instantane() for m in metriques}}
+
+
+registre = Registre()
+
+
+class Trace:
+    """
+    Collecteur d'événements au format Chrome Trace : une "ligne" (tid) par vidéo, un segment par étape.
+    """
+
+    def __init__(self):
+        self._evenements = []
+        self._lignes = {}
+        self._verrou = threading.Lock()
+        self._origine = time.perf_counter()
+
+    def _ligne(self, identifiant):
+        ligne = self._lignes.get(identifiant)
+        if ligne is None:
+            ligne = self._lignes[identifiant] = len(self._lignes) + 1
+            self._evenements.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": ligne, "args": {"name": str(identifiant)}})
+        return ligne
+
+    def segment(self, nom, identifiant, debut, fin, categorie="etape", **args):
+        """
+        Ajoute un segment terminé.
+        Args:
+            nom (str): Nom du segment (étape).
+            identifiant (str): Identifiant de la ligne (video_id).
+            debut (float): Début, en secondes time.perf_counter().
+            fin (float): Fin, en secondes time.perf_counter().
+            categorie (str): Catégorie Chrome Trace.
+            **args: Détails affichés avec le segment.
+        Returns:
+            None
+        """
+        with self._verrou:
+            self._evenements.append({
+                "name": nom, "cat": categorie, "ph": "X", "pid": 1, "tid": self._ligne(identifiant),
+                "ts": (debut - self._origine) * 1e6, "dur": (fin - debut) * 1e6, "args": args
+            })
+
+    def ecrire(self, chemin):
+        """
+        Ecrit la trace dans un fichier JSON lisible par chrome://tracing ou Perfetto.
+        Args:
+            chemin (str): Fichier de sortie.
+        Returns:
+            None
+        """
+        with self._verrou:
+            evenements = list(self._evenements)
+        with open(chemin, "w") as f:
+            json.dump({"traceEvents": evenements, "displayTimeUnit": "ms"}, f)
+
+
+trace = Trace() if TRACE_FILE else None
+
+
+@contextmanager
+def etape(nom, identifiant=None, metrique=None, **etiquettes):
+    """
+    Chronomètre un bloc : histogramme "<metrique>_seconds" et, si la trace est active, segment nom sur la ligne de identifiant.
+    Args:
+        nom (str): Nom de l'étape mesurée (resolve, existence_check...).
+        identifiant (str, optionnel): Ligne de trace (video_id) ; sans identifiant seule la durée est enregistrée.
+        metrique (str, optionnel): Nom de l'histogramme sans le suffixe _seconds (nom par défaut).
+        **etiquettes: Etiquettes de l'histogramme (etape, source...).
+    """
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        fin = time.perf_counter()
+        metrique = metrique or nom
+        registre.histogramme(f"{metrique}_seconds", f"Durée de l'étape {metrique}").observer(fin - debut, **etiquettes)
+        if trace is not None and identifiant is not None:
+            trace.segment(nom, identifiant, debut, fin, **etiquettes)
+
+
+def observer_debit(source, octets, duree):
+    """
+    Enregistre un téléchargement terminé : octets transférés et débit obtenu.
+    Args:
+        source (str): Origine du transfert (disque, flux...).
+        octets (int): Nombre d'octets reçus.
+        duree (float): Durée du transfert en secondes.
+    Returns:
+        None
+    """
+    registre.compteur("download_bytes_total", "Octets téléchargés").inc(octets, source=source)
+    if duree > 0 and octets:
+        registre.histogramme("download_throughput_bytes_per_second", "Débit des téléchargements", SEUILS_DEBIT).observer(octets / duree, source=source)
+
+
+class _Gestionnaire(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            corps, type_contenu = json.dumps(registre.instantane()).encode(), "application/json"
+        elif self.path.startswith("/metrics"):
+            corps, type_contenu = registre.exporter_texte().encode(), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", type_contenu)
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+
+def ecrire_instantane(chemin=METRICS_SNAPSHOT_FILE):
+    """
+    Ecrit l'état du registre dans un fichier JSON (écriture atomique).
+    Args:
+        chemin (str): Fichier de sortie.
+    Returns:
+        None
+    """
+    with open(chemin + ".tmp", "w") as f:
+        json.dump(registre.instantane(), f, indent=1)
+    os.replace(chemin + ".tmp", chemin)
+
+
+_demarre = False
+_demarrage_lock = threading.Lock()
+
+
+def demarrer(port=METRICS_PORT, fichier_instantane=METRICS_SNAPSHOT_FILE, intervalle=METRICS_SNAPSHOT_INTERVAL):
+    """
+    Démarre, une seule fois par processus, les sorties configurées : serveur /metrics, instantanés JSON
+    périodiques et écriture de la trace Chrome à la sortie du programme.
+    Args:
+        port (int): Port du serveur /metrics (0 pour ne pas le démarrer).
+        fichier_instantane (str): Fichier des instantanés JSON (vide pour ne pas en écrire).
+        intervalle (float): Intervalle entre deux instantanés en secondes.
+    Returns:
+        None
+    """
+    global _demarre
+    with _demarrage_lock:
+        if _demarre:
+            return
+        _demarre = True
+    if port:
+        try:
+            serveur = ThreadingHTTPServer(("0.0.0.0", port), _Gestionnaire)
+            serveur.daemon_threads = True
+            threading.Thread(target=serveur.serve_forever, name="metrics-http", daemon=True).start()
+            print(f"Métriques exposées sur http://0.0.0.0:{port}/metrics")
+        except OSError as e:
+            print(f"Erreur démarrage du serveur de métriques sur le port {port}: {e}")
+    if fichier_instantane:
+        def _boucle():
+            while True:
+                time.sleep(intervalle)
+                try:
+                    ecrire_instantane(fichier_instantane)
+                except Exception as e:
+                    print(f"Erreur écriture de l'instantané de métriques: {e}")
+        threading.Thread(target=_boucle, name="metrics-snapshot", daemon=True).start()
+        atexit.register(ecrire_instantane, fichier_instantane)
+    if trace is not None:
+        atexit.register(trace.ecrire, TRACE_FILE)
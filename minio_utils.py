@@ -5,18 +5,35 @@ Ce module fournit des fonctions pour :
 - Vérifier la disponibilité du service MinIO
 - Uploader des fichiers audio dans le bucket MinIO
 - Vérifier la présence d'un fichier dans MinIO et supprimer le fichier local si besoin
+- Lister en une passe les objets présents dans le bucket
+- Uploader un flux (réponse HTTP) en multipart sans passer par le disque
+- Supprimer un objet (doublon d'un audio déjà stocké)
+- Créer le client MinIO au premier usage seulement (import du module sans dépendance chargée)
+- Vérifier (et créer) le bucket une seule fois par processus, au lieu d'un aller-retour par upload
+- Suivre l'état de MinIO avec un disjoncteur : après MINIO_BREAKER_THRESHOLD échecs de connexion consécutifs,
+  les uploads de fichiers sont parqués (au plus MINIO_PARK_MAX) jusqu'au rétablissement du service au lieu
+  d'échouer ; un seul upload d'essai est tenté toutes les MINIO_BREAKER_COOLDOWN secondes
+- Uploader les gros fichiers en multipart, les parts étant envoyées en parallèle (MINIO_UPLOAD_THREADS)
+- Mesurer le débit des uploads (stats_upload)
 
 Variables d'environnement utilisées :
 - MINIO_ENDPOINT : Adresse du service MinIO
 - MINIO_ACCESS_KEY : Clé d'accès MinIO
 - MINIO_SECRET_KEY : Clé secrète MinIO
 - MINIO_BUCKET : Nom du bucket MinIO
+- MINIO_PART_SIZE : Taille (octets) des parts multipart et du tampon mémoire des uploads en flux
+- MINIO_UPLOAD_THREADS : Nombre de parts d'un fichier envoyées en parallèle
+- MINIO_BREAKER_THRESHOLD : Nombre d'échecs de connexion consécutifs qui ouvrent le disjoncteur
+- MINIO_BREAKER_COOLDOWN : Délai (secondes) avant un upload d'essai quand le disjoncteur est ouvert
+- MINIO_PARK_MAX : Nombre maximal d'uploads parqués en attente du rétablissement de MinIO
+- MINIO_PARK_TIMEOUT : Attente maximale (secondes) d'un upload parqué avant d'être déclaré en échec
 """
 import os
-from minio import Minio
-from minio.error import S3Error
+import time
+import threading
 from dotenv import load_dotenv
 import socket
+import mimetypes
 
 load_dotenv()
 
@@ -24,13 +41,39 @@ MINIO_ENDPOINT ="minio:9000"
 MINIO_ACCESS_KEY ="minioadmin"
 MINIO_SECRET_KEY ="minioadmin"
 MINIO_BUCKET ="audios"
+MINIO_PART_SIZE = max(int(os.getenv("MINIO_PART_SIZE", str(16 * 1024 * 1024))), 5 * 1024 * 1024)  # 5 Mio minimum imposé par S3
+MINIO_UPLOAD_THREADS = max(int(os.getenv("MINIO_UPLOAD_THREADS", "4")), 1)
+MINIO_BREAKER_THRESHOLD = max(int(os.getenv("MINIO_BREAKER_THRESHOLD", "5")), 1)
+MINIO_BREAKER_COOLDOWN = float(os.getenv("MINIO_BREAKER_COOLDOWN", "30"))
+MINIO_PARK_MAX = int(os.getenv("MINIO_PARK_MAX", "32"))
+MINIO_PARK_TIMEOUT = float(os.getenv("MINIO_PARK_TIMEOUT", "600"))
 
-client = Minio(
-    MINIO_ENDPOINT,
-    access_key=MINIO_ACCESS_KEY,
-    secret_key=MINIO_SECRET_KEY,
-    secure=False
-)
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    Retourne le client MinIO partagé, créé (avec l'import du SDK) au premier usage.
+    Returns:
+        Minio: client du processus.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            from minio import Minio
+            _client = Minio(
+                MINIO_ENDPOINT,
+                access_key=MINIO_ACCESS_KEY,
+                secret_key=MINIO_SECRET_KEY,
+                secure=False
+            )
+        return _client
+
+def __getattr__(nom):
+    # Accès paresseux (PEP 562) à l'ancien attribut client du module
+    if nom == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
 
 def minio_est_disponible(timeout=3):
     """
@@ -49,31 +92,372 @@ def minio_est_disponible(timeout=3):
         return False
 
 
-def upload_audio(file_path, object_name=None):
+class Disjoncteur:
+    """
+    Disjoncteur suivant la disponibilité de MinIO :
+    - fermé : les uploads passent, les échecs de connexion consécutifs sont comptés
+    - ouvert (après seuil échecs) : les uploads ne sont pas tentés pendant delai secondes
+    - semi-ouvert : un seul upload d'essai passe ; son succès referme le disjoncteur, son échec le rouvre
+    Args:
+        seuil (int): Nombre d'échecs consécutifs qui ouvrent le disjoncteur.
+        delai (float): Durée d'ouverture avant un upload d'essai, en secondes.
+    """
+    FERME, OUVERT, SEMI_OUVERT = "ferme", "ouvert", "semi-ouvert"
+
+    def __init__(self, seuil=MINIO_BREAKER_THRESHOLD, delai=MINIO_BREAKER_COOLDOWN):
+        self.seuil = seuil
+        self.delai = delai
+        self.etat = self.FERME
+        self.echecs = 0
+        self.ouvertures = 0
+        self._ouvert_depuis = 0.0
+        self._condition = threading.Condition()
+
+    def _essai_du(self):
+        return self.etat == self.OUVERT and time.monotonic() - self._ouvert_depuis >= self.delai
+
+    def disponible(self):
+        """Indique, sans réserver l'essai, si un upload serait tenté maintenant."""
+        with self._condition:
+            return self.etat == self.FERME or self._essai_du()
+
+    def autoriser(self):
+        """
+        Réserve le droit de tenter un upload.
+        Returns:
+            bool: True si le disjoncteur est fermé, ou si cet appel obtient l'upload d'essai.
+        """
+        with self._condition:
+            return self._autoriser()
+
+    def _autoriser(self):
+        if self.etat == self.FERME:
+            return True
+        if self._essai_du():
+            self.etat = self.SEMI_OUVERT
+            return True
+        return False
+
+    def attendre(self, timeout):
+        """
+        Attend que le disjoncteur autorise un upload (fermeture, ou upload d'essai obtenu).
+        Args:
+            timeout (float): Attente maximale en secondes.
+        Returns:
+            bool: True si l'upload est autorisé, False à l'expiration du délai.
+        """
+        limite = time.monotonic() + timeout
+        with self._condition:
+            while not self._autoriser():
+                reste = limite - time.monotonic()
+                if reste <= 0:
+                    return False
+                if self.etat == self.OUVERT:
+                    reste = min(reste, max(self._ouvert_depuis + self.delai - time.monotonic(), 0.05))
+                self._condition.wait(reste)
+            return True
+
+    def succes(self):
+        """Enregistre une réponse de MinIO : referme le disjoncteur."""
+        with self._condition:
+            self.echecs = 0
+            if self.etat != self.FERME:
+                print("MinIO rétabli, reprise des uploads")
+                self.etat = self.FERME
+                self._condition.notify_all()
+
+    def echec(self):
+        """Enregistre un échec de connexion à MinIO : ouvre le disjoncteur au-delà du seuil ou si l'essai échoue."""
+        with self._condition:
+            self.echecs += 1
+            if self.etat == self.SEMI_OUVERT or (self.etat == self.FERME and self.echecs >= self.seuil):
+                if self.etat == self.FERME:
+                    print(f"MinIO non disponible ({self.echecs} échecs consécutifs), uploads suspendus {self.delai:.0f}s")
+                    self.ouvertures += 1
+                self.etat = self.OUVERT
+                self._ouvert_depuis = time.monotonic()
+                self._condition.notify_all()
+
+    def abandonner(self):
+        """Libère l'upload d'essai sans conclure (erreur étrangère à MinIO) : un autre essai peut être tenté."""
+        with self._condition:
+            if self.etat == self.SEMI_OUVERT:
+                self.etat = self.OUVERT
+                self._ouvert_depuis = time.monotonic() - self.delai
+                self._condition.notify_all()
+
+
+def _erreur_de_connexion(erreur):
+    """
+    Indique si une erreur traduit l'indisponibilité de MinIO (connexion, délai, erreur serveur 5xx)
+    plutôt qu'un refus de la requête (droits, objet ou bucket absent).
+    Args:
+        erreur (Exception): Erreur levée par le client MinIO.
+    Returns:
+        bool: True si l'erreur doit être comptée par le disjoncteur.
+    """
+    from minio.error import S3Error, ServerError
+    if isinstance(erreur, ServerError):
+        return True
+    if isinstance(erreur, S3Error):
+        return False
+    import urllib3
+    return isinstance(erreur, (urllib3.exceptions.HTTPError, ConnectionError, TimeoutError))
+
+
+class _FluxSurveille:
+    """
+    Enveloppe un flux source pour distinguer ses erreurs de lecture (téléchargement interrompu)
+    des erreurs de MinIO, que seules ces dernières comptent dans le disjoncteur.
+    """
+
+    def __init__(self, flux):
+        self._flux = flux
+        self.erreur = None
+        self.octets = 0
+
+    def read(self, taille=-1):
+        try:
+            data = self._flux.read(taille)
+        except Exception as e:
+            self.erreur = e
+            raise
+        self.octets += len(data or b"")
+        return data
+
+
+class Uploader:
+    """
+    Service d'upload vers le bucket MinIO partagé par les threads du processus :
+    bucket vérifié une seule fois, disjoncteur sur la disponibilité de MinIO, uploads de fichiers parqués
+    pendant une panne (file d'attente bornée) puis relancés, parts multipart envoyées en parallèle,
+    et compteurs de débit.
+    Args:
+        bucket (str): Nom du bucket.
+        part_size (int): Taille des parts multipart en octets.
+        threads (int): Nombre de parts d'un fichier envoyées en parallèle.
+        parcs (int): Nombre maximal d'uploads parqués.
+        attente_parc (float): Attente maximale d'un upload parqué, en secondes.
+    """
+
+    def __init__(self, bucket=MINIO_BUCKET, part_size=MINIO_PART_SIZE, threads=MINIO_UPLOAD_THREADS,
+                 parcs=MINIO_PARK_MAX, attente_parc=MINIO_PARK_TIMEOUT):
+        self.bucket = bucket
+        self.part_size = part_size
+        self.threads = threads
+        self.parcs = parcs
+        self.attente_parc = attente_parc
+        self.disjoncteur = Disjoncteur()
+        self._bucket_pret = False
+        self._parques = 0
+        self._verrou = threading.Lock()
+        self.stats = {"fichiers": 0, "flux": 0, "octets": 0, "secondes": 0.0, "echecs": 0,
+                      "parques": 0, "rejetes": 0}
+
+    def assurer_bucket(self, client):
+        """
+        Vérifie et crée si besoin le bucket, une seule fois tant qu'aucun upload ne le signale absent.
+        Args:
+            client (Minio): Client MinIO.
+        Returns:
+            None
+        """
+        if self._bucket_pret:
+            return
+        with self._verrou:
+            if not self._bucket_pret:
+                if not client.bucket_exists(self.bucket):
+                    client.make_bucket(self.bucket)
+                self._bucket_pret = True
+
+    def _parquer(self, object_name, limite):
+        """
+        Met un upload en attente du rétablissement de MinIO, si la file des uploads parqués n'est pas pleine.
+        Args:
+            object_name (str): Nom de l'objet (messages d'erreur).
+            limite (float): Instant (time.monotonic) au-delà duquel l'upload est abandonné.
+        Returns:
+            bool: True si l'upload peut être relancé, False si la file est pleine ou l'attente expirée.
+        """
+        with self._verrou:
+            if self._parques >= self.parcs:
+                self.stats["rejetes"] += 1
+                return False
+            self._parques += 1
+            self.stats["parques"] += 1
+        try:
+            if self.disjoncteur.attendre(limite - time.monotonic()):
+                return True
+            print(f"MinIO toujours indisponible après {self.attente_parc:.0f}s, upload de {object_name} abandonné")
+            with self._verrou:
+                self.stats["rejetes"] += 1
+            return False
+        finally:
+            with self._verrou:
+                self._parques -= 1
+
+    def _envoyer(self, operation, object_name, source, taille, parquer, erreur_source=None):
+        """
+        Exécute un upload sous le contrôle du disjoncteur et met à jour les compteurs de débit.
+        Args:
+            operation (callable): operation(client) réalisant l'upload.
+            object_name (str): Nom de l'objet (messages d'erreur).
+            source (str): "fichiers" ou "flux".
+            taille (callable): taille() renvoyant le nombre d'octets envoyés après succès.
+            parquer (bool): Parquer l'upload et le relancer pendant une panne au lieu d'échouer.
+            erreur_source (callable, optionnel): erreur_source() renvoyant l'erreur de lecture de la source,
+                qui n'est alors pas imputée à MinIO.
+        Returns:
+            str ou bool: Nom de l'objet uploadé ou False en cas d'échec.
+        """
+        from minio.error import S3Error
+        autorise = self.disjoncteur.autoriser()
+        limite = time.monotonic() + self.attente_parc
+        while True:
+            if not autorise and not (parquer and self._parquer(object_name, limite)):
+                if not parquer:
+                    with self._verrou:
+                        self.stats["rejetes"] += 1
+                print(f"Erreur: MinIO indisponible (disjoncteur {self.disjoncteur.etat}), upload de {object_name} non tenté")
+                return False
+            debut = time.perf_counter()
+            try:
+                client = get_client()
+                self.assurer_bucket(client)
+                operation(client)
+            except Exception as e:
+                if _erreur_de_connexion(e) and not (erreur_source and erreur_source()):
+                    self.disjoncteur.echec()
+                    print(f"Erreur de connexion à MinIO pour {object_name}: {e}")
+                    if parquer:
+                        autorise = self.disjoncteur.autoriser()
+                        continue
+                else:
+                    if isinstance(e, S3Error):
+                        self.disjoncteur.succes()
+                        if e.code == "NoSuchBucket":
+                            self._bucket_pret = False
+                    else:
+                        self.disjoncteur.abandonner()
+                    print(f"Erreur upload Minio ({object_name}): {e}")
+                with self._verrou:
+                    self.stats["echecs"] += 1
+                return False
+            duree = time.perf_counter() - debut
+            self.disjoncteur.succes()
+            with self._verrou:
+                self.stats[source] += 1
+                self.stats["octets"] += taille()
+                self.stats["secondes"] += duree
+            return object_name
+
+    def uploader_fichier(self, file_path, object_name, content_type):
+        """
+        Upload un fichier ; au-delà de part_size il est découpé en parts envoyées par threads en parallèle.
+        Returns:
+            str ou bool: Nom de l'objet uploadé ou False en cas d'échec.
+        """
+        return self._envoyer(
+            lambda client: client.fput_object(self.bucket, object_name, file_path, content_type=content_type,
+                                              part_size=self.part_size, num_parallel_uploads=self.threads),
+            object_name, "fichiers", lambda: os.path.getsize(file_path), parquer=True)
+
+    def uploader_flux(self, stream, object_name, length, part_size, content_type):
+        """
+        Upload un flux en multipart, une part à la fois (mémoire bornée par part_size) ; un flux ne pouvant
+        être relu, il n'est pas parqué : il échoue immédiatement si MinIO est indisponible.
+        Returns:
+            str ou bool: Nom de l'objet uploadé ou False en cas d'échec.
+        """
+        flux = _FluxSurveille(stream)
+        return self._envoyer(
+            # num_parallel_uploads vaut 3 par défaut dans minio-py : chaque flux garderait alors jusqu'à 4 parts en mémoire
+            lambda client: client.put_object(self.bucket, object_name, flux, length, content_type=content_type,
+                                             part_size=part_size, num_parallel_uploads=1),
+            object_name, "flux", lambda: flux.octets, parquer=False, erreur_source=lambda: flux.erreur)
+
+    def etat(self):
+        """
+        Décrit l'état des uploads : nombre, débit moyen, uploads parqués et état du disjoncteur.
+        Returns:
+            dict: compteurs des uploads.
+        """
+        with self._verrou:
+            stats = dict(self.stats)
+            stats["en_attente"] = self._parques
+        stats["debit_moyen"] = stats["octets"] / stats["secondes"] if stats["secondes"] else 0.0
+        stats["disjoncteur"] = self.disjoncteur.etat
+        stats["ouvertures"] = self.disjoncteur.ouvertures
+        return stats
+
+
+uploader = Uploader()
+
+
+def minio_accepte_uploads():
+    """
+    Indique si un upload vers MinIO serait tenté maintenant (disjoncteur fermé ou essai dû), sans appel réseau.
+    Returns:
+        bool: False pendant une panne détectée de MinIO.
+    """
+    return uploader.disjoncteur.disponible()
+
+
+def stats_upload():
+    """
+    Retourne les compteurs des uploads : fichiers et flux envoyés, octets, durée cumulée, débit moyen (octets/s),
+    échecs, uploads parqués (total et en attente), rejetés, et état du disjoncteur.
+    Returns:
+        dict: compteurs des uploads.
+    """
+    return uploader.etat()
+
+
+def upload_audio(file_path, object_name=None, content_type=None):
     """
     Upload un fichier audio dans le bucket MinIO.
+    Pendant une panne de MinIO, l'upload est parqué et relancé au rétablissement du service (voir Uploader).
     Args:
         file_path (str): Chemin local du fichier à uploader.
         object_name (str, optionnel): Nom de l'objet dans MinIO. Si None, utilise le nom du fichier.
+        content_type (str, optionnel): Type MIME de l'objet. Si None, déduit de l'extension du fichier.
     Returns:
         str ou bool: Nom de l'objet uploadé ou False en cas d'échec.
     """
-    if not minio_est_disponible():
-        print("Erreur: Impossible de se connecter à MinIO. Vérifiez que le service est démarré et accessible.")
-        #return False
     if object_name is None:
         object_name = os.path.basename(file_path)
+    if content_type is None:
+        content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+    return uploader.uploader_fichier(file_path, object_name, content_type)
+
+def upload_stream(stream, object_name, length=-1, part_size=MINIO_PART_SIZE, content_type="audio/mpeg"):
+    """
+    Upload un flux dans le bucket MinIO en multipart, sans fichier local.
+    La mémoire utilisée est bornée par la taille d'une part (part_size).
+    Args:
+        stream: Objet exposant read(n) (par exemple une réponse HTTP en streaming).
+        object_name (str): Nom de l'objet dans MinIO.
+        length (int): Taille totale si connue, -1 sinon.
+        part_size (int): Taille des parts multipart en octets (5 Mio minimum).
+        content_type (str): Type MIME de l'objet.
+    Returns:
+        str ou bool: Nom de l'objet uploadé ou False en cas d'échec.
+    """
+    return uploader.uploader_flux(stream, object_name, length, part_size, content_type)
+
+def remove_audio(object_name):
+    """
+    Supprime un objet du bucket MinIO.
+    Args:
+        object_name (str): Nom de l'objet à supprimer.
+    Returns:
+        bool: True si l'objet a été supprimé, False en cas d'échec.
+    """
     try:
-        # Créer le bucket s'il n'existe pas
-        if not client.bucket_exists(MINIO_BUCKET):
-            client.make_bucket(MINIO_BUCKET)
-        client.fput_object(MINIO_BUCKET, object_name, file_path)
-        return object_name
-    except S3Error as conn_err:
-        print(f"Erreur de connexion à MinIO: {conn_err}")
-        return False
+        get_client().remove_object(MINIO_BUCKET, object_name)
+        return True
     except Exception as e:
-        print(f"Erreur upload Minio (autre): {e}")
+        print(f"Erreur suppression de l'objet MinIO {object_name}: {e}")
         return False
 
 def verify_and_cleanup(file_path, object_name):
@@ -85,8 +469,9 @@ def verify_and_cleanup(file_path, object_name):
     Returns:
         bool: True si le fichier a été trouvé dans MinIO et supprimé localement, False sinon.
     """
+    from minio.error import S3Error
     try:
-        client.stat_object(MINIO_BUCKET, object_name)
+        get_client().stat_object(MINIO_BUCKET, object_name)
         os.remove(file_path)
         return True
     except S3Error as e:
@@ -94,4 +479,19 @@ def verify_and_cleanup(file_path, object_name):
         return False
     except Exception as e:
         print(f"Erreur suppression fichier {file_path}: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def list_object_names():
+    """
+    Liste en un seul parcours paginé (list_objects) les noms des objets présents dans le bucket MinIO.
+    Returns:
+        set ou None: Ensemble des noms d'objets (vide si le bucket n'existe pas), ou None en cas d'échec.
+    """
+    try:
+        client = get_client()
+        if not client.bucket_exists(MINIO_BUCKET):
+            return set()
+        return {obj.object_name for obj in client.list_objects(MINIO_BUCKET, recursive=True)}
+    except Exception as e:
+        print(f"Erreur lors du listing du bucket MinIO: {e}")
+        return None
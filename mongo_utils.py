@@ -5,56 +5,321 @@ Ce module fournit des fonctions pour :
 - Insérer des logs dans la collection MongoDB dédiée
 - Insérer les métadonnées des vidéos téléchargées
 - Vérifier l'existence d'une vidéo dans la collection des métadonnées
+- Charger en une passe tous les video_id connus
+- Regrouper les écritures dans un writer asynchrone (bulk_write d'upserts par video_id)
+- Ouvrir le client MongoDB au premier usage seulement (import du module sans connexion)
+- Créer les index nécessaires au démarrage
+- Lire et enregistrer l'état des playlists (ETag, nombre d'éléments, vidéos connues) pour les crawls incrémentaux
+- Tenir l'index des empreintes SHA-256 des audios (un objet MinIO par contenu, les doublons deviennent des alias)
 
 Variables d'environnement utilisées :
 - MONGO_URI : URI de connexion MongoDB
 - MONGO_DB : Nom de la base de données
 - MONGO_COLLECTION : Nom de la collection des logs
 - MONGO_VIDEO_COLLECTION : Nom de la collection des vidéos
+- MONGO_PLAYLIST_COLLECTION : Nom de la collection de l'état des playlists
+- MONGO_HASH_COLLECTION : Nom de la collection des empreintes audio
+- MONGO_BULK_WRITES : "1" pour écrire en arrière-plan par lots (défaut), "0" pour écrire de façon synchrone
+- MONGO_BULK_SIZE : Nombre d'écritures déclenchant un envoi groupé
+- MONGO_FLUSH_INTERVAL : Délai maximal (secondes) avant l'envoi d'un lot incomplet
 """
 import os
-from pymongo import MongoClient
+import queue
+import atexit
+import threading
+import time
+from pymongo import UpdateOne, InsertOne, ASCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError
 from dotenv import load_dotenv
+from metrics import registre
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
 MONGO_DB = os.getenv("MONGO_DB", "yt_scrap")
 MONGO_COLLECTION = os.getenv("MONGO_COLLECTION", "logs")
+MONGO_BULK_WRITES = os.getenv("MONGO_BULK_WRITES", "1") == "1"
+MONGO_BULK_SIZE = int(os.getenv("MONGO_BULK_SIZE", "100"))
+MONGO_FLUSH_INTERVAL = float(os.getenv("MONGO_FLUSH_INTERVAL", "2"))
+MONGO_VIDEO_COLLECTION = os.getenv("MONGO_VIDEO_COLLECTION", "videos")
+MONGO_PLAYLIST_COLLECTION = os.getenv("MONGO_PLAYLIST_COLLECTION", "playlist_state")
+MONGO_HASH_COLLECTION = os.getenv("MONGO_HASH_COLLECTION", "audio_hashes")
 
-client = MongoClient(MONGO_URI)
-db = client[MONGO_DB]
-collection = db[MONGO_COLLECTION]
+# Noms historiques des collections exposées par le module -> nom de la collection MongoDB
+_COLLECTIONS = {
+    "collection": MONGO_COLLECTION,
+    "video_meta_collection": MONGO_VIDEO_COLLECTION,
+    "playlist_state_collection": MONGO_PLAYLIST_COLLECTION,
+    "audio_hash_collection": MONGO_HASH_COLLECTION,
+}
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    Retourne le client MongoDB partagé, créé au premier usage.
+    Returns:
+        MongoClient: client du processus.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            from pymongo import MongoClient
+            _client = MongoClient(MONGO_URI)
+        return _client
+
+def get_db():
+    """Retourne la base MONGO_DB du client partagé."""
+    return get_client()[MONGO_DB]
+
+def get_collection(nom):
+    """
+    Retourne une collection de la base du projet.
+    Args:
+        nom (str): Nom de la collection MongoDB.
+    Returns:
+        Collection: collection demandée (client créé au premier usage).
+    """
+    return get_db()[nom]
+
+def __getattr__(nom):
+    # Accès paresseux (PEP 562) aux anciens attributs : client, db, collection, video_meta_collection...
+    if nom == "client":
+        return get_client()
+    if nom == "db":
+        return get_db()
+    if nom in _COLLECTIONS:
+        return get_collection(_COLLECTIONS[nom])
+    raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
+
+def ensure_indexes():
+    """
+    Crée (si besoin) les index sur video_id et status pour la collection des logs et celle des métadonnées,
+    l'index sur sha256 des métadonnées (recherche des alias d'un audio),
+    ainsi que l'index unique sur playlist_id de la collection d'état des playlists.
+    Returns:
+        bool: True si les index sont en place, False en cas d'échec.
+    """
+    try:
+        for coll in (get_collection(MONGO_COLLECTION), get_collection(MONGO_VIDEO_COLLECTION)):
+            coll.create_index([("video_id", ASCENDING)])
+            coll.create_index([("status", ASCENDING)])
+        get_collection(MONGO_VIDEO_COLLECTION).create_index([("sha256", ASCENDING)])
+        get_collection(MONGO_PLAYLIST_COLLECTION).create_index([("playlist_id", ASCENDING)], unique=True)
+        return True
+    except Exception as e:
+        print(f"Erreur création des index MongoDB: {e}")
+        return False
+
+
+def _operation_upsert(document):
+    """
+    Construit l'opération d'écriture d'un document : upsert sur video_id s'il est présent, insertion sinon.
+    Args:
+        document (dict): Document à écrire.
+    Returns:
+        UpdateOne ou InsertOne: Opération utilisable par bulk_write.
+    """
+    if document.get("video_id"):
+        return UpdateOne({"video_id": document["video_id"]}, {"$set": document}, upsert=True)
+    return InsertOne(document)
+
+
+class BulkWriter:
+    """
+    Writer MongoDB en arrière-plan : les opérations sont mises en file par les threads de téléchargement
+    puis envoyées par lots (bulk_write) lorsque MONGO_BULK_SIZE opérations sont en attente
+    ou que MONGO_FLUSH_INTERVAL secondes se sont écoulées.
+    Args:
+        taille_lot (int): Nombre d'opérations déclenchant un envoi.
+        intervalle (float): Délai maximal en secondes avant l'envoi d'un lot incomplet.
+    """
+
+    def __init__(self, taille_lot=MONGO_BULK_SIZE, intervalle=MONGO_FLUSH_INTERVAL):
+        self.taille_lot = taille_lot
+        self.intervalle = intervalle
+        self._file = queue.Queue()
+        self._ferme = False
+        self._thread = threading.Thread(target=self._boucle, name="mongo-bulk-writer", daemon=True)
+        self._thread.start()
+
+    def ajouter(self, coll, operation):
+        """
+        Met une opération en file pour une collection.
+        Args:
+            coll: Collection MongoDB cible.
+            operation: Opération pymongo (UpdateOne, InsertOne...).
+        Returns:
+            None
+        """
+        self._file.put((coll, operation))
+
+    def flush(self, timeout=None):
+        """
+        Attend que toutes les opérations mises en file jusqu'ici soient écrites.
+        Args:
+            timeout (float, optionnel): Délai maximal d'attente en secondes.
+        Returns:
+            bool: True si le lot a été écrit dans le délai.
+        """
+        if not self._thread.is_alive():
+            return False
+        termine = threading.Event()
+        self._file.put(termine)
+        return termine.wait(timeout)
+
+    def close(self, timeout=30):
+        """
+        Ecrit les opérations restantes puis arrête le thread d'écriture.
+        Args:
+            timeout (float): Délai maximal d'attente en secondes.
+        Returns:
+            None
+        """
+        if self._ferme:
+            return
+        self._ferme = True
+        self._file.put(None)
+        self._thread.join(timeout)
+
+    @staticmethod
+    def _ecrire(lots):
+        """
+        Envoie les opérations en attente, une requête bulk_write par collection.
+        Args:
+            lots (dict): Nom de collection -> (collection, liste d'opérations).
+        Returns:
+            None
+        """
+        for coll, operations in lots.values():
+            if not operations:
+                continue
+            try:
+                with registre.histogramme("mongo_write_seconds", "Durée des écritures MongoDB").chronometrer(collection=coll.name):
+                    coll.bulk_write(operations, ordered=True)
+                registre.compteur("mongo_write_ops_total", "Opérations écrites dans MongoDB").inc(len(operations), collection=coll.name)
+            except BulkWriteError as e:
+                print(f"Erreur écriture groupée MongoDB ({coll.name}): {e.details.get('writeErrors', [])[:3]}")
+            except Exception as e:
+                print(f"Erreur écriture groupée MongoDB ({coll.name}, {len(operations)} opérations perdues): {e}")
+        lots.clear()
+
+    def _boucle(self):
+        """
+        Boucle du thread d'écriture : accumule les opérations et les envoie par taille ou par délai.
+        Returns:
+            None
+        """
+        lots = {}
+        en_attente = 0
+        dernier_envoi = time.monotonic()
+        while True:
+            delai = max(0.0, self.intervalle - (time.monotonic() - dernier_envoi))
+            try:
+                element = self._file.get(timeout=delai)
+            except queue.Empty:
+                element = False
+            if element is None or isinstance(element, threading.Event) or element is False:
+                if en_attente or element is not False:
+                    self._ecrire(lots)
+                    en_attente = 0
+                dernier_envoi = time.monotonic()
+                if isinstance(element, threading.Event):
+                    element.set()
+                if element is None:
+                    return
+                continue
+            coll, operation = element
+            lots.setdefault(coll.name, (coll, []))[1].append(operation)
+            en_attente += 1
+            if en_attente >= self.taille_lot:
+                self._ecrire(lots)
+                en_attente = 0
+                dernier_envoi = time.monotonic()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """
+    Retourne le writer en arrière-plan partagé, créé au premier usage avec les index nécessaires.
+    Returns:
+        BulkWriter: writer partagé.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            ensure_indexes()
+            _writer = BulkWriter()
+            atexit.register(close_writes)
+        return _writer
+
+def flush_writes(timeout=None):
+    """
+    Force l'écriture des opérations en attente (à appeler avant de relire des données fraîchement écrites).
+    Args:
+        timeout (float, optionnel): Délai maximal d'attente en secondes.
+    Returns:
+        bool: True si tout a été écrit (ou si aucun writer n'est actif).
+    """
+    if _writer is None:
+        return True
+    return _writer.flush(timeout)
+
+def close_writes():
+    """
+    Ecrit les opérations en attente et arrête le writer (à appeler à l'arrêt du programme).
+    Returns:
+        None
+    """
+    if _writer is not None:
+        _writer.close()
+
+def _ecrire_document(coll, document):
+    """
+    Ecrit un document en upsert sur video_id, via le writer en arrière-plan ou de façon synchrone.
+    Args:
+        coll: Collection MongoDB cible.
+        document (dict): Document à écrire.
+    Returns:
+        bool ou ObjectId: True si l'écriture a été mise en file, l'identifiant upserté/inséré sinon.
+    """
+    operation = _operation_upsert(document)
+    if MONGO_BULK_WRITES:
+        get_writer().ajouter(coll, operation)
+        return True
+    with registre.histogramme("mongo_write_seconds", "Durée des écritures MongoDB").chronometrer(collection=coll.name):
+        result = coll.bulk_write([operation])
+    registre.compteur("mongo_write_ops_total", "Opérations écrites dans MongoDB").inc(collection=coll.name)
+    ids = result.upserted_ids or {}
+    return ids.get(0, True)
 
 def insert_log(log_data):
     """
-    Insère un log dans la collection MongoDB.
+    Enregistre un log dans la collection MongoDB (upsert sur video_id, sans bloquer l'appelant).
     Args:
-        log_data (dict): Données du log à insérer.
+        log_data (dict): Données du log à écrire.
     Returns:
-        ObjectId ou None: Identifiant du log inséré ou None en cas d'échec.
+        bool, ObjectId ou None: True si mis en file, identifiant en mode synchrone, None en cas d'échec.
     """
     try:
-        result = collection.insert_one(log_data)
-        return result.inserted_id
+        return _ecrire_document(get_collection(MONGO_COLLECTION), log_data)
     except Exception as e:
         print(f"Erreur insertion MongoDB: {e}")
         return None
 
-# Nouvelle fonction pour insérer les métadonnées des vidéos dans une collection dédiée
-video_meta_collection = db[os.getenv("MONGO_VIDEO_COLLECTION", "videos")]
-
 def insert_video_metadata(video_data):
     """
-    Insère les métadonnées d'une vidéo téléchargée dans la collection MongoDB dédiée.
+    Enregistre les métadonnées d'une vidéo dans la collection dédiée (upsert sur video_id, sans doublon entre exécutions).
     Args:
-        video_data (dict): Métadonnées de la vidéo à insérer.
+        video_data (dict): Métadonnées de la vidéo à écrire.
     Returns:
-        ObjectId ou None: Identifiant de la vidéo insérée ou None en cas d'échec.
+        bool, ObjectId ou None: True si mis en file, identifiant en mode synchrone, None en cas d'échec.
     """
     try:
-        result = video_meta_collection.insert_one(video_data)
-        return result.inserted_id
+        return _ecrire_document(get_collection(MONGO_VIDEO_COLLECTION), video_data)
     except Exception as e:
         print(f"Erreur insertion métadonnées vidéo MongoDB: {e}")
         return None
@@ -68,7 +333,135 @@ def video_exists_in_metadata(video_id):
         bool: True si la vidéo existe, False sinon.
     """
     try:
-        return video_meta_collection.find_one({"video_id": video_id}) is not None
+        return get_collection(MONGO_VIDEO_COLLECTION).find_one({"video_id": video_id}) is not None
     except Exception as e:
         print(f"Erreur lors de la vérification de l'existence de la vidéo dans MongoDB: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def load_known_video_ids():
+    """
+    Charge en une seule requête (curseur projeté) l'ensemble des video_id présents dans la collection des métadonnées.
+    Returns:
+        set ou None: Ensemble des video_id connus, ou None en cas d'échec.
+    """
+    try:
+        cursor = get_collection(MONGO_VIDEO_COLLECTION).find({}, {"video_id": 1, "_id": 0}, batch_size=10000)
+        return {doc["video_id"] for doc in cursor if "video_id" in doc}
+    except Exception as e:
+        print(f"Erreur lors du chargement des video_id depuis MongoDB: {e}")
+        return None
+
+
+def load_playlist_states(playlist_ids):
+    """
+    Charge en une requête l'état enregistré (ETag, nombre d'éléments, vidéos connues) de plusieurs playlists.
+    Args:
+        playlist_ids (list): Identifiants des playlists.
+    Returns:
+        dict: playlist_id -> état {'etag', 'item_count', 'video_ids' (set)} ; vide en cas d'échec.
+    """
+    try:
+        etats = {}
+        for doc in get_collection(MONGO_PLAYLIST_COLLECTION).find({"playlist_id": {"$in": list(playlist_ids)}}, {"_id": 0}):
+            etats[doc["playlist_id"]] = {
+                "etag": doc.get("etag"),
+                "item_count": doc.get("item_count"),
+                "video_ids": set(doc.get("video_ids", []))
+            }
+        return etats
+    except Exception as e:
+        print(f"Erreur lors du chargement de l'état des playlists: {e}")
+        return {}
+
+def save_playlist_state(playlist_id, etat):
+    """
+    Enregistre l'état d'une playlist après son énumération.
+    Args:
+        playlist_id (str): Identifiant de la playlist.
+        etat (dict): État {'etag', 'item_count', 'video_ids'} à enregistrer.
+    Returns:
+        bool: True si l'état a été enregistré, False sinon.
+    """
+    try:
+        get_collection(MONGO_PLAYLIST_COLLECTION).update_one(
+            {"playlist_id": playlist_id},
+            {"$set": {
+                "etag": etat.get("etag"),
+                "item_count": etat.get("item_count"),
+                "video_ids": sorted(etat.get("video_ids", ())),
+                "updated_at": time.time()
+            }},
+            upsert=True
+        )
+        return True
+    except Exception as e:
+        print(f"Erreur lors de l'enregistrement de l'état de la playlist {playlist_id}: {e}")
+        return False
+
+
+def find_audio_hash(sha256):
+    """
+    Cherche l'audio déjà enregistré pour une empreinte SHA-256.
+    Args:
+        sha256 (str): Empreinte hexadécimale du contenu audio.
+    Returns:
+        dict ou None: Document {'_id', 'object_name', 'video_id'} de l'original, None si inconnu ou en cas d'échec.
+    """
+    try:
+        return get_collection(MONGO_HASH_COLLECTION).find_one({"_id": sha256})
+    except Exception as e:
+        print(f"Erreur lecture de l'index des empreintes audio: {e}")
+        return None
+
+def claim_audio_hash(sha256, object_name, video_id):
+    """
+    Enregistre atomiquement un objet MinIO comme original d'une empreinte ($setOnInsert) :
+    le premier uploader gagne, les suivants reçoivent l'original existant.
+    Args:
+        sha256 (str): Empreinte hexadécimale du contenu audio.
+        object_name (str): Nom de l'objet MinIO portant ce contenu.
+        video_id (str): Vidéo à l'origine de l'objet.
+    Returns:
+        dict ou None: Document de l'original si l'empreinte appartient déjà à une autre vidéo,
+        None si elle vient d'être revendiquée (ou appartient déjà à cette vidéo, ou en cas d'échec).
+    """
+    try:
+        existant = get_collection(MONGO_HASH_COLLECTION).find_one_and_update(
+            {"_id": sha256},
+            {"$setOnInsert": {"object_name": object_name, "video_id": video_id, "created_at": time.time()}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+    except Exception as e:
+        print(f"Erreur enregistrement de l'empreinte audio {sha256}: {e}")
+        return None
+    if existant is None or existant.get("video_id") == video_id:
+        return None
+    return existant
+
+def is_audio_alias(video_id):
+    """
+    Indique si une vidéo est enregistrée comme alias de l'audio d'une autre vidéo (contenu identique).
+    Args:
+        video_id (str): Identifiant de la vidéo.
+    Returns:
+        bool: True si les métadonnées de la vidéo portent alias_of.
+    """
+    try:
+        return get_collection(MONGO_VIDEO_COLLECTION).find_one({"video_id": video_id, "alias_of": {"$exists": True}}, {"_id": 1}) is not None
+    except Exception as e:
+        print(f"Erreur lors de la vérification des alias audio: {e}")
+        return False
+
+def load_alias_video_ids():
+    """
+    Charge en une requête projetée les video_id enregistrés comme alias d'un autre audio.
+    Returns:
+        set: video_id des alias (vide en cas d'échec).
+    """
+    try:
+        cursor = get_collection(MONGO_VIDEO_COLLECTION).find({"alias_of": {"$exists": True}}, {"video_id": 1, "_id": 0}, batch_size=10000)
+        return {doc["video_id"] for doc in cursor if "video_id" in doc}
+    except Exception as e:
+        print(f"Erreur lors du chargement des alias audio depuis MongoDB: {e}")
+        return set()
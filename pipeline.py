@@ -0,0 +1,306 @@
+"""
+Pipeline par étapes pour le projet Youtube-Fon-Scrapping.
+
+Ce module découpe le traitement d'une vidéo en étapes reliées par des files bornées :
+- Chaque étape a sa propre largeur (nombre de threads) et sa file d'entrée bornée, qui freine l'étape amont
+- Une étape renvoie le nom de l'étape suivante, None quand la tâche est terminée, ou une Reprise différée
+- Les reprises (retour vers une étape amont) passent par une file non bornée propre à chaque étape,
+  ce qui évite tout interblocage entre étapes qui se remplissent mutuellement
+- Le nombre de tâches en vol (soumises et non terminées, reprises comprises) est borné par une fenêtre :
+  la soumission attend qu'une tâche se termine, la mémoire reste constante quelle que soit la taille du catalogue
+- L'occupation et la profondeur de file de chaque étape sont exposées pour le suivi de la progression
+  (et comme jauges du registre de métriques) ; la durée de chaque étape alimente un histogramme et la trace
+
+Le travail CPU (transcodage) n'est pas exécuté dans ces threads : l'étape correspondante le soumet
+à un ProcessPoolExecutor et attend son résultat, sa largeur bornant le nombre de processus sollicités.
+
+Variables d'environnement utilisées :
+- PIPELINE_QUEUE_SIZE : Capacité de la file d'entrée de chaque étape
+- PIPELINE_WINDOW : Nombre maximal de tâches en vol dans le pipeline
+"""
+import os
+import time
+import heapq
+import queue
+import logging
+import itertools
+import threading
+from collections import namedtuple
+from dotenv import load_dotenv
+import metrics
+
+load_dotenv()
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "64"))
+PIPELINE_WINDOW = int(os.getenv("PIPELINE_WINDOW", "512"))
+
+logger = logging.getLogger()
+
+# Renvoyée par une étape pour replanifier la tâche sur une étape (généralement amont) après un délai
+Reprise = namedtuple("Reprise", ["etape", "delai"])
+
+
+class Etape:
+    """
+    Etape du pipeline : une fonction exécutée par un nombre fixe de threads sur les tâches de sa file.
+    Args:
+        nom (str): Nom de l'étape, utilisé pour le routage et l'affichage.
+        fonction (callable): fonction(tache) renvoyant le nom de l'étape suivante, une Reprise ou None.
+        largeur (int): Nombre de threads de l'étape.
+        capacite (int): Capacité de la file d'entrée bornée.
+    """
+
+    def __init__(self, nom, fonction, largeur, capacite=PIPELINE_QUEUE_SIZE):
+        self.nom = nom
+        self.fonction = fonction
+        self.largeur = max(1, largeur)
+        self.file = queue.Queue(maxsize=capacite)
+        self.actives = 0
+        self.traitees = 0
+        self._reprises = []
+        self._sequence = itertools.count()
+        self._verrou = threading.Lock()
+
+    def reprendre(self, tache, delai=0):
+        """
+        Replanifie une tâche sur cette étape après un délai, sans jamais bloquer l'appelant.
+        Args:
+            tache: Tâche à replanifier.
+            delai (float): Délai en secondes avant que la tâche redevienne disponible.
+        Returns:
+            None
+        """
+        with self._verrou:
+            heapq.heappush(self._reprises, (time.monotonic() + delai, next(self._sequence), tache))
+
+    def prochaine(self, timeout=0.2):
+        """
+        Renvoie la prochaine tâche : une reprise arrivée à échéance en priorité, sinon la file d'entrée.
+        Args:
+            timeout (float): Attente maximale sur la file d'entrée.
+        Returns:
+            tâche ou None si aucune n'est disponible.
+        """
+        with self._verrou:
+            if self._reprises and self._reprises[0][0] <= time.monotonic():
+                return heapq.heappop(self._reprises)[2]
+        try:
+            return self.file.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def profondeur(self):
+        """Nombre de tâches en attente (file d'entrée et reprises)."""
+        return self.file.qsize() + len(self._reprises)
+
+    def etat(self):
+        """
+        Décrit l'occupation de l'étape.
+        Returns:
+            str: "nom=actives/largeur file=profondeur"
+        """
+        return f"{self.nom}={self.actives}/{self.largeur} file={self.profondeur()}"
+
+
+class Pipeline:
+    """
+    Enchaîne des étapes exécutées chacune par leurs propres threads, reliées par des files bornées.
+    S'utilise comme gestionnaire de contexte : les threads démarrent en entrée et s'arrêtent en sortie.
+    Les tâches terminées sont déposées dans la file resultats.
+    Args:
+        etapes (list): Etapes dans l'ordre du flux ; la première reçoit les tâches soumises.
+        sur_erreur (callable, optionnel): sur_erreur(tache, erreur) appelé si une étape lève une exception,
+            renvoie la suite de la tâche (None pour la terminer).
+        identifiant (callable, optionnel): identifiant(tache) nommant la ligne de la tâche dans la trace.
+        fenetre (int): Nombre maximal de tâches en vol ; soumettre attend au-delà.
+    """
+
+    def __init__(self, etapes, sur_erreur=None, identifiant=None, fenetre=PIPELINE_WINDOW):
+        self.etapes = {etape.nom: etape for etape in etapes}
+        self._ordre = {etape.nom: i for i, etape in enumerate(etapes)}
+        self._premiere = etapes[0]
+        self.sur_erreur = sur_erreur
+        self.identifiant = identifiant
+        self.fenetre = max(1, fenetre)
+        self.resultats = queue.Queue()
+        self._en_vol = 0
+        self._condition = threading.Condition()
+        self._arret = threading.Event()
+        self._threads = []
+
+    @property
+    def en_vol(self):
+        """Nombre de tâches soumises et pas encore terminées."""
+        return self._en_vol
+
+    def demarrer(self):
+        """
+        Démarre les threads de chaque étape et publie leur occupation dans le registre de métriques.
+        Returns:
+            None
+        """
+        metrics.registre.jauge("pipeline_queue_depth", "Tâches en attente par étape",
+                               lambda: {nom: e.profondeur() for nom, e in self.etapes.items()}, etiquette="etape")
+        metrics.registre.jauge("pipeline_active_workers", "Threads occupés par étape",
+                               lambda: {nom: e.actives for nom, e in self.etapes.items()}, etiquette="etape")
+        for etape in self.etapes.values():
+            for i in range(etape.largeur):
+                thread = threading.Thread(target=self._boucle, args=(etape,), name=f"{etape.nom}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def soumettre(self, tache):
+        """
+        Soumet une tâche à la première étape ; bloque tant que la fenêtre de tâches en vol
+        ou la file de la première étape est pleine (contre-pression).
+        Args:
+            tache: Tâche à traiter.
+        Returns:
+            None
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._en_vol < self.fenetre)
+            self._en_vol += 1
+        self._premiere.file.put(tache)
+
+    def attendre(self, timeout=None):
+        """
+        Attend que toutes les tâches soumises soient terminées.
+        Args:
+            timeout (float, optionnel): Attente maximale en secondes.
+        Returns:
+            bool: True si plus aucune tâche n'est en vol.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._en_vol == 0, timeout)
+
+    def arreter(self):
+        """
+        Arrête les threads des étapes (les tâches encore en file sont abandonnées).
+        Returns:
+            None
+        """
+        self._arret.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        self.demarrer()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.arreter()
+        return False
+
+    def etat(self):
+        """
+        Décrit l'occupation et la profondeur de file de chaque étape.
+        Returns:
+            str: état de chaque étape séparé par des espaces
+        """
+        return " ".join(etape.etat() for etape in self.etapes.values())
+
+    def _terminer(self, tache):
+        self.resultats.put(tache)
+        with self._condition:
+            self._en_vol -= 1
+            self._condition.notify_all()
+
+    def _router(self, etape, tache, suite):
+        if suite is None:
+            self._terminer(tache)
+        elif isinstance(suite, Reprise):
+            self.etapes[suite.etape].reprendre(tache, suite.delai)
+        elif self._ordre[suite] <= self._ordre[etape.nom]:
+            # Un put bloquant vers l'amont pourrait attendre une étape elle-même bloquée sur celle-ci
+            self.etapes[suite].reprendre(tache)
+        else:
+            self.etapes[suite].file.put(tache)
+
+    def _boucle(self, etape):
+        while not self._arret.is_set():
+            tache = etape.prochaine()
+            if tache is None:
+                continue
+            with etape._verrou:
+                etape.actives += 1
+            try:
+                suite = _executer_etape(etape.nom, etape.fonction, tache, self.identifiant)
+            except Exception as e:
+                logger.error(f"Erreur dans l'étape {etape.nom}: {e}")
+                suite = _gerer_erreur(self.sur_erreur, tache, e)
+            finally:
+                with etape._verrou:
+                    etape.actives -= 1
+                    etape.traitees += 1
+            # Une tâche sortie de ce thread doit toujours être routée ou terminée : sinon la fenêtre
+            # de tâches en vol ne se libère jamais et soumettre/attendre bloquent indéfiniment
+            try:
+                self._router(etape, tache, suite)
+            except Exception as e:
+                logger.error(f"Routage impossible depuis l'étape {etape.nom} vers {suite!r}: {e}")
+                if _gerer_erreur(self.sur_erreur, tache, e) is not None:
+                    logger.error(f"Tâche abandonnée après l'étape {etape.nom}")
+                self._terminer(tache)
+
+
+def _gerer_erreur(sur_erreur, tache, erreur):
+    """
+    Appelle le gestionnaire d'erreur d'une tâche sans laisser ses propres exceptions arrêter le thread appelant.
+    Args:
+        sur_erreur (callable ou None): sur_erreur(tache, erreur) renvoyant la suite de la tâche.
+        tache: Tâche en erreur.
+        erreur (Exception): Erreur levée.
+    Returns:
+        suite renvoyée par sur_erreur, None si absent ou en échec (la tâche est terminée)
+    """
+    if sur_erreur is None:
+        return None
+    try:
+        return sur_erreur(tache, erreur)
+    except Exception as e:
+        logger.error(f"Erreur du gestionnaire d'erreur: {e}")
+        return None
+
+
+def _executer_etape(nom, fonction, tache, identifiant=None):
+    """
+    Exécute une étape sur une tâche en mesurant sa durée (histogramme pipeline_stage_seconds et trace).
+    Args:
+        nom (str): Nom de l'étape.
+        fonction (callable): Fonction de l'étape.
+        tache: Tâche traitée.
+        identifiant (callable, optionnel): identifiant(tache) nommant la ligne de trace.
+    Returns:
+        suite renvoyée par la fonction de l'étape
+    """
+    with metrics.etape(nom, identifiant(tache) if identifiant else None, metrique="pipeline_stage", etape=nom):
+        return fonction(tache)
+
+
+def executer_sequentiel(etapes, tache, premiere=None, sur_erreur=None, identifiant=None):
+    """
+    Fait passer une tâche par les étapes dans le thread appelant, sans file ni thread supplémentaire
+    (traitement unitaire : réessais, mode worker).
+    Args:
+        etapes (list): Etapes du pipeline.
+        tache: Tâche à traiter.
+        premiere (str, optionnel): Nom de l'étape de départ (la première par défaut).
+        sur_erreur (callable, optionnel): sur_erreur(tache, erreur) renvoyant la suite de la tâche.
+        identifiant (callable, optionnel): identifiant(tache) nommant la ligne de la tâche dans la trace.
+    Returns:
+        tâche terminée
+    """
+    fonctions = {etape.nom: etape.fonction for etape in etapes}
+    suite = premiere or etapes[0].nom
+    while suite is not None:
+        if isinstance(suite, Reprise):
+            time.sleep(suite.delai)
+            suite = suite.etape
+        try:
+            suite = _executer_etape(suite, fonctions[suite], tache, identifiant)
+        except Exception as e:
+            logger.error(f"Erreur dans l'étape {suite}: {e}")
+            suite = _gerer_erreur(sur_erreur, tache, e)
+    return tache
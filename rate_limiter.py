@@ -0,0 +1,105 @@
+"""
+Limiteur de concurrence adaptatif pour le projet Youtube-Fon-Scrapping.
+
+Ce module fournit un budget de concurrence par backend (SaveTube, yt-dlp, upload MinIO) qui s'ajuste seul :
+- Augmentation additive à chaque succès (environ +1 par "fenêtre" complète de succès)
+- Réduction multiplicative sur signal de congestion (timeout, HTTP 429, redirection vers la page d'accueil)
+- Une seule réduction par période de refroidissement, pour ne pas réagir plusieurs fois à la même rafale d'erreurs
+"""
+import time
+import threading
+
+
+class LimiteurAdaptatif:
+    """
+    Sémaphore dont la capacité suit un contrôle AIMD (additive increase, multiplicative decrease).
+    S'utilise comme gestionnaire de contexte : "with limiteur:" réserve une place et la libère en sortie.
+    Args:
+        nom (str): Nom du backend, affiché dans la progression.
+        initial (int): Nombre de places au démarrage.
+        minimum (int): Nombre minimal de places.
+        maximum (int): Nombre maximal de places.
+        increment (float): Augmentation de la limite pour une fenêtre complète de succès.
+        facteur (float): Facteur appliqué à la limite sur congestion.
+        refroidissement (float): Délai minimal en secondes entre deux réductions.
+    """
+
+    def __init__(self, nom, initial, minimum=1, maximum=32, increment=1.0, facteur=0.5, refroidissement=10.0):
+        self.nom = nom
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increment = increment
+        self.facteur = facteur
+        self.refroidissement = refroidissement
+        self._limite = float(min(max(initial, minimum), maximum))
+        self._en_cours = 0
+        self._derniere_reduction = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limite(self):
+        """Nombre de places actuellement autorisées."""
+        return int(self._limite)
+
+    def acquerir(self):
+        """
+        Attend qu'une place soit libre sous la limite courante puis la réserve.
+        Returns:
+            None
+        """
+        with self._condition:
+            while self._en_cours >= int(self._limite):
+                self._condition.wait()
+            self._en_cours += 1
+
+    def liberer(self):
+        """
+        Libère une place réservée.
+        Returns:
+            None
+        """
+        with self._condition:
+            self._en_cours -= 1
+            self._condition.notify()
+
+    def __enter__(self):
+        self.acquerir()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.liberer()
+        return False
+
+    def succes(self):
+        """
+        Signale un succès : la limite croît de increment / limite (soit +increment par fenêtre de succès).
+        Returns:
+            None
+        """
+        with self._condition:
+            ancienne = int(self._limite)
+            self._limite = min(self.maximum, self._limite + self.increment / self._limite)
+            if int(self._limite) > ancienne:
+                self._condition.notify_all()
+
+    def congestion(self):
+        """
+        Signale une congestion : la limite est multipliée par facteur, au plus une fois par période de refroidissement.
+        Returns:
+            bool: True si la limite a été réduite.
+        """
+        with self._condition:
+            now = time.monotonic()
+            if now - self._derniere_reduction < self.refroidissement:
+                return False
+            self._derniere_reduction = now
+            self._limite = max(self.minimum, self._limite * self.facteur)
+            return True
+
+    def etat(self):
+        """
+        Décrit l'utilisation courante du budget.
+        Returns:
+            str: "nom=en_cours/limite"
+        """
+        return f"{self.nom}={self._en_cours}/{int(self._limite)}"
@@ -2,83 +2,205 @@
 Gestionnaire de retry pour les téléchargements échoués dans Youtube-Fon-Scrapping.
 
 Ce script autonome permet de :
-- Récupérer les entrées ayant échoué dans MongoDB
-- Relancer automatiquement le téléchargement de l'audio pour ces vidéos
-- Mettre à jour le statut et le nombre de tentatives dans MongoDB
+- Planifier les nouvelles tentatives avec un délai exponentiel et du jitter (champ next_retry_at)
+- Récupérer uniquement les échecs arrivés à échéance via une requête indexée
+- Ignorer (et supprimer) les échecs des vidéos désormais présentes dans la collection des métadonnées
+- Relancer les téléchargements dans un pool de threads borné
+- Mettre à jour le statut, le nombre de tentatives et la prochaine échéance dans MongoDB
 
 Variables d'environnement utilisées :
 - MONGO_URI : URI de connexion MongoDB
 - MONGO_DB : Nom de la base de données
 - MONGO_COLLECTION : Nom de la collection des logs
+- RETRY_BASE_DELAY : Délai (secondes) avant la première nouvelle tentative, doublé à chaque échec
+- RETRY_MAX_DELAY : Délai maximal (secondes) entre deux tentatives
+- RETRY_MAX_ATTEMPTS : Nombre de tentatives au-delà duquel une vidéo est abandonnée
+- RETRY_WORKERS : Nombre de téléchargements relancés simultanément
+- RETRY_BATCH_SIZE : Nombre maximal d'échecs traités par scan
+
+Lancement : python retry_failed.py, ou python cli.py retry [--once] [--workers N].
 """
 import os
 import time
+import random
+import concurrent.futures
 from dotenv import load_dotenv
-from pymongo import MongoClient
-from mongo_utils import insert_log, video_exists_in_metadata
-from scraper import telecharger_video_savetube
+from pymongo import ASCENDING
+from mongo_utils import get_collection, flush_writes, MONGO_COLLECTION, MONGO_VIDEO_COLLECTION
+from scraper import telecharger_video_savetube, demarrer_metriques
+from log_utils import configurer_logging
 import logging
 load_dotenv()
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("youtube_retry_download.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger()
-# Configuration MongoDB
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
-MONGO_DB = os.getenv("MONGO_DB", "yt_scrap")
-MONGO_COLLECTION = os.getenv("MONGO_COLLECTION", "logs")
+# Configuration du planificateur
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "300"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", str(24 * 3600)))
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "8"))
+RETRY_WORKERS = int(os.getenv("RETRY_WORKERS", "4"))
+RETRY_BATCH_SIZE = int(os.getenv("RETRY_BATCH_SIZE", "100"))
+SCAN_MIN_INTERVAL = 10
+SCAN_MAX_INTERVAL = 600
 
-client = MongoClient(MONGO_URI)
-db = client[MONGO_DB]
-collection = db[MONGO_COLLECTION]
+def _logs():
+    """Collection des logs de téléchargement (client MongoDB partagé, créé au premier usage)."""
+    return get_collection(MONGO_COLLECTION)
 
-def retry_failed_downloads():
+def preparer_planification():
     """
-    Récupère les échecs de téléchargement depuis MongoDB et relance le processus.
-    Parcourt les entrées ayant le statut 'failed', tente un nouveau téléchargement,
-    puis met à jour le statut et le nombre de tentatives dans la base.
+    Crée l'index (status, next_retry_at) et planifie immédiatement les échecs qui n'ont pas encore d'échéance.
     Returns:
         None
     """
-    failed_entries = collection.find({
+    _logs().create_index([("status", ASCENDING), ("next_retry_at", ASCENDING)])
+    result = _logs().update_many(
+        {"status": "failed", "next_retry_at": {"$exists": False}},
+        {"$set": {"next_retry_at": 0}}
+    )
+    if result.modified_count:
+        logger.info(f"{result.modified_count} échecs sans échéance planifiés pour un réessai immédiat")
+
+def prochaine_echeance(tentatives):
+    """
+    Calcule la date de la prochaine tentative : délai exponentiel plafonné, avec jitter.
+    Args:
+        tentatives (int): Nombre de tentatives déjà effectuées.
+    Returns:
+        float: Timestamp de la prochaine tentative.
+    """
+    delai = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** tentatives))
+    return time.time() + random.uniform(delai / 2, delai)
+
+def recuperer_echecs_dus(limite=RETRY_BATCH_SIZE):
+    """
+    Récupère les échecs dont l'échéance est passée (requête couverte par l'index status/next_retry_at).
+    Les échecs sans échéance, écrits par le scraper après le démarrage du service, sont dus immédiatement.
+    Args:
+        limite (int): Nombre maximal d'entrées renvoyées.
+    Returns:
+        list: Entrées de log en échec à réessayer.
+    """
+    return list(_logs().find({
         "status": "failed",
-    })
-    logger.info(f"Nombre d'échecs à réessayer : {failed_entries}")
-    for entry in failed_entries:
-        video_info = {
-            "video_id": entry["video_id"],
-            "url": entry["url"],
-            "title": entry.get("title", "")
-        }
-
-        logger.info(f"Tentative de réessai pour {video_info['video_id']}")
-        
-        # Réessayer le téléchargement
-        result = telecharger_video_savetube(video_info)
-        
-        # Mettre à jour le statut dans MongoDB
-        update_data = {
-            "$set": {
-                "status": result["status"],
-                "last_retry": time.time()
-            },
-            "$inc": {"retry_attempts": 1}
-        }
-        collection.update_one({"_id": entry["_id"]}, update_data)
-
-        if result["status"] == "success":
-            logger.info(f"Réussite du réessai pour {video_info['video_id']}")
-        else:
-            logger.warning(f"Nouvel échec pour {video_info['video_id']}")
+        "$or": [{"next_retry_at": {"$lte": time.time()}}, {"next_retry_at": {"$exists": False}}]
+    }).sort("next_retry_at", ASCENDING).limit(limite))
 
+def purger_deja_traites(entries):
+    """
+    Supprime les échecs des vidéos désormais présentes dans la collection des métadonnées (une requête $in).
+    Args:
+        entries (list): Entrées de log en échec.
+    Returns:
+        list: Entrées restant à réessayer.
+    """
+    if not entries:
+        return entries
+    ids = list({entry["video_id"] for entry in entries})
+    deja_traites = {doc["video_id"] for doc in get_collection(MONGO_VIDEO_COLLECTION).find({"video_id": {"$in": ids}}, {"video_id": 1, "_id": 0})}
+    if deja_traites:
+        _logs().delete_many({"_id": {"$in": [e["_id"] for e in entries if e["video_id"] in deja_traites]}})
+        logger.info(f"{len(deja_traites)} échecs supprimés: vidéos déjà présentes dans les métadonnées")
+    return [entry for entry in entries if entry["video_id"] not in deja_traites]
 
-if __name__ == "__main__":
+def reessayer(entry):
+    """
+    Relance le téléchargement d'une entrée en échec et met à jour son statut et sa prochaine échéance.
+    Args:
+        entry (dict): Entrée de log en échec.
+    Returns:
+        str: Statut enregistré (success, failed ou abandoned).
+    """
+    video_info = {
+        "video_id": entry["video_id"],
+        "url": entry["url"],
+        "title": entry.get("title", "")
+    }
+
+    logger.info(f"Tentative de réessai pour {video_info['video_id']}")
+
+    # Réessayer le téléchargement
+    result = telecharger_video_savetube(video_info)
+    # Le log d'échec éventuellement écrit par le téléchargement doit précéder la mise à jour du planning
+    flush_writes()
+
+    tentatives = entry.get("retry_attempts", 0) + 1
+    status = result["status"]
+    if status != "success" and tentatives >= RETRY_MAX_ATTEMPTS:
+        status = "abandoned"
+    # Mettre à jour le statut dans MongoDB
+    update_data = {
+        "$set": {
+            "status": status,
+            "last_retry": time.time(),
+            "next_retry_at": prochaine_echeance(tentatives)
+        },
+        "$inc": {"retry_attempts": 1}
+    }
+    _logs().update_one({"_id": entry["_id"]}, update_data)
+
+    if status == "success":
+        logger.info(f"Réussite du réessai pour {video_info['video_id']}")
+    elif status == "abandoned":
+        logger.warning(f"Abandon de {video_info['video_id']} après {tentatives} tentatives")
+    else:
+        logger.warning(f"Nouvel échec pour {video_info['video_id']}")
+    return status
+
+def retry_failed_downloads(workers=RETRY_WORKERS):
+    """
+    Récupère les échecs arrivés à échéance, écarte ceux déjà traités entre-temps,
+    puis relance les autres dans un pool de threads borné.
+    Args:
+        workers (int): Nombre de téléchargements relancés simultanément.
+    Returns:
+        int: Nombre d'entrées réessayées.
+    """
+    failed_entries = purger_deja_traites(recuperer_echecs_dus())
+    logger.info(f"Nombre d'échecs à réessayer : {len(failed_entries)}")
+    if not failed_entries:
+        return 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for entry, future in [(entry, executor.submit(reessayer, entry)) for entry in failed_entries]:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Exception lors du réessai de {entry['video_id']}: {str(e)}")
+    return len(failed_entries)
+
+def attente_avant_prochain_scan():
+    """
+    Calcule l'attente jusqu'à la prochaine échéance connue, bornée entre SCAN_MIN_INTERVAL et SCAN_MAX_INTERVAL.
+    Returns:
+        float: Durée d'attente en secondes.
+    """
+    prochain = _logs().find_one({"status": "failed"}, {"next_retry_at": 1}, sort=[("next_retry_at", ASCENDING)])
+    if not prochain:
+        return SCAN_MAX_INTERVAL
+    return min(SCAN_MAX_INTERVAL, max(SCAN_MIN_INTERVAL, prochain.get("next_retry_at", 0) - time.time()))
+
+
+def executer_retry(une_fois=False, workers=RETRY_WORKERS):
+    """
+    Boucle du gestionnaire de retry : planifie les échecs, relance ceux arrivés à échéance,
+    puis attend jusqu'à la prochaine échéance connue.
+    Args:
+        une_fois (bool): Un seul scan puis retour (commande de maintenance) si True.
+        workers (int): Nombre de téléchargements relancés simultanément.
+    Returns:
+        int: Nombre d'entrées réessayées lors du dernier scan.
+    """
+    demarrer_metriques()
+    preparer_planification()
     while True:
-        retry_failed_downloads()
-        logging.info("Attente de 10 minutes avant le prochain scan...")
-        time.sleep(6)
\ No newline at end of file
+        traites = retry_failed_downloads(workers)
+        flush_writes()
+        if une_fois:
+            return traites
+        # Un lot complet laisse supposer d'autres échecs dus : scan immédiat
+        attente = 0 if traites >= RETRY_BATCH_SIZE else attente_avant_prochain_scan()
+        logging.info(f"Attente de {attente:.0f} secondes avant le prochain scan...")
+        time.sleep(attente)
+
+
+if __name__ == "__main__":
+    configurer_logging("youtube_retry_download.log")
+    executer_retry()
@@ -0,0 +1,174 @@
+"""
+Manifeste de run (journal de reprise) du scraper pour le projet Youtube-Fon-Scrapping.
+
+Le manifeste est un journal local en ajout seul (une ligne JSON par événement) qui enregistre :
+- Le début du run (identifiant, playlists) et chaque reprise
+- Chaque vidéo énumérée (catalogue), au moment où elle est soumise au pipeline
+- La fin de l'énumération de chaque playlist, avec son état (ETag, vidéos connues)
+- La dernière étape atteinte par chaque vidéo (resolving, downloading, uploaded) et son statut final
+- La fin du run
+
+Après un arrêt brutal (OOM, redéploiement), "scraper.py --resume" relit le journal : les vidéos terminées
+ne sont ni re-sondées ni relancées, les vidéos en cours sont resoumises, et seules les playlists dont
+l'énumération n'était pas terminée sont re-parcourues. Une dernière ligne tronquée par l'arrêt est ignorée.
+
+Variables d'environnement utilisées :
+- RUN_MANIFEST_FILE : Chemin du journal (par défaut dans le dossier audios/, monté en volume)
+- RUN_MANIFEST_FSYNC_INTERVAL : Intervalle minimal (secondes) entre deux fsync du journal
+"""
+import os
+import json
+import time
+import uuid
+import threading
+from collections import Counter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RUN_MANIFEST_FILE = os.getenv("RUN_MANIFEST_FILE", os.path.join("audios", "run_manifest.jsonl"))
+RUN_MANIFEST_FSYNC_INTERVAL = float(os.getenv("RUN_MANIFEST_FSYNC_INTERVAL", "5"))
+
+
+class ManifesteRun:
+    """
+    Journal d'un run du scraper. Les écritures (thread principal et threads des étapes) sont sérialisées
+    par un verrou ; chaque ligne est transmise au système à l'écriture et le fichier est synchronisé
+    sur disque au plus toutes les RUN_MANIFEST_FSYNC_INTERVAL secondes.
+    Args:
+        chemin (str): Chemin du journal.
+    """
+
+    def __init__(self, chemin=RUN_MANIFEST_FILE):
+        self.chemin = chemin
+        self.run_id = None
+        self.playlists = []
+        # Etat relu par charger() : vidéos non terminées, statuts finaux, états des playlists énumérées
+        self.videos = {}
+        self.etapes = {}
+        self.statuts = {}
+        self.etats_playlists = {}
+        self.termine = False
+        self._fichier = None
+        self._verrou = threading.Lock()
+        self._dernier_fsync = time.monotonic()
+
+    @classmethod
+    def charger(cls, chemin=RUN_MANIFEST_FILE):
+        """
+        Relit le journal d'un run précédent.
+        Args:
+            chemin (str): Chemin du journal.
+        Returns:
+            ManifesteRun ou None: manifeste du run interrompu, None si aucun journal ou si le run est terminé.
+        """
+        if not os.path.exists(chemin):
+            return None
+        manifeste = cls(chemin)
+        with open(chemin, "r", encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    evenement = json.loads(ligne)
+                except ValueError:
+                    # Ligne tronquée par un arrêt brutal
+                    continue
+                manifeste._appliquer(evenement)
+        if manifeste.run_id is None or manifeste.termine:
+            return None
+        return manifeste
+
+    def _appliquer(self, evenement):
+        type_evenement = evenement.get("t")
+        if type_evenement == "run":
+            self.run_id = evenement["run_id"]
+            self.playlists = evenement.get("playlists", [])
+        elif type_evenement == "video":
+            video = evenement["video"]
+            self.videos[video["video_id"]] = video
+        elif type_evenement == "etape":
+            if evenement["id"] in self.videos:
+                self.etapes[evenement["id"]] = evenement["etape"]
+        elif type_evenement == "fin":
+            self.videos.pop(evenement["id"], None)
+            self.etapes.pop(evenement["id"], None)
+            self.statuts[evenement["id"]] = (evenement["statut"], evenement.get("duree", 0))
+        elif type_evenement == "playlist":
+            etat = evenement.get("etat") or {}
+            etat["video_ids"] = set(etat.get("video_ids", []))
+            self.etats_playlists[evenement["id"]] = etat
+        elif type_evenement == "termine":
+            self.termine = True
+
+    def _ecrire(self, evenement):
+        ligne = json.dumps(evenement, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._verrou:
+            if self._fichier is None:
+                return
+            self._fichier.write(ligne)
+            self._fichier.flush()
+            if time.monotonic() - self._dernier_fsync >= RUN_MANIFEST_FSYNC_INTERVAL:
+                os.fsync(self._fichier.fileno())
+                self._dernier_fsync = time.monotonic()
+
+    def demarrer(self, playlists):
+        """
+        Démarre un nouveau run : le journal précédent est remplacé.
+        Args:
+            playlists (list): Identifiants des playlists du run.
+        Returns:
+            None
+        """
+        os.makedirs(os.path.dirname(self.chemin) or ".", exist_ok=True)
+        self.run_id = uuid.uuid4().hex[:12]
+        self.playlists = list(playlists)
+        self._fichier = open(self.chemin, "w", encoding="utf-8")
+        self._ecrire({"t": "run", "run_id": self.run_id, "ts": time.time(), "playlists": self.playlists})
+
+    def reprendre(self):
+        """
+        Rouvre le journal d'un run interrompu pour continuer à l'alimenter.
+        Returns:
+            dict: nombre de vidéos non terminées par dernière étape atteinte (pending si aucune)
+        """
+        self._fichier = open(self.chemin, "a", encoding="utf-8")
+        self._ecrire({"t": "reprise", "run_id": self.run_id, "ts": time.time()})
+        return dict(Counter(self.etapes.get(video_id, "pending") for video_id in self.videos))
+
+    def video(self, video):
+        """Enregistre une vidéo énumérée (avant sa soumission au pipeline)."""
+        self._ecrire({"t": "video", "video": {k: v for k, v in video.items() if k != "status"}})
+
+    def etape(self, video_id, etape):
+        """Enregistre l'étape atteinte par une vidéo (écouteur d'étape du scraper)."""
+        self._ecrire({"t": "etape", "id": video_id, "etape": etape})
+
+    def fin(self, video_id, statut, duree=0):
+        """Enregistre le statut final d'une vidéo."""
+        self._ecrire({"t": "fin", "id": video_id, "statut": statut, "duree": duree})
+
+    def playlist_terminee(self, playlist_id, etat):
+        """
+        Enregistre la fin de l'énumération d'une playlist (toutes ses vidéos sont déjà dans le journal).
+        Args:
+            playlist_id (str): Identifiant de la playlist.
+            etat (dict): État de la playlist après énumération, None en crawl complet.
+        Returns:
+            None
+        """
+        etat = dict(etat or {})
+        etat["video_ids"] = sorted(etat.get("video_ids", ()))
+        self._ecrire({"t": "playlist", "id": playlist_id, "etat": etat})
+
+    def terminer(self):
+        """Marque le run comme terminé (un --resume suivant démarrera un nouveau run) et ferme le journal."""
+        self._ecrire({"t": "termine", "ts": time.time()})
+        self.fermer()
+
+    def fermer(self):
+        """Synchronise et ferme le journal."""
+        with self._verrou:
+            if self._fichier is not None:
+                self._fichier.flush()
+                os.fsync(self._fichier.fileno())
+                self._fichier.close()
+                self._fichier = None
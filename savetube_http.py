@@ -0,0 +1,153 @@
+"""
+Résolveur SaveTube sans navigateur pour le projet Youtube-Fon-Scrapping.
+
+La page SaveTube ne fait que quelques appels JSON pour produire un lien de téléchargement ;
+ce module rejoue directement cette séquence en HTTP, sans Chromium :
+- GET  {SAVETUBE_API_BASE}/random-cdn       -> hôte CDN chargé de la conversion
+- POST https://{cdn}/v2/info  {url}         -> titre, durée et clé de la vidéo
+- POST https://{cdn}/download {key, ...}    -> lien de téléchargement du fichier converti
+
+La réponse de /v2/info peut être chiffrée (AES-CBC, IV en tête du bloc base64) : elle est alors
+déchiffrée avec SAVETUBE_INFO_KEY. Toute réponse inattendue lève ResolutionHTTPErreur, ce qui permet
+au scraper de se replier sur le navigateur. En mode auto, le scraper n'appelle ce module que si
+SAVETUBE_INFO_KEY est renseignée (les réponses de SaveTube étant chiffrées) ; le déchiffrement utilise cryptography.
+
+Variables d'environnement utilisées :
+- SAVETUBE_API_BASE : URL de base de l'API SaveTube (à remplacer par un serveur local pour les tests)
+- SAVETUBE_ORIGIN : Origine envoyée dans les en-têtes Origin/Referer
+- SAVETUBE_INFO_KEY : Clé AES (hexadécimal) des réponses /v2/info chiffrées
+- SAVETUBE_HTTP_TIMEOUT : Délai maximal de chaque appel (secondes)
+"""
+import os
+import re
+import json
+import base64
+from dotenv import load_dotenv
+from http_utils import get_session
+
+load_dotenv()
+
+SAVETUBE_API_BASE = os.getenv("SAVETUBE_API_BASE", "https://media.savetube.me/api").rstrip("/")
+SAVETUBE_ORIGIN = os.getenv("SAVETUBE_ORIGIN", "https://yt.savetube.me")
+SAVETUBE_INFO_KEY = os.getenv("SAVETUBE_INFO_KEY", "")
+SAVETUBE_HTTP_TIMEOUT = float(os.getenv("SAVETUBE_HTTP_TIMEOUT", "20"))
+
+
+class ResolutionHTTPErreur(Exception):
+    """
+    La séquence d'appels SaveTube n'a pas produit de lien (réponse inattendue, vidéo refusée, API modifiée).
+    """
+
+
+def _url_cdn(cdn):
+    # Le serveur local de test renvoie une URL complète, SaveTube un simple nom d'hôte
+    return cdn.rstrip("/") if "://" in cdn else f"https://{cdn}"
+
+
+def _dechiffrer(donnees):
+    """
+    Déchiffre le bloc "data" d'une réponse /v2/info (AES-CBC, IV sur les 16 premiers octets, bourrage PKCS7).
+    Args:
+        donnees (str): Bloc base64 chiffré.
+    Returns:
+        dict: Informations de la vidéo.
+    Raises:
+        ResolutionHTTPErreur: si aucune clé n'est configurée ou si le déchiffrement échoue.
+    """
+    if not SAVETUBE_INFO_KEY:
+        raise ResolutionHTTPErreur("réponse chiffrée et SAVETUBE_INFO_KEY non configurée")
+    try:
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        from cryptography.hazmat.primitives import padding
+        brut = base64.b64decode(donnees)
+        dechiffreur = Cipher(algorithms.AES(bytes.fromhex(SAVETUBE_INFO_KEY)), modes.CBC(brut[:16])).decryptor()
+        clair = dechiffreur.update(brut[16:]) + dechiffreur.finalize()
+        retrait = padding.PKCS7(128).unpadder()
+        return json.loads(retrait.update(clair) + retrait.finalize())
+    except Exception as e:
+        raise ResolutionHTTPErreur(f"déchiffrement de la réponse /v2/info impossible: {e}")
+
+
+def _appel(methode, url, headers, **kwargs):
+    """
+    Envoie un appel JSON à SaveTube et renvoie la réponse décodée.
+    Args:
+        methode (str): "GET" ou "POST".
+        url (str): URL appelée.
+        headers (dict): En-têtes de la requête.
+        **kwargs: Arguments transmis à requests (json...).
+    Returns:
+        dict: Corps JSON de la réponse.
+    Raises:
+        requests.HTTPError: si le serveur répond en erreur (429 compris, traité comme congestion).
+        ResolutionHTTPErreur: si la réponse n'est pas du JSON.
+    """
+    response = get_session().request(methode, url, headers=headers, timeout=SAVETUBE_HTTP_TIMEOUT, **kwargs)
+    response.raise_for_status()
+    try:
+        return response.json()
+    except ValueError:
+        raise ResolutionHTTPErreur(f"réponse non JSON de {url}: {response.text[:200]}")
+
+
+def _donnees(reponse, etape):
+    """
+    Extrait le bloc "data" d'une réponse SaveTube, en vérifiant le statut renvoyé.
+    Args:
+        reponse (dict): Corps JSON de la réponse.
+        etape (str): Nom de l'appel, pour le message d'erreur.
+    Returns:
+        dict ou str: Bloc data.
+    """
+    if not reponse.get("status", True) or "data" not in reponse:
+        raise ResolutionHTTPErreur(f"{etape}: {reponse.get('message', reponse)}")
+    return reponse["data"]
+
+
+def qualite_audio(libelle):
+    """
+    Convertit le libellé de qualité de la page ("MP3 320kbps") en valeur attendue par l'API ("320").
+    Args:
+        libelle (str): Libellé de la liste déroulante SaveTube.
+    Returns:
+        str: Débit en kbit/s.
+    """
+    trouve = re.search(r"(\d+)\s*kbps", libelle, re.IGNORECASE)
+    return trouve.group(1) if trouve else "320"
+
+
+def resoudre_lien_http(url_video, qualite="MP3 320kbps", user_agent=None):
+    """
+    Obtient le titre et le lien de téléchargement MP3 d'une vidéo en rejouant les appels de la page SaveTube.
+    Args:
+        url_video (str): URL de la vidéo YouTube.
+        qualite (str): Libellé de qualité SaveTube.
+        user_agent (str, optionnel): User-Agent envoyé.
+    Returns:
+        tuple: (titre brut de la vidéo, lien de téléchargement)
+    Raises:
+        ResolutionHTTPErreur: si la séquence n'aboutit pas.
+        requests.RequestException: en cas d'erreur réseau ou HTTP.
+    """
+    headers = {"Origin": SAVETUBE_ORIGIN, "Referer": SAVETUBE_ORIGIN + "/", "Accept": "application/json"}
+    if user_agent:
+        headers["User-Agent"] = user_agent
+    cdn = _appel("GET", f"{SAVETUBE_API_BASE}/random-cdn", headers).get("cdn")
+    if not cdn:
+        raise ResolutionHTTPErreur("random-cdn: aucun CDN renvoyé")
+    base = _url_cdn(cdn)
+    info = _donnees(_appel("POST", f"{base}/v2/info", headers, json={"url": url_video}), "v2/info")
+    if isinstance(info, str):
+        info = _dechiffrer(info)
+    cle = info.get("key")
+    if not cle:
+        raise ResolutionHTTPErreur("v2/info: clé de vidéo absente")
+    lien = _donnees(_appel("POST", f"{base}/download", headers, json={
+        "downloadType": "audio",
+        "quality": qualite_audio(qualite),
+        "key": cle
+    }), "download")
+    download_url = lien.get("downloadUrl") if isinstance(lien, dict) else None
+    if not download_url:
+        raise ResolutionHTTPErreur("download: lien de téléchargement absent")
+    return info.get("title", ""), download_url
@@ -4,35 +4,88 @@ Script principal pour le scraping de vidéos YouTube, l'extraction audio, l'inse
 Fonctionnement général :
 - Récupère les playlists à traiter depuis un fichier texte.
 - Pour chaque vidéo, vérifie si elle existe déjà dans MongoDB et MinIO.
-- Si besoin, télécharge l'audio via SaveTube ou yt-dlp, puis l'upload sur MinIO.
+- Si besoin, télécharge l'audio via SaveTube ou yt-dlp et le transfère sur MinIO (en flux direct par défaut).
 - Insère les logs et métadonnées dans MongoDB.
-- Supporte le téléchargement massif et le multithreading.
+- Supporte le téléchargement massif : pipeline par étapes (résolution, téléchargement, transcodage, upload) reliées par des files bornées.
+- Tient un manifeste de run (journal local) qui permet de reprendre un run interrompu (--resume).
+- Peut alimenter une file de jobs MongoDB (--mode enqueue) que plusieurs conteneurs se partagent (--mode worker).
+- L'import du module ne fait aucune entrée/sortie : playlists, dossier audio, logs et clients (YouTube, MongoDB, MinIO)
+  sont préparés au premier usage, ce qui permet au CLI (cli.py) et au retry de démarrer rapidement.
 """
 import os
 import csv
+import json
 import random
+import hashlib
 import isodate
 import logging
 import time
 import re
-import subprocess
+import atexit
+import socket
+import argparse
+import queue
+import threading
+import multiprocessing
 import concurrent.futures
 from datetime import timedelta
-from googleapiclient.discovery import build
 import requests
-from tqdm import tqdm
-from playwright.sync_api import sync_playwright
 from dotenv import load_dotenv
-from mongo_utils import insert_log, insert_video_metadata, video_exists_in_metadata
-from minio_utils import upload_audio, minio_est_disponible, client as minio_client, MINIO_BUCKET
+from mongo_utils import insert_log, insert_video_metadata, video_exists_in_metadata, load_known_video_ids, ensure_indexes, close_writes, load_playlist_states, save_playlist_state, find_audio_hash, claim_audio_hash, is_audio_alias, load_alias_video_ids
+from minio_utils import upload_audio, upload_stream, remove_audio, verify_and_cleanup, minio_accepte_uploads, stats_upload, list_object_names, get_client as get_minio_client, MINIO_BUCKET, MINIO_PART_SIZE
+from browser_pool import PoolNavigateurs
+from log_utils import configurer_logging, capturer_html, suivi_transfert
+from rate_limiter import LimiteurAdaptatif
+from pipeline import Pipeline, Etape, Reprise, executer_sequentiel
+from status_table import TableStatuts
+from run_manifest import ManifesteRun
+from http_utils import ouvrir, copier_reponse, etat_connexions, stats_connexions, HTTP_BUFFER_SIZE
+from link_cache import get_link_cache, est_lien_expire
+from savetube_http import resoudre_lien_http, SAVETUBE_INFO_KEY
+import job_queue
+import ytdlp_engine
+import metrics
 
 load_dotenv()
 
 API_KEY = os.getenv("GOOGLE_API")
 AUDIO_DIR = "audios/"
+PLAYLIST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "playlist.txt")
 MAX_DOWNLOAD_RETRIES = 5
-MAX_WORKERS = 10
+MAX_WORKERS = 32  # Plafond de threads ; la concurrence effective est pilotée par les limiteurs adaptatifs
+MAX_PLAYLIST_WORKERS = 8  # Playlists énumérées simultanément
+YOUTUBE_BATCH_SIZE = 50  # Nombre maximal d'ids par appel videos().list
+# Ignorer l'état des playlists enregistré et tout ré-énumérer
+PLAYLIST_FULL_CRAWL = os.getenv("PLAYLIST_FULL_CRAWL", "0") == "1"
+# Mode worker : attente (secondes) entre deux interrogations d'une file de jobs vide
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "10"))
 DELAY_BETWEEN_DOWNLOADS = (3, 10)
+# Qualité demandée à SaveTube (libellé de la liste déroulante, clé du cache de liens)
+SAVETUBE_QUALITY = os.getenv("SAVETUBE_QUALITY", "MP3 320kbps")
+# Résolution des liens SaveTube : "auto" (HTTP direct, navigateur en secours), "http" ou "playwright"
+SAVETUBE_RESOLVER = os.getenv("SAVETUBE_RESOLVER", "auto")
+# Transfert direct HTTP -> MinIO (sans fichier local) ; le disque n'est utilisé qu'en secours si activé
+STREAM_TO_MINIO = os.getenv("STREAM_TO_MINIO", "1") == "1"
+LOCAL_DISK_FALLBACK = os.getenv("LOCAL_DISK_FALLBACK", "0") == "1"
+# Téléchargements disque reprenables : plages parallèles pour les gros fichiers, fréquence d'enregistrement de l'état
+DOWNLOAD_SEGMENTS = int(os.getenv("DOWNLOAD_SEGMENTS", "4"))
+DOWNLOAD_SEGMENT_MIN_SIZE = int(os.getenv("DOWNLOAD_SEGMENT_MIN_SIZE", str(64 * 1024 * 1024)))
+DOWNLOAD_STATE_INTERVAL = 4 * 1024 * 1024
+# Déduplication par contenu : empreinte SHA-256 calculée pendant le transfert, un seul objet MinIO par audio
+AUDIO_DEDUP = os.getenv("AUDIO_DEDUP", "1") == "1"
+
+# Budgets de concurrence adaptatifs par backend (croissance additive, réduction multiplicative sur congestion)
+limiteur_savetube = LimiteurAdaptatif("savetube", initial=4, maximum=MAX_WORKERS)
+limiteur_ytdlp = LimiteurAdaptatif("ytdlp", initial=2, maximum=MAX_WORKERS // 2)
+limiteur_upload = LimiteurAdaptatif("upload", initial=4, maximum=MAX_WORKERS)
+
+# Largeur (nombre de threads) de chaque étape du pipeline ; le transcodage est un travail CPU confié à des processus
+PIPELINE_RESOLVE_WORKERS = int(os.getenv("PIPELINE_RESOLVE_WORKERS", str(MAX_WORKERS // 2)))
+PIPELINE_DOWNLOAD_WORKERS = int(os.getenv("PIPELINE_DOWNLOAD_WORKERS", str(MAX_WORKERS)))
+PIPELINE_YTDLP_WORKERS = int(os.getenv("PIPELINE_YTDLP_WORKERS", str(MAX_WORKERS // 2)))
+PIPELINE_TRANSCODE_WORKERS = int(os.getenv("PIPELINE_TRANSCODE_WORKERS", str(os.cpu_count() or 1)))
+PIPELINE_UPLOAD_WORKERS = int(os.getenv("PIPELINE_UPLOAD_WORKERS", "8"))
+YTDLP_TRANSCODE_MP3 = ytdlp_engine.YTDLP_TRANSCODE_MP3
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36",
@@ -67,21 +120,105 @@ def extraire_playlist_id(url_ou_id):
     # Fallback: retourne la ligne brute
     return url_ou_id.strip()
 
-with open(os.path.join(os.path.dirname(__file__), "playlist.txt"), "r") as f:
-    PLAYLISTS = [extraire_playlist_id(line.strip()) for line in f if line.strip() and not line.startswith("#") and ("list=" in line or (line.startswith("PL") and "http" not in line))]
-if not os.path.exists(AUDIO_DIR):
-    os.makedirs(AUDIO_DIR)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("youtube_download.log"),
-        logging.StreamHandler()
-    ]
-)
+def charger_playlists(chemin=PLAYLIST_FILE):
+    """
+    Lit les identifiants de playlists d'un fichier texte (une URL ou un ID par ligne, # pour commenter).
+    Args:
+        - chemin: str, chemin du fichier de playlists
+    Returns:
+        - list: identifiants des playlists
+    """
+    with open(chemin, "r") as f:
+        return [extraire_playlist_id(line.strip()) for line in f if line.strip() and not line.startswith("#") and ("list=" in line or (line.startswith("PL") and "http" not in line))]
+
+# Playlists à traiter, lues au premier usage (get_playlists)
+PLAYLISTS = None
+
+def get_playlists():
+    """
+    Retourne les playlists à traiter, lues depuis PLAYLIST_FILE au premier appel.
+    Returns:
+        - list: identifiants des playlists
+    """
+    global PLAYLISTS
+    if PLAYLISTS is None:
+        PLAYLISTS = charger_playlists()
+    return PLAYLISTS
+
 logger = logging.getLogger()
 
+def est_congestion(erreur):
+    """
+    Indique si une erreur traduit une saturation du backend : timeout, HTTP 429 ou redirection SaveTube.
+    Args:
+        - erreur: Exception levée pendant la résolution, le téléchargement ou l'upload
+    Returns:
+        - bool: True si l'erreur doit réduire la concurrence du backend
+    """
+    if isinstance(erreur, (SaveTubeRedirection, requests.Timeout, TimeoutError)):
+        return True
+    # Les timeouts Playwright sont des playwright.sync_api.TimeoutError (sans lien avec TimeoutError)
+    if type(erreur).__name__ == 'TimeoutError':
+        return True
+    response = getattr(erreur, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return True
+    message = str(erreur)
+    return '429' in message or 'Too Many Requests' in message
+
+def _signaler_erreur(limiteur, erreur):
+    """
+    Réduit la concurrence du backend si l'erreur est un signal de congestion.
+    Args:
+        - limiteur: LimiteurAdaptatif ou None
+        - erreur: Exception rencontrée
+    Returns:
+        - bool: True si l'erreur est une congestion
+    """
+    congestion = est_congestion(erreur)
+    if congestion and limiteur is not None:
+        if limiteur.congestion():
+            logger.warning(f"Congestion détectée ({erreur}), limite réduite: {limiteur.etat()}")
+    return congestion
+
+def _invalider_lien(cle_cache, erreur):
+    """
+    Retire un lien SaveTube du cache si l'erreur de téléchargement montre qu'il a expiré (HTTP 403/404/410).
+    Args:
+        - cle_cache: tuple (video_id, qualité) ou None
+        - erreur: Exception rencontrée pendant le téléchargement
+    Returns:
+        - None
+    """
+    if cle_cache is not None and est_lien_expire(erreur):
+        logger.warning(f"Lien expiré pour {cle_cache[0]} ({erreur}), retiré du cache")
+        get_link_cache().invalider(*cle_cache)
+
+def etat_limiteurs():
+    """
+    Décrit les budgets de concurrence courants de chaque backend et la réutilisation des connexions HTTP.
+    Returns:
+        - str: utilisation et limite de chaque limiteur, connexions ouvertes / requêtes envoyées
+    """
+    return " ".join([l.etat() for l in (limiteur_savetube, limiteur_ytdlp, limiteur_upload)] + [etat_connexions()])
+
+def demarrer_metriques():
+    """
+    Publie les jauges du scraper (limites de concurrence, connexions HTTP) et démarre les sorties de métriques
+    configurées (serveur /metrics, instantanés JSON, trace Chrome).
+    Returns:
+        - None
+    """
+    limiteurs = (limiteur_savetube, limiteur_ytdlp, limiteur_upload)
+    metrics.registre.jauge("concurrency_limit", "Limite de concurrence courante par backend",
+                           lambda: {l.nom: l.limite for l in limiteurs}, etiquette="backend")
+    metrics.registre.jauge("http_connections_opened", "Connexions HTTP ouvertes", lambda: stats_connexions()['connexions'])
+    metrics.registre.jauge("http_requests_sent", "Requêtes HTTP envoyées", lambda: stats_connexions()['requetes'])
+    metrics.registre.jauge("minio_upload_bytes_per_second", "Débit moyen des uploads MinIO", lambda: stats_upload()['debit_moyen'])
+    metrics.registre.jauge("minio_uploads_parked", "Uploads parqués en attente du rétablissement de MinIO", lambda: stats_upload()['en_attente'])
+    metrics.registre.jauge("minio_breaker_open", "Disjoncteur MinIO ouvert (1) ou fermé (0)", lambda: int(stats_upload()['disjoncteur'] != 'ferme'))
+    metrics.demarrer()
+
 def nettoyer_nom_fichier(titre):
     """
     Nettoie le titre pour générer un nom de fichier valide et court.
@@ -93,34 +230,334 @@ def nettoyer_nom_fichier(titre):
     titre = re.sub(r'[\\/*?:"<>|]', "", titre)
     return titre.strip()[:150]
 
-def telecharger_fichier(url, nom_fichier):
+class _RepriseImpossible(Exception):
+    """
+    Le serveur a ignoré la requête Range (réponse 200) ou le fichier a changé : le téléchargement doit repartir de zéro.
+    """
+
+def _chemin_etat_reprise(chemin_part):
+    """
+    Retourne le chemin du fichier d'état (sidecar JSON) associé à un fichier partiel.
+    Args:
+        - chemin_part: str, chemin du fichier .part
+    Returns:
+        - str: chemin du fichier .part.json
+    """
+    return chemin_part + ".json"
+
+def _charger_etat_reprise(chemin_part):
+    """
+    Charge l'état de reprise d'un téléchargement partiel (URL, taille attendue, validateur, segments).
+    Args:
+        - chemin_part: str, chemin du fichier .part
+    Returns:
+        - dict ou None: état de reprise, None si aucun téléchargement partiel exploitable
+    """
+    if not os.path.exists(chemin_part):
+        return None
+    try:
+        with open(_chemin_etat_reprise(chemin_part), "r") as f:
+            etat = json.load(f)
+        return etat if etat.get('segments') else None
+    except (OSError, ValueError):
+        return None
+
+def _sauvegarder_etat_reprise(chemin_part, etat):
+    """
+    Enregistre l'état de reprise de façon atomique (fichier temporaire puis renommage).
+    Args:
+        - chemin_part: str, chemin du fichier .part
+        - etat: dict, état de reprise
+    Returns:
+        - None
+    """
+    chemin = _chemin_etat_reprise(chemin_part)
+    with open(chemin + ".tmp", "w") as f:
+        json.dump(etat, f)
+    os.replace(chemin + ".tmp", chemin)
+
+def _supprimer_reprise(chemin_part):
+    """
+    Supprime le fichier partiel et son état de reprise.
+    Args:
+        - chemin_part: str, chemin du fichier .part
+    Returns:
+        - None
+    """
+    for chemin in (chemin_part, _chemin_etat_reprise(chemin_part)):
+        if os.path.exists(chemin):
+            os.remove(chemin)
+
+def _etat_depuis_reponse(url, r):
+    """
+    Construit l'état de reprise d'un nouveau téléchargement à partir des en-têtes de la première réponse.
+    Args:
+        - url: str, URL du fichier
+        - r: requests.Response, réponse complète (200)
+    Returns:
+        - dict: url, longueur (ou None), validateur (ETag fort ou Last-Modified, ou None), ranges, segments
+    """
+    longueur = int(r.headers['content-length']) if r.headers.get('content-length') and 'content-encoding' not in r.headers else None
+    etag = r.headers.get('etag')
+    # Un ETag faible ne peut pas servir de validateur pour If-Range
+    validateur = etag if etag and not etag.startswith('W/') else r.headers.get('last-modified')
+    return {
+        'url': url,
+        'longueur': longueur,
+        'validateur': validateur,
+        'ranges': r.headers.get('accept-ranges', '').lower() == 'bytes',
+        'segments': [[0, longueur - 1 if longueur else None, 0]]
+    }
+
+def _decouper_segments(longueur, nombre):
+    """
+    Découpe un fichier en plages contiguës de tailles égales.
+    Args:
+        - longueur: int, taille totale en octets
+        - nombre: int, nombre de plages
+    Returns:
+        - list: segments [début, fin incluse, position courante]
+    """
+    taille = -(-longueur // nombre)
+    return [[debut, min(debut + taille, longueur) - 1, debut] for debut in range(0, longueur, taille)]
+
+def _segment_termine(segment):
+    """Indique si une plage [début, fin, position] a été entièrement reçue."""
+    return segment[1] is not None and segment[2] > segment[1]
+
+def _ecrire_segment(r, chemin_part, segment, bar, sauvegarder, empreinte=None):
+    """
+    Ecrit le corps d'une réponse dans le fichier partiel à partir de la position du segment, en faisant avancer celle-ci.
+    Args:
+        - r: requests.Response, réponse en flux
+        - chemin_part: str, chemin du fichier .part (déjà créé)
+        - segment: list, [début, fin, position] mis à jour en place
+        - bar: SuiviTransfert, progression du transfert
+        - sauvegarder: callable, enregistre l'état de reprise (appelé périodiquement)
+        - empreinte: hashlib, optionnel, condensat mis à jour avec les octets écrits
+    Returns:
+        - None
+    """
+    depuis_sauvegarde = 0
+    with open(chemin_part, 'r+b') as f:
+        f.seek(segment[2])
+
+        def _avancer(octets):
+            nonlocal depuis_sauvegarde
+            segment[2] += octets
+            bar.update(octets)
+            depuis_sauvegarde += octets
+            if depuis_sauvegarde >= DOWNLOAD_STATE_INTERVAL:
+                f.flush()
+                sauvegarder()
+                depuis_sauvegarde = 0
+        copier_reponse(r, f, progression=_avancer, empreinte=empreinte)
+
+def _reprendre_segment(url, chemin_part, etat, segment, bar, sauvegarder):
+    """
+    Télécharge la partie manquante d'un segment avec une requête Range (et If-Range si un validateur est connu).
+    Args:
+        - url: str, URL du fichier
+        - chemin_part: str, chemin du fichier .part
+        - etat: dict, état de reprise
+        - segment: list, [début, fin, position]
+        - bar: SuiviTransfert, progression du transfert
+        - sauvegarder: callable, enregistre l'état de reprise
+    Returns:
+        - None
+    Raises:
+        - _RepriseImpossible: si le serveur renvoie le fichier complet ou une taille différente
+    """
+    fin = '' if segment[1] is None else segment[1]
+    headers = {'Range': f"bytes={segment[2]}-{fin}"}
+    if etat['validateur']:
+        headers['If-Range'] = etat['validateur']
+    with ouvrir(url, headers=headers) as r:
+        if r.status_code == 416 and segment[1] is None:
+            # Plage demandée au-delà de la fin : le fichier de taille inconnue était déjà complet
+            segment[1] = segment[2] - 1
+            return
+        r.raise_for_status()
+        if r.status_code != 206:
+            raise _RepriseImpossible(f"réponse {r.status_code} à une requête Range")
+        total = r.headers.get('content-range', '').rpartition('/')[2]
+        if etat['longueur'] and total.isdigit() and int(total) != etat['longueur']:
+            raise _RepriseImpossible(f"taille distante {total} différente de {etat['longueur']}")
+        _ecrire_segment(r, chemin_part, segment, bar, sauvegarder)
+    if segment[1] is None:
+        segment[1] = segment[2] - 1
+
+def telecharger_fichier(url, nom_fichier, limiteur=None, cle_cache=None, empreinte=None):
     """
     Télécharge un fichier depuis une URL et l'enregistre localement avec une barre de progression.
+    Le téléchargement est repris là où il s'était arrêté : les octets reçus sont conservés dans "nom_fichier.part"
+    et un fichier d'état "nom_fichier.part.json" mémorise l'URL, la taille attendue, le validateur (ETag/Last-Modified)
+    et la position de chaque plage. Une nouvelle tentative ne demande que les octets manquants (Range + If-Range),
+    et ne repart de zéro que si le serveur ignore les plages ou si le fichier distant a changé.
+    Les gros fichiers (DOWNLOAD_SEGMENT_MIN_SIZE) sont téléchargés en DOWNLOAD_SEGMENTS plages parallèles.
     Args:
         - url: str, URL du fichier à télécharger
         - nom_fichier: str, chemin de sauvegarde local
+        - limiteur: LimiteurAdaptatif, optionnel, budget à réduire en cas de congestion
+        - cle_cache: tuple (video_id, qualité), optionnel, lien à retirer du cache s'il a expiré
+        - empreinte: hashlib, optionnel, condensat du fichier, calculé pendant la réception d'un téléchargement
+          séquentiel complet, ou relu sur le disque après une reprise ou un téléchargement par plages
     Returns:
         - bool: True si le téléchargement a réussi, False sinon
     """
+    chemin_part = nom_fichier + ".part"
+    os.makedirs(os.path.dirname(nom_fichier) or ".", exist_ok=True)
+    etat = _charger_etat_reprise(chemin_part)
+    verrou = threading.Lock()
+    debut = time.perf_counter()
+    deja_recus = 0
+    condense = False
+
+    def _sauvegarder():
+        with verrou:
+            _sauvegarder_etat_reprise(chemin_part, etat)
+
     try:
-        with requests.get(url, stream=True, timeout=30) as r:
+        with suivi_transfert() as bar:
+            if etat is not None:
+                bar.total = etat['longueur']
+                bar.update(sum(s[2] - s[0] for s in etat['segments']))
+                deja_recus = bar.n
+                logger.info(f"Reprise de {nom_fichier} à {bar.n} octets")
+                etat['url'] = url
+                try:
+                    _telecharger_segments(url, chemin_part, etat, bar, _sauvegarder)
+                except _RepriseImpossible as e:
+                    logger.warning(f"Reprise impossible pour {nom_fichier} ({e}), redémarrage complet")
+                    _supprimer_reprise(chemin_part)
+                    etat = None
+                    deja_recus = 0
+                    bar.reset()
+            if etat is None:
+                with ouvrir(url) as r:
+                    r.raise_for_status()
+                    etat = _etat_depuis_reponse(url, r)
+                    bar.total = etat['longueur']
+                    open(chemin_part, 'wb').close()
+                    _sauvegarder()
+                    segmenter = etat['ranges'] and DOWNLOAD_SEGMENTS > 1 and (etat['longueur'] or 0) >= DOWNLOAD_SEGMENT_MIN_SIZE
+                    if segmenter:
+                        # La première réponse est abandonnée : chaque plage est demandée séparément
+                        etat['segments'] = _decouper_segments(etat['longueur'], DOWNLOAD_SEGMENTS)
+                        with open(chemin_part, 'r+b') as f:
+                            f.truncate(etat['longueur'])
+                    else:
+                        _ecrire_segment(r, chemin_part, etat['segments'][0], bar, _sauvegarder, empreinte)
+                        condense = True
+                        if etat['segments'][0][1] is None:
+                            etat['segments'][0][1] = etat['segments'][0][2] - 1
+                if segmenter:
+                    _telecharger_segments(url, chemin_part, etat, bar, _sauvegarder)
+            taille = os.path.getsize(chemin_part)
+            if etat['longueur'] and taille != etat['longueur']:
+                raise IOError(f"taille incomplète {taille}/{etat['longueur']}")
+            metrics.observer_debit('disque', bar.n - deja_recus, time.perf_counter() - debut)
+        if empreinte is not None and not condense:
+            _condenser_fichier(chemin_part, empreinte)
+        os.replace(chemin_part, nom_fichier)
+        _supprimer_reprise(chemin_part)
+        return True
+    except Exception as e:
+        metrics.registre.compteur("download_failures_total", "Téléchargements échoués").inc(source='disque')
+        logger.error(f"Téléchargement échoué pour {nom_fichier}: {str(e)}")
+        _signaler_erreur(limiteur, e)
+        _invalider_lien(cle_cache, e)
+        return False
+    finally:
+        # Les octets déjà reçus restent exploitables par la prochaine tentative
+        if etat is not None and os.path.exists(chemin_part):
+            _sauvegarder()
+
+def _telecharger_segments(url, chemin_part, etat, bar, sauvegarder):
+    """
+    Télécharge en parallèle les plages non terminées d'un fichier partiel.
+    Args:
+        - url: str, URL du fichier
+        - chemin_part: str, chemin du fichier .part
+        - etat: dict, état de reprise
+        - bar: SuiviTransfert, progression du transfert
+        - sauvegarder: callable, enregistre l'état de reprise
+    Returns:
+        - None
+    """
+    restants = [s for s in etat['segments'] if not _segment_termine(s)]
+    if not restants:
+        return
+    if len(restants) == 1:
+        _reprendre_segment(url, chemin_part, etat, restants[0], bar, sauvegarder)
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(restants), thread_name_prefix="segment") as executor:
+        futures = [executor.submit(_reprendre_segment, url, chemin_part, etat, s, bar, sauvegarder) for s in restants]
+        for future in futures:
+            future.result()
+
+def _condenser_fichier(chemin, empreinte):
+    """
+    Met à jour un condensat avec le contenu d'un fichier local, lu par blocs de HTTP_BUFFER_SIZE.
+    Args:
+        - chemin: str, chemin du fichier
+        - empreinte: hashlib, condensat à mettre à jour
+    Returns:
+        - str: empreinte hexadécimale
+    """
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(HTTP_BUFFER_SIZE), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+class _FluxTelechargement:
+    """
+    Adapte une réponse requests en flux lisible par MinIO (read(n)) tout en mettant à jour une barre de progression
+    et, si fourni, un condensat du contenu transféré.
+    """
+
+    def __init__(self, response, bar, empreinte=None):
+        self._raw = response.raw
+        self._raw.decode_content = True
+        self._bar = bar
+        self._empreinte = empreinte
+
+    def read(self, taille=-1):
+        data = self._raw.read(taille if taille and taille > 0 else None)
+        if data:
+            self._bar.update(len(data))
+            if self._empreinte is not None:
+                self._empreinte.update(data)
+        return data or b""
+
+def telecharger_vers_minio(url, object_name, part_size=MINIO_PART_SIZE, limiteur=None, cle_cache=None, empreinte=None):
+    """
+    Télécharge un fichier depuis une URL et le transmet directement à MinIO en multipart, sans écriture disque.
+    La mémoire utilisée est bornée par la taille d'une part.
+    Args:
+        - url: str, URL du fichier à télécharger
+        - object_name: str, nom de l'objet dans MinIO
+        - part_size: int, taille des parts multipart en octets
+        - limiteur: LimiteurAdaptatif, optionnel, budget à réduire en cas de congestion
+        - cle_cache: tuple (video_id, qualité), optionnel, lien à retirer du cache s'il a expiré
+        - empreinte: hashlib, optionnel, condensat mis à jour avec les octets transférés
+    Returns:
+        - str ou bool: nom de l'objet uploadé, False en cas d'échec
+    """
+    debut = time.perf_counter()
+    try:
+        with ouvrir(url) as r:
             r.raise_for_status()
             total = int(r.headers.get('content-length', 0))
-            with open(nom_fichier, 'wb') as f, tqdm(
-                desc=os.path.basename(nom_fichier),
-                total=total,
-                unit='B',
-                unit_scale=True,
-                unit_divisor=1024,
-                leave=False
-            ) as bar:
-                for chunk in r.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        bar.update(len(chunk))
-            return True
+            with suivi_transfert(total) as bar:
+                result = upload_stream(_FluxTelechargement(r, bar, empreinte), object_name, total or -1, part_size=part_size)
+                metrics.observer_debit('flux', bar.n, time.perf_counter() - debut)
+                return result
     except Exception as e:
-        logger.error(f"Téléchargement échoué pour {nom_fichier}: {str(e)}")
+        metrics.registre.compteur("download_failures_total", "Téléchargements échoués").inc(source='flux')
+        logger.error(f"Transfert en flux vers MinIO échoué pour {object_name}: {str(e)}")
+        _signaler_erreur(limiteur, e)
+        _invalider_lien(cle_cache, e)
         return False
 
 def audio_exists_in_minio(object_name):
@@ -132,90 +569,412 @@ def audio_exists_in_minio(object_name):
         - bool: True si l'objet existe, False sinon
     """
     try:
-        return minio_client.stat_object(MINIO_BUCKET, object_name) is not None
+        return get_minio_client().stat_object(MINIO_BUCKET, object_name) is not None
     except Exception:
         return False
 
-def telecharger_avec_ytdlp(video_info):
+def _video_id_objet(object_name):
+    """
+    Retourne l'identifiant de vidéo d'un nom d'objet MinIO ("{video_id}.{extension}").
+    Args:
+        - object_name: str, nom de l'objet
+    Returns:
+        - str: identifiant de la vidéo
+    """
+    return os.path.splitext(os.path.basename(object_name))[0]
+
+def audio_exists_for_video(video_id):
+    """
+    Vérifie si un fichier audio existe dans MinIO pour une vidéo, quelle que soit son extension (mp3, m4a, webm...).
+    Args:
+        - video_id: str, identifiant de la vidéo
+    Returns:
+        - bool: True si un objet "{video_id}.*" existe, False sinon
+    """
+    try:
+        return any(True for _ in get_minio_client().list_objects(MINIO_BUCKET, prefix=f"{video_id}."))
+    except Exception:
+        return False
+
+# Index d'existence préchargé (None tant que precharger_index_existence n'a pas été appelé)
+_videos_connues = None
+_audios_minio = None  # video_id ayant un objet audio dans MinIO, quelle que soit l'extension
+
+def precharger_index_existence():
+    """
+    Charge en mémoire, en une requête MongoDB projetée et un listing MinIO, les vidéos déjà traitées.
+    Les vidéos enregistrées comme alias d'un audio identique comptent comme présentes dans MinIO.
+    Les workers vérifient ensuite l'existence localement au lieu de deux appels réseau par vidéo.
+    Returns:
+        - None
+    """
+    global _videos_connues, _audios_minio
+    debut = time.time()
+    _videos_connues = load_known_video_ids()
+    objets = list_object_names()
+    _audios_minio = {_video_id_objet(name) for name in objets} | load_alias_video_ids() if objets is not None else None
+    logger.info(
+        f"Index d'existence chargé en {time.time() - debut:.1f}s: "
+        f"{len(_videos_connues) if _videos_connues is not None else 'indisponible'} vidéos MongoDB, "
+        f"{len(_audios_minio) if _audios_minio is not None else 'indisponible'} audios MinIO"
+    )
+
+def video_connue(video_id):
+    """
+    Vérifie si une vidéo est présente dans les métadonnées, via l'index préchargé s'il existe.
+    Args:
+        - video_id: str, identifiant de la vidéo
+    Returns:
+        - bool: True si la vidéo est connue dans MongoDB
+    """
+    if _videos_connues is None:
+        return video_exists_in_metadata(video_id)
+    return video_id in _videos_connues
+
+def audio_connu(video_id):
+    """
+    Vérifie si un audio de la vidéo est présent dans MinIO (toute extension), via l'index préchargé s'il existe.
+    Args:
+        - video_id: str, identifiant de la vidéo
+    Returns:
+        - bool: True si un objet audio de la vidéo est présent dans le bucket, ou si la vidéo est un alias d'un audio stocké
+    """
+    if _audios_minio is None:
+        return audio_exists_for_video(video_id) or is_audio_alias(video_id)
+    return video_id in _audios_minio
+
+def _marquer_audio_minio(object_name):
+    """
+    Enregistre dans l'index d'existence un objet audio qui vient d'être uploadé.
+    Args:
+        - object_name: str, nom de l'objet dans MinIO
+    Returns:
+        - None
+    """
+    if _audios_minio is not None:
+        _audios_minio.add(_video_id_objet(object_name))
+
+def enregistrer_metadata(video_data):
+    """
+    Insère les métadonnées d'une vidéo et la marque comme connue dans l'index d'existence.
+    Args:
+        - video_data: dict, métadonnées de la vidéo
+    Returns:
+        - ObjectId ou None: résultat de insert_video_metadata
+    """
+    result = insert_video_metadata(video_data)
+    if _videos_connues is not None:
+        _videos_connues.add(video_data['video_id'])
+    return result
+
+def uploader_audio(file_path, object_name=None, content_type=None):
+    """
+    Upload un fichier audio dans MinIO et le marque comme présent dans l'index d'existence.
+    Args:
+        - file_path: str, chemin local du fichier
+        - object_name: str, optionnel, nom de l'objet dans MinIO
+        - content_type: str, optionnel, type MIME (déduit de l'extension sinon)
+    Returns:
+        - str ou bool: nom de l'objet uploadé ou False en cas d'échec
+    """
+    with limiteur_upload, metrics.etape("upload"):
+        result = upload_audio(file_path, object_name, content_type=content_type)
+    if result:
+        limiteur_upload.succes()
+        metrics.registre.compteur("upload_bytes_total", "Octets uploadés dans MinIO depuis le disque").inc(os.path.getsize(file_path))
+        _marquer_audio_minio(result)
+    else:
+        limiteur_upload.congestion()
+    return result
+
+# Fonctions appelées à chaque changement d'étape d'une vidéo : fn(video_id, etape)
+_ecouteurs_etape = []
+
+def ajouter_ecouteur_etape(ecouteur):
     """
-    Méthode de secours utilisant yt-dlp pour télécharger l'audio d'une vidéo YouTube si SaveTube échoue.
+    Enregistre une fonction appelée à chaque changement d'étape d'une vidéo (resolving, downloading, uploaded).
     Args:
+        - ecouteur: callable, fonction ecouteur(video_id, etape)
+    Returns:
+        - None
+    """
+    _ecouteurs_etape.append(ecouteur)
+
+def signaler_etape(video_id, etape):
+    """
+    Notifie les écouteurs enregistrés du passage d'une vidéo à une nouvelle étape.
+    Une erreur d'un écouteur n'interrompt jamais le traitement de la vidéo.
+    Args:
+        - video_id: str, identifiant de la vidéo
+        - etape: str, nom de l'étape atteinte
+    Returns:
+        - None
+    """
+    for ecouteur in _ecouteurs_etape:
+        try:
+            ecouteur(video_id, etape)
+        except Exception as e:
+            logger.error(f"Erreur écouteur d'étape pour {video_id} ({etape}): {e}")
+
+class SaveTubeRedirection(Exception):
+    """
+    Levée lorsque SaveTube renvoie vers sa page d'accueil au lieu de la section de téléchargement.
+    La vidéo doit alors être traitée par la méthode alternative yt-dlp.
+    """
+
+def bloquer_publicites(route, request):
+    """
+    Route Playwright interrompant les requêtes vers les régies publicitaires.
+    Args:
+        - route: objet Route Playwright
+        - request: objet Request Playwright
+    Returns:
+        - None
+    """
+    ads_domains = ["doubleclick.net", "googlesyndication.com", "adservice.google.com"]
+    if any(d in request.url for d in ads_domains):
+        route.abort()
+    else:
+        route.continue_()
+
+def _initialiser_contexte_savetube(context):
+    """
+    Installe une seule fois par contexte navigateur le blocage des publicités.
+    Args:
+        - context: objet BrowserContext Playwright
+    Returns:
+        - None
+    """
+    context.route("**/*", bloquer_publicites)
+
+_browser_pool = None
+_browser_pool_lock = threading.Lock()
+_pool_transcodage = None
+_pool_transcodage_lock = threading.Lock()
+
+def get_browser_pool():
+    """
+    Retourne le pool de navigateurs partagé, créé au premier usage et fermé à la sortie du programme.
+    Returns:
+        - PoolNavigateurs: pool de navigateurs persistants
+    """
+    global _browser_pool
+    with _browser_pool_lock:
+        if _browser_pool is None:
+            _browser_pool = PoolNavigateurs(
+                options_contexte=lambda: {
+                    'user_agent': random.choice(USER_AGENTS),
+                    'viewport': {'width': 1280, 'height': 720}
+                },
+                initialiser_contexte=_initialiser_contexte_savetube
+            )
+            atexit.register(_browser_pool.fermer)
+        return _browser_pool
+
+def resoudre_lien_savetube(page, etat_contexte, video_info):
+    """
+    Pilote une page SaveTube pour obtenir le lien de téléchargement MP3 d'une vidéo.
+    Exécutée dans un thread du pool de navigateurs ; la bannière de consentement n'est
+    traitée qu'une fois par contexte (le cookie de consentement est conservé ensuite).
+    Args:
+        - page: objet Page Playwright neuf
+        - etat_contexte: dict, état conservé pendant la durée de vie du contexte
         - video_info: dict, informations sur la vidéo (video_id, url, etc.)
     Returns:
-        - dict: informations de la vidéo enrichies avec le statut et le chemin audio
+        - tuple: (titre nettoyé de la vidéo, lien de téléchargement)
+    Raises:
+        - SaveTubeRedirection: si SaveTube renvoie vers sa page d'accueil
     """
     video_id = video_info['video_id']
+    url_video = video_info['url']
+    # Vérification disponibilité SaveTube avant d'aller plus loin
     try:
-        subprocess.run([
-            'yt-dlp',
-            '-x',
-            '--audio-format', 'mp3',
-            '-o', f'{AUDIO_DIR}/%(id)s.%(ext)s',
-            video_info['url']
-        ], check=True)
-        mp3_path = os.path.join(AUDIO_DIR, f"{video_id}.mp3")
-        
-        if os.path.exists(mp3_path):
-            if upload_audio(mp3_path):
-                if verify_and_cleanup(mp3_path, f"{video_id}.mp3"):
-                    logger.info(f"Fichier {mp3_path} supprimé après vérification MinIO")
-                else:
-                    logger.error("Échec de la vérification MinIO, fichier conservé")
-            # Insertion métadonnées vidéo
-            insert_video_metadata({
-                'video_id': video_id,
-                'url': video_info['url'],
-                'title': video_info.get('title', ''),
-                'audio_path': mp3_path,
-                'status': 'success',
-                'timestamp': time.time()
-            })
-            return {**video_info, 'status': 'success', 'audio_path': mp3_path}
+        response = page.goto("https://yt.savetube.me/1kejjj1", timeout=15000)
+        if not response or response.status != 200:
+            logger.error(f"SaveTube indisponible ou erreur HTTP: {getattr(response, 'status', 'no response')}")
+            raise Exception("SaveTube non disponible")
+    except Exception as e:
+        logger.error(f"Impossible d'accéder à SaveTube: {e}")
+        raise
+    if not etat_contexte.get('consentement'):
+        try:
+            page.wait_for_selector("div.fc-consent-root", timeout=5000)
+            page.click("button.fc-cta-consent")
+            logger.info("Consent dialog dismissed")
+        except Exception:
+            logger.debug("No consent dialog found")
+        etat_contexte['consentement'] = True
+    redirection = False
+    html = None
+    try:
+        page.wait_for_selector("input.search-input", timeout=10000)
+        page.fill("input.search-input", url_video)
+        page.click("button:text('Get Video')")
+        # Nouvelle logique pour détecter la section de téléchargement
+        selectors = [
+            "#resultSection",
+            "#downloadSection",
+            ".download-area",
+            ".result-area",
+            "#result-section",
+            "#download-section",
+            ".result-section",
+            ".download-section"
+        ]
+        found = False
+        for sel in selectors:
+            try:
+                page.wait_for_selector(sel, timeout=7000)
+                found = True
+                logger.info(f"Section de téléchargement détectée avec le sélecteur: {sel}")
+                break
+            except Exception:
+                continue
+        if not found:
+            html = page.content()
+            # Recherche de message d'erreur ou page d'accueil générique
+            if 'No video found' in html or 'not found' in html.lower() or 'youtube shorts video download' in html.lower() or '<title>Download YouTube Shorts Video - YouTube Shorts Downloader</title>' in html:
+                redirection = True
+            else:
+                raise Exception("Section de téléchargement non trouvée")
     except Exception as e:
-        logger.error(f"Échec du téléchargement alternatif pour {video_id}: {str(e)}")
-    return {**video_info, 'status': 'failed'}
+        # Une seule capture de la page par échec, écrite à part (compressée, dédupliquée, limitée en débit)
+        capture = capturer_html(html or page.content, "savetube", video_id)
+        logger.error(f"Timeout ou erreur lors de l'attente de la section de téléchargement pour {video_id}: {e}",
+                     extra={"video_id": video_id, "capture": capture})
+        raise
+    if redirection:
+        capture = capturer_html(html, "savetube-redirection", video_id)
+        logger.error(f"Redirection vers la page d'accueil de SaveTube détectée pour {video_id}",
+                     extra={"video_id": video_id, "capture": capture})
+        raise SaveTubeRedirection(video_id)
+    titre_raw = page.query_selector("h3.text-left").inner_text()
+    titre_video = nettoyer_nom_fichier(titre_raw)
+    page.select_option("select#quality", label=SAVETUBE_QUALITY)
+    page.click("button:has-text('Get Link')")
+    page.wait_for_url("**/start-download**", timeout=30000)
+    page.wait_for_selector("a.text-white:has-text('Download')", timeout=20000)
+    btn = page.query_selector("a.text-white:has-text('Download')")
+    download_link = btn.get_attribute("href")
+    return titre_video, download_link
 
+_resolveur_http_sans_cle_signale = False
 
-def telecharger_video_savetube(video_info):
+def _resolveur_http_actif():
     """
-    Télécharge l'audio d'une vidéo YouTube via SaveTube (ou yt-dlp en secours), gère l'upload MinIO et l'insertion des métadonnées.
+    Indique si le résolveur HTTP direct doit être tenté. En mode auto, il est ignoré sans SAVETUBE_INFO_KEY :
+    les réponses chiffrées de SaveTube ne pourraient pas être lues et chaque vidéo ferait un essai voué à l'échec.
+    Returns:
+        - bool: True si la résolution HTTP est tentée
+    """
+    global _resolveur_http_sans_cle_signale
+    if SAVETUBE_RESOLVER == 'http':
+        return True
+    if SAVETUBE_RESOLVER != 'auto':
+        return False
+    if SAVETUBE_INFO_KEY:
+        return True
+    if not _resolveur_http_sans_cle_signale:
+        _resolveur_http_sans_cle_signale = True
+        logger.warning("SAVETUBE_INFO_KEY non configurée : résolution HTTP directe désactivée, utilisation du navigateur")
+    return False
+
+def resoudre_lien(video_info):
+    """
+    Résout le lien de téléchargement SaveTube d'une vidéo selon SAVETUBE_RESOLVER :
+    appels HTTP directs (sans navigateur), pool de navigateurs, ou HTTP puis navigateur en secours
+    (auto, HTTP tenté seulement si SAVETUBE_INFO_KEY est configurée).
+    Args:
+        - video_info: dict, informations sur la vidéo (video_id, url, etc.)
+    Returns:
+        - tuple: (titre nettoyé, lien de téléchargement, résolveur utilisé 'http' ou 'playwright')
+    Raises:
+        - SaveTubeRedirection: si SaveTube renvoie vers sa page d'accueil (navigateur)
+    """
+    if _resolveur_http_actif():
+        try:
+            titre_raw, download_link = resoudre_lien_http(video_info['url'], SAVETUBE_QUALITY, random.choice(USER_AGENTS))
+            return nettoyer_nom_fichier(titre_raw), download_link, 'http'
+        except Exception as e:
+            # Un backend saturé le serait aussi pour le navigateur : l'erreur remonte au mécanisme de réessai
+            if SAVETUBE_RESOLVER == 'http' or est_congestion(e):
+                raise
+            logger.warning(f"Résolution HTTP échouée pour {video_info['video_id']} ({e}), repli sur le navigateur")
+    titre_video, download_link = get_browser_pool().executer(
+        lambda page, etat: resoudre_lien_savetube(page, etat, video_info)
+    )
+    return titre_video, download_link, 'playwright'
+
+def _get_pool_transcodage():
+    """
+    Retourne le pool de processus dédié au transcodage, créé au premier usage et arrêté à la sortie du programme.
+    Returns:
+        - ProcessPoolExecutor: pool de PIPELINE_TRANSCODE_WORKERS processus
+    """
+    global _pool_transcodage
+    with _pool_transcodage_lock:
+        if _pool_transcodage is None:
+            # "spawn" : un fork depuis un processus multithreadé peut hériter de verrous tenus par d'autres threads
+            _pool_transcodage = concurrent.futures.ProcessPoolExecutor(
+                max_workers=PIPELINE_TRANSCODE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+            atexit.register(_pool_transcodage.shutdown)
+        return _pool_transcodage
+
+def _nouvelle_tache(video_info):
+    """
+    Crée la tâche de pipeline associée à une vidéo.
     Args:
         - video_info: dict, informations sur la vidéo (video_id, url, title, duration, etc.)
     Returns:
-        - dict: informations de la vidéo enrichies avec le statut, le chemin audio et autres métadonnées
+        - dict: tâche (vidéo, numéro de tentative, puis lien, fichier et format renseignés par les étapes)
+    """
+    return {'video': video_info, 'tentative': 0}
+
+def _traiter_video_connue(video_info):
+    """
+    Traite une vidéo déjà présente dans MongoDB ou dont le MP3 existe localement, sans la retélécharger.
+    Args:
+        - video_info: dict, informations sur la vidéo
+    Returns:
+        - bool: True si la vidéo a été traitée (rien à télécharger), False sinon
     """
     video_id = video_info['video_id']
-    url_video = video_info['url']
     mp3_path = os.path.join(AUDIO_DIR, f"{video_id}.mp3")
-    object_name = f"{video_id}.mp3"
     # Vérification MongoDB
-    if video_exists_in_metadata(video_id):
+    if video_connue(video_id):
         # Vérification MinIO
-        if audio_exists_in_minio(object_name):
+        if audio_connu(video_id):
             logger.info(f"Vidéo déjà présente dans MongoDB et MinIO: {video_id}, on saute.")
             video_info['audio_path'] = mp3_path
             video_info['status'] = 'success'
-            return video_info
+            return True
         else:
             logger.info(f"Vidéo déjà dans MongoDB mais pas dans MinIO: {video_id}, upload MinIO.")
             if os.path.exists(mp3_path) and os.path.getsize(mp3_path) > 0:
-                upload_audio(mp3_path)
-                return video_info
+                if uploader_audio(mp3_path):
+                    video_info['audio_path'] = mp3_path
+                    video_info['status'] = 'success'
+                else:
+                    _marquer_video_echec(video_info)
+                return True
             else:
                 logger.warning(f"Fichier local manquant pour {video_id}, impossible d'uploader dans MinIO.")
                 video_info['status'] = 'missing_local_audio'
-                return video_info
+                return True
     # Sinon, on continue le téléchargement normal
     if os.path.exists(mp3_path) and os.path.getsize(mp3_path) > 0:
         logger.info(f"Existant: {video_id}")
+        # Upload Minio : sans objet dans MinIO, la vidéo ne doit pas être enregistrée comme traitée
+        if not uploader_audio(mp3_path):
+            _marquer_video_echec(video_info)
+            return True
         video_info['audio_path'] = mp3_path
         video_info['status'] = 'success'
-        # Upload Minio
-        upload_audio(mp3_path)
         # Insertion métadonnées vidéo
-        insert_video_metadata({
+        enregistrer_metadata({
             'video_id': video_id,
-            'url': url_video,
+            'url': video_info['url'],
             'title': video_info.get('title', ''),
             'duration': video_info.get('duration', None),
             'audio_path': mp3_path,
@@ -223,126 +982,396 @@ def telecharger_video_savetube(video_info):
             'status': 'success',
             'timestamp': time.time()
         })
-        return video_info
-    logger.info(f"Début téléchargement: {video_id}")
-    for tentative in range(MAX_DOWNLOAD_RETRIES):
-        try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                context = browser.new_context(
-                    user_agent=random.choice(USER_AGENTS),
-                    viewport={'width': 1280, 'height': 720}
-                )
-                page = context.new_page()
-                def block_ads(route, request):
-                    ads_domains = ["doubleclick.net", "googlesyndication.com", "adservice.google.com"]
-                    if any(d in request.url for d in ads_domains):
-                        route.abort()
-                    else:
-                        route.continue_()
-                page.route("**/*", block_ads)
-                # Vérification disponibilité SaveTube avant d'aller plus loin
-                try:
-                    response = page.goto("https://yt.savetube.me/1kejjj1", timeout=15000)
-                    if not response or response.status != 200:
-                        logger.error(f"SaveTube indisponible ou erreur HTTP: {getattr(response, 'status', 'no response')}")
-                        raise Exception("SaveTube non disponible")
-                except Exception as e:
-                    logger.error(f"Impossible d'accéder à SaveTube: {e}")
-                    raise
-                try:
-                    page.wait_for_selector("div.fc-consent-root", timeout=5000)
-                    page.click("button.fc-cta-consent")
-                    logger.info("Consent dialog dismissed")
-                except Exception:
-                    logger.debug("No consent dialog found")
-                try:
-                    page.wait_for_selector("input.search-input", timeout=10000)
-                    page.fill("input.search-input", url_video)
-                    page.click("button:text('Get Video')")
-                    # Nouvelle logique pour détecter la section de téléchargement
-                    try:
-                        selectors = [
-                            "#resultSection",
-                            "#downloadSection",
-                            ".download-area",
-                            ".result-area",
-                            "#result-section",
-                            "#download-section",
-                            ".result-section",
-                            ".download-section"
-                        ]
-                        found = False
-                        for sel in selectors:
-                            try:
-                                page.wait_for_selector(sel, timeout=7000)
-                                found = True
-                                logger.info(f"Section de téléchargement détectée avec le sélecteur: {sel}")
-                                break
-                            except Exception:
-                                continue
-                        if not found:
-                            html = page.content()
-                            # Recherche de message d'erreur ou page d'accueil générique
-                            if 'No video found' in html or 'not found' in html.lower() or 'youtube shorts video download' in html.lower() or '<title>Download YouTube Shorts Video - YouTube Shorts Downloader</title>' in html:
-                                logger.error(f"Redirection vers la page d'accueil de SaveTube détectée pour {video_id}")
-                                logger.error(f"Extrait HTML: {html[:2000]}")
-                                logger.warning("Tentative de téléchargement alternatif avec yt-dlp...")
-                                return telecharger_avec_ytdlp(video_info)
-                            logger.error(f"Timeout ou erreur lors de l'attente de la section de téléchargement pour {video_id}. Extrait HTML: {html[:3000]}")
-                            raise Exception("Section de téléchargement non trouvée")
-                    except Exception as e:
-                        html = page.content()
-                        logger.error(f"Timeout ou erreur lors de l'attente de la section de téléchargement pour {video_id}: {e}\nContenu page: {html[:3000]}")
-                        raise
-                except Exception as e:
-                    # Logguer le HTML de la page pour analyse
-                    html = page.content()
-                    logger.error(f"Timeout ou erreur lors de l'attente du downloadSection pour {video_id}: {e}\nContenu page: {html[:2000]}")
-                    raise
-                titre_raw = page.query_selector("h3.text-left").inner_text()
-                titre_video = nettoyer_nom_fichier(titre_raw)
-                page.select_option("select#quality", label="MP3 320kbps")
-                page.click("button:has-text('Get Link')")
-                page.wait_for_url("**/start-download**", timeout=30000)
-                page.wait_for_selector("a.text-white:has-text('Download')", timeout=20000)
-                btn = page.query_selector("a.text-white:has-text('Download')")
-                download_link = btn.get_attribute("href")
-                browser.close()
-                if telecharger_fichier(download_link, mp3_path):
-                    logger.info(f"Succès: {video_id}")
-                    video_info['audio_path'] = mp3_path
-                    video_info['status'] = 'success'
-                    # Upload Minio
-                    upload_audio(mp3_path)
-                    # Insertion métadonnées vidéo
-                    insert_video_metadata({
-                        'video_id': video_id,
-                        'url': url_video,
-                        'title': titre_video,
-                        'duration': video_info.get('duration', None),
-                        'audio_path': mp3_path,
-                        'minio_path': mp3_path,  # À adapter si le chemin MinIO diffère
-                        'status': 'success',
-                        'timestamp': time.time()
-                    })
-                    return video_info
-        except Exception as e:
-            details = f"Erreur pour {video_id} (tentative {tentative+1}/{MAX_DOWNLOAD_RETRIES}): {str(e)}"
-            logger.error(details)
-            if tentative < MAX_DOWNLOAD_RETRIES - 1:
-                time.sleep(random.uniform(2, 5))
+        return True
+    return False
+
+def _marquer_echec(tache):
+    """
+    Marque la vidéo d'une tâche en échec et journalise l'échec pour le service de retry.
+    Args:
+        - tache: dict, tâche de pipeline
+    Returns:
+        - None: la tâche est terminée
+    """
+    return _marquer_video_echec(tache['video'])
+
+def _marquer_video_echec(video_info):
+    """
+    Marque une vidéo en échec et journalise l'échec pour le service de retry.
+    Args:
+        - video_info: dict, informations sur la vidéo
+    Returns:
+        - None
+    """
     video_info['audio_path'] = None
     video_info['status'] = 'failed'
     insert_log({
-        'video_id': video_id,
-        'url': url_video,
+        'video_id': video_info['video_id'],
+        'url': video_info['url'],
         'title': video_info.get('title', ''),
         'audio_path': None,
         'status': 'failed',
         'timestamp': time.time()
     })
-    return video_info
+    return None
+
+def _echec_etape(tache, erreur):
+    """
+    Termine en échec une tâche dont une étape a levé une exception (sur_erreur du pipeline).
+    Args:
+        - tache: dict, tâche de pipeline
+        - erreur: Exception levée par l'étape
+    Returns:
+        - None: la tâche est terminée
+    """
+    logger.error(f"Échec du traitement de {tache['video']['video_id']}: {str(erreur)}")
+    return _marquer_echec(tache)
+
+def _reessayer(tache, details, congestion=False, etape='resolution'):
+    """
+    Replanifie une étape d'une tâche (la résolution SaveTube par défaut) après une pause, ou la termine en échec après MAX_DOWNLOAD_RETRIES tentatives.
+    Args:
+        - tache: dict, tâche de pipeline
+        - details: str, description de l'erreur
+        - congestion: bool, allonge la pause si le backend est saturé
+        - etape: str, étape à reprendre
+    Returns:
+        - Reprise ou None: reprise différée de l'étape, None si la tâche est abandonnée
+    """
+    tache['tentative'] += 1
+    logger.error(f"Erreur pour {tache['video']['video_id']} (tentative {tache['tentative']}/{MAX_DOWNLOAD_RETRIES}): {details}")
+    if tache['tentative'] >= MAX_DOWNLOAD_RETRIES:
+        return _marquer_echec(tache)
+    # Pause plus longue lorsque le backend est saturé
+    delai = random.uniform(*DELAY_BETWEEN_DOWNLOADS) if congestion else random.uniform(2, 5)
+    return Reprise(etape, delai)
+
+def _etape_resolution(tache):
+    """
+    Etape "resolution" : écarte les vidéos déjà traitées puis résout le lien SaveTube (cache, HTTP direct ou navigateur).
+    Args:
+        - tache: dict, tâche de pipeline
+    Returns:
+        - str, Reprise ou None: étape suivante (telechargement, ou ytdlp si SaveTube redirige)
+    """
+    video_info = tache['video']
+    video_id = video_info['video_id']
+    if tache['tentative'] == 0:
+        with metrics.etape("existence_check", video_id):
+            deja_traitee = _traiter_video_connue(video_info)
+        if deja_traitee:
+            metrics.registre.compteur("videos_skipped_total", "Vidéos déjà présentes, non retéléchargées").inc()
+            return None
+        logger.info(f"Début téléchargement: {video_id}")
+    en_cache = get_link_cache().get(video_id, SAVETUBE_QUALITY)
+    if en_cache is not None:
+        # Lien résolu récemment (tentative précédente, autre conteneur) : pas de session navigateur
+        logger.info(f"Lien SaveTube en cache pour {video_id}")
+        signaler_etape(video_id, 'resolving')
+        tache['resolveur'] = 'cache'
+        metrics.registre.compteur("resolutions_total", "Liens SaveTube obtenus, par résolveur").inc(resolveur='cache')
+        return _lien_resolu(tache, *en_cache)
+    with limiteur_savetube:
+        signaler_etape(video_id, 'resolving')
+        try:
+            with metrics.etape("resolve", video_id):
+                titre_video, download_link, tache['resolveur'] = resoudre_lien(video_info)
+        except SaveTubeRedirection as e:
+            _signaler_erreur(limiteur_savetube, e)
+            logger.warning("Tentative de téléchargement alternatif avec yt-dlp...")
+            return 'ytdlp'
+        except Exception as e:
+            return _reessayer(tache, str(e), _signaler_erreur(limiteur_savetube, e))
+    limiteur_savetube.succes()
+    metrics.registre.compteur("resolutions_total", "Liens SaveTube obtenus, par résolveur").inc(resolveur=tache['resolveur'])
+    get_link_cache().put(video_id, SAVETUBE_QUALITY, titre_video, download_link)
+    return _lien_resolu(tache, titre_video, download_link)
+
+def _lien_resolu(tache, titre_video, download_link):
+    """
+    Renseigne la tâche avec le lien SaveTube résolu (ou trouvé en cache) et le format MP3 attendu.
+    Args:
+        - tache: dict, tâche de pipeline
+        - titre_video: str, titre de la vidéo renvoyé par SaveTube
+        - download_link: str, lien de téléchargement
+    Returns:
+        - str: telechargement
+    """
+    tache.update({
+        'titre': titre_video,
+        'lien': download_link,
+        'object_name': f"{tache['video']['video_id']}.mp3",
+        'extension': 'mp3',
+        'codec': 'mp3',
+        'bitrate_kbps': 320,
+        'content_type': 'audio/mpeg'
+    })
+    return 'telechargement'
+
+def _etape_telechargement(tache):
+    """
+    Etape "telechargement" : transfère l'audio SaveTube vers MinIO en flux direct par défaut,
+    ou vers un fichier local si STREAM_TO_MINIO est désactivé ou en secours (LOCAL_DISK_FALLBACK).
+    Le transfert depuis le CDN SaveTube occupe une place du budget SaveTube (comme la résolution), et une place
+    d'upload MinIO en plus pour un flux ; un transfert réussi est crédité au budget SaveTube.
+    Args:
+        - tache: dict, tâche de pipeline (lien et object_name renseignés)
+    Returns:
+        - str ou Reprise: upload, ou reprise de la résolution en cas d'échec
+    """
+    video_id = tache['video']['video_id']
+    object_name = tache['object_name']
+    cle_cache = (video_id, SAVETUBE_QUALITY)
+    signaler_etape(video_id, 'downloading')
+    if STREAM_TO_MINIO:
+        empreinte = hashlib.sha256() if AUDIO_DEDUP else None
+        if not minio_accepte_uploads():
+            # Un flux ne peut pas attendre le rétablissement de MinIO : le fichier local sera parqué à l'upload
+            result = False
+            logger.warning(f"MinIO indisponible, transfert en flux non tenté pour {object_name}")
+        else:
+            # Le flux occupe à la fois le backend de téléchargement et une place d'upload MinIO
+            # (places toujours prises dans cet ordre : savetube puis upload)
+            with limiteur_savetube, limiteur_upload:
+                result = telecharger_vers_minio(tache['lien'], object_name, limiteur=limiteur_savetube, cle_cache=cle_cache, empreinte=empreinte)
+        if result:
+            limiteur_savetube.succes()
+            limiteur_upload.succes()
+            _marquer_audio_minio(result)
+            tache['chemin'] = None
+            tache['transfere'] = True
+            tache['sha256'] = empreinte.hexdigest() if empreinte else None
+            return 'upload'
+        if not LOCAL_DISK_FALLBACK:
+            return _reessayer(tache, "transfert en flux vers MinIO échoué")
+        logger.warning(f"Repli sur le disque local pour {object_name}")
+    mp3_path = os.path.join(AUDIO_DIR, object_name)
+    empreinte = hashlib.sha256() if AUDIO_DEDUP else None
+    with limiteur_savetube:
+        telecharge = telecharger_fichier(tache['lien'], mp3_path, limiteur=limiteur_savetube, cle_cache=cle_cache, empreinte=empreinte)
+    if not telecharge:
+        return _reessayer(tache, "téléchargement du fichier échoué")
+    limiteur_savetube.succes()
+    tache['chemin'] = mp3_path
+    tache['sha256'] = empreinte.hexdigest() if empreinte else None
+    return 'upload'
+
+def _etape_ytdlp(tache):
+    """
+    Etape "ytdlp" : méthode de secours utilisant le moteur yt-dlp en processus si SaveTube échoue.
+    L'audio est téléchargé dans son format natif (opus/webm, m4a...) ; la conversion MP3 éventuelle
+    (YTDLP_TRANSCODE_MP3) est laissée à l'étape de transcodage.
+    Args:
+        - tache: dict, tâche de pipeline
+    Returns:
+        - str: transcodage ou upload
+    """
+    video_info = tache['video']
+    signaler_etape(video_info['video_id'], 'downloading')
+    debut = time.perf_counter()
+    with limiteur_ytdlp:
+        try:
+            audio = ytdlp_engine.telecharger_audio(video_info['url'], AUDIO_DIR, transcoder_mp3=False)
+        except Exception as e:
+            metrics.registre.compteur("download_failures_total", "Téléchargements échoués").inc(source='ytdlp')
+            _signaler_erreur(limiteur_ytdlp, e)
+            raise
+    limiteur_ytdlp.succes()
+    if not os.path.exists(audio['path']):
+        raise FileNotFoundError(f"fichier yt-dlp introuvable: {audio['path']}")
+    metrics.observer_debit('ytdlp', os.path.getsize(audio['path']), time.perf_counter() - debut)
+    tache.update({
+        'titre': video_info.get('title', ''),
+        'chemin': audio['path'],
+        'object_name': os.path.basename(audio['path']),
+        'extension': audio['extension'],
+        'codec': audio['codec'],
+        'bitrate_kbps': audio['abr'],
+        'content_type': audio['content_type'],
+        'resolveur': 'ytdlp',
+        'nettoyer': True
+    })
+    if YTDLP_TRANSCODE_MP3 and audio['extension'] != 'mp3':
+        return 'transcodage'
+    return 'upload'
+
+def _etape_transcodage(tache):
+    """
+    Etape "transcodage" : convertit l'audio en MP3 dans le pool de processus (travail CPU hors des threads I/O).
+    Args:
+        - tache: dict, tâche de pipeline (chemin renseigné)
+    Returns:
+        - str: upload
+    """
+    audio = _get_pool_transcodage().submit(ytdlp_engine.transcoder_mp3, tache['chemin']).result()
+    tache.update({
+        'chemin': audio['path'],
+        'object_name': os.path.basename(audio['path']),
+        'extension': audio['extension'],
+        'codec': audio['codec'],
+        'bitrate_kbps': audio['abr'],
+        'content_type': audio['content_type']
+    })
+    return 'upload'
+
+def _etape_upload(tache):
+    """
+    Etape "upload" : upload le fichier local dans MinIO (s'il n'a pas été transféré en flux),
+    puis insère les métadonnées de la vidéo.
+    Déduplication par contenu : un fichier local dont l'empreinte SHA-256 est déjà indexée n'est pas uploadé ;
+    après un upload (ou un transfert en flux), l'empreinte est revendiquée et, si une autre vidéo la possède déjà,
+    l'objet en trop est supprimé. Les métadonnées d'un doublon désignent l'objet existant (alias_of).
+    Args:
+        - tache: dict, tâche de pipeline
+    Returns:
+        - Reprise ou None: reprise différée de l'upload s'il a échoué, None quand la tâche est terminée
+    """
+    video_info = tache['video']
+    video_id = video_info['video_id']
+    audio_path = tache.get('chemin')
+    object_name = tache['object_name']
+    if AUDIO_DEDUP and tache.get('sha256') is None and audio_path:
+        # Fichiers produits hors du transfert HTTP (yt-dlp, transcodage)
+        tache['sha256'] = _condenser_fichier(audio_path, hashlib.sha256())
+    sha256 = tache.get('sha256') if AUDIO_DEDUP else None
+    original = None
+    if sha256 and not tache.get('transfere'):
+        original = find_audio_hash(sha256)
+        if original is not None and original.get('video_id') == video_id:
+            original = None
+    if original is None and not tache.get('transfere'):
+        tache['transfere'] = bool(uploader_audio(audio_path, object_name, content_type=tache['content_type']))
+        if not tache['transfere']:
+            # Aucun objet dans MinIO : la vidéo ne doit pas être enregistrée comme traitée
+            return _reessayer(tache, f"upload MinIO de {object_name} échoué", etape='upload')
+    if original is None and sha256 and tache.get('transfere'):
+        original = claim_audio_hash(sha256, object_name, video_id)
+        if original is not None and original['object_name'] != object_name:
+            remove_audio(object_name)
+    if original is not None:
+        metrics.registre.compteur("audio_duplicates_total", "Audios identiques à un audio déjà stocké").inc()
+        _marquer_audio_minio(object_name)
+        logger.info(f"Audio de {video_id} identique à celui de {original['video_id']} ({original['object_name']}), enregistré comme alias")
+    if tache.get('nettoyer') and audio_path:
+        if original is not None:
+            os.remove(audio_path)
+        elif tache.get('transfere'):
+            if verify_and_cleanup(audio_path, object_name):
+                logger.info(f"Fichier {audio_path} supprimé après vérification MinIO")
+            else:
+                logger.error("Échec de la vérification MinIO, fichier conservé")
+    logger.info(f"Succès: {video_id}")
+    video_info['audio_path'] = audio_path
+    video_info['status'] = 'success'
+    metadata = {
+        'video_id': video_id,
+        'url': video_info['url'],
+        'title': tache['titre'],
+        'duration': video_info.get('duration', None),
+        'audio_path': audio_path,
+        'minio_path': object_name,
+        'extension': tache['extension'],
+        'codec': tache['codec'],
+        'bitrate_kbps': tache['bitrate_kbps'],
+        'resolver': tache.get('resolveur'),
+        'sha256': tache.get('sha256'),
+        'status': 'success',
+        'timestamp': time.time()
+    }
+    if original is not None:
+        metadata['minio_path'] = original['object_name']
+        metadata['alias_of'] = original['video_id']
+    # Insertion métadonnées vidéo
+    enregistrer_metadata(metadata)
+    signaler_etape(video_id, 'uploaded')
+    return None
+
+def etapes_video():
+    """
+    Construit les étapes du traitement d'une vidéo, dans l'ordre du flux :
+    resolution -> telechargement -> upload, avec en secours ytdlp -> (transcodage) -> upload.
+    Returns:
+        - list: étapes du pipeline, chacune avec sa largeur
+    """
+    return [
+        Etape('resolution', _etape_resolution, PIPELINE_RESOLVE_WORKERS),
+        Etape('ytdlp', _etape_ytdlp, PIPELINE_YTDLP_WORKERS),
+        Etape('telechargement', _etape_telechargement, PIPELINE_DOWNLOAD_WORKERS),
+        Etape('transcodage', _etape_transcodage, PIPELINE_TRANSCODE_WORKERS),
+        Etape('upload', _etape_upload, PIPELINE_UPLOAD_WORKERS),
+    ]
+
+def _identifiant_tache(tache):
+    """Identifiant (video_id) d'une tâche de pipeline, utilisé comme ligne de la trace."""
+    return tache['video']['video_id']
+
+def telecharger_video_savetube(video_info):
+    """
+    Télécharge l'audio d'une vidéo YouTube via SaveTube (ou yt-dlp en secours), gère l'upload MinIO et l'insertion des métadonnées.
+    Les étapes du pipeline sont exécutées à la suite dans le thread appelant (réessais, mode worker).
+    Args:
+        - video_info: dict, informations sur la vidéo (video_id, url, title, duration, etc.)
+    Returns:
+        - dict: informations de la vidéo enrichies avec le statut, le chemin audio et autres métadonnées
+    """
+    return executer_sequentiel(etapes_video(), _nouvelle_tache(video_info), sur_erreur=_echec_etape,
+                               identifiant=_identifiant_tache)['video']
+
+def telecharger_avec_ytdlp(video_info):
+    """
+    Télécharge l'audio d'une vidéo directement avec yt-dlp, sans passer par SaveTube.
+    Args:
+        - video_info: dict, informations sur la vidéo (video_id, url, etc.)
+    Returns:
+        - dict: informations de la vidéo enrichies avec le statut et le chemin audio
+    """
+    return executer_sequentiel(etapes_video(), _nouvelle_tache(video_info), premiere='ytdlp', sur_erreur=_echec_etape,
+                               identifiant=_identifiant_tache)['video']
+
+def _parser_details_video(item):
+    """
+    Extrait titre, durée et présence de sous-titres d'un élément renvoyé par videos().list.
+    Args:
+        - item: dict, élément 'items' de la réponse de l'API YouTube
+    Returns:
+        - tuple: (titre, durée en minutes, présence de sous-titres 'yes'/'no')
+    """
+    title = item['snippet']['title']
+    duration_iso = item['contentDetails']['duration']
+    duration_minutes = isodate.parse_duration(duration_iso).total_seconds() / 60
+    captions = "yes" if item['contentDetails'].get('caption') == "true" else "no"
+    return title, duration_minutes, captions
+
+def get_videos_details_batch(youtube, video_ids):
+    """
+    Récupère les détails de plusieurs vidéos YouTube en regroupant les identifiants
+    par lots de YOUTUBE_BATCH_SIZE (maximum autorisé par l'API) dans un seul appel videos().list.
+    Args:
+        - youtube: objet API YouTube
+        - video_ids: list, identifiants des vidéos
+    Returns:
+        - dict: video_id -> (titre, durée en minutes, sous-titres 'yes'/'no'), les vidéos
+          introuvables (privées, supprimées) ou en erreur sont absentes du dictionnaire
+    """
+    details = {}
+    for i in range(0, len(video_ids), YOUTUBE_BATCH_SIZE):
+        lot = video_ids[i:i + YOUTUBE_BATCH_SIZE]
+        try:
+            response = youtube.videos().list(
+                part='snippet,contentDetails',
+                id=','.join(lot),
+                fields='items(id,snippet/title,contentDetails/duration,contentDetails/caption)'
+            ).execute()
+            metrics.registre.compteur("youtube_api_calls_total", "Appels à l'API YouTube Data").inc(methode="videos.list")
+        except Exception as e:
+            logger.error(f"Erreur récupération détails vidéos ({len(lot)} ids): {e}")
+            continue
+        for item in response.get('items', []):
+            try:
+                details[item['id']] = _parser_details_video(item)
+            except Exception as e:
+                logger.error(f"Erreur lecture détails vidéo {item.get('id')}: {e}")
+    return details
 
 def get_video_details(youtube, video_id):
     """
@@ -353,47 +1382,64 @@ def get_video_details(youtube, video_id):
     Returns:
         - tuple: (titre, durée en minutes, présence de sous-titres 'yes'/'no') ou None si échec
     """
-    try:
-        response = youtube.videos().list(
-            part='snippet,contentDetails',
-            id=video_id
-        ).execute()
-        if not response['items']:
-            return None
-        item = response['items'][0]
-        title = item['snippet']['title']
-        duration_iso = item['contentDetails']['duration']
-        duration_minutes = isodate.parse_duration(duration_iso).total_seconds() / 60
-        captions = "yes" if item['contentDetails'].get('caption') == "true" else "no"
-        return title, duration_minutes, captions
-    except Exception as e:
-        logger.error(f"Erreur récupération détails vidéo: {e}")
-        return None
+    return get_videos_details_batch(youtube, [video_id]).get(video_id)
 
-def get_videos_from_playlist(youtube, playlist_id):
+def iter_pages_playlist(youtube, playlist_id, etat=None):
     """
-    Récupère toutes les vidéos d'une playlist YouTube avec leurs détails (titre, durée, sous-titres).
+    Parcourt une playlist YouTube page par page et renvoie les vidéos de chaque page dès qu'elle est connue.
+    Les détails sont demandés page par page en un seul appel groupé (50 ids max par page).
+
+    Si un état de playlist est fourni (crawl incrémental), il est mis à jour en place :
+    - la première page est demandée avec If-None-Match sur l'ETag connu : une réponse 304 arrête le parcours
+    - seules les vidéos absentes de etat['video_ids'] sont détaillées et renvoyées ; tous les éléments vus
+      (y compris les vidéos privées ou supprimées, sans détails) sont ajoutés à etat['video_ids']
+    - le parcours s'arrête dès que tous les nouveaux éléments attendus (totalResults moins les vidéos connues) ont été vus
+    - le nouvel ETag n'est enregistré qu'à la fin du parcours : un parcours interrompu (erreur, clé API épuisée)
+      ne peut pas faire passer la playlist pour inchangée lors de la tentative suivante
     Args:
         - youtube: objet API YouTube
         - playlist_id: str, identifiant de la playlist
+        - etat: dict, optionnel, état {'etag', 'item_count', 'video_ids'} de la playlist
     Returns:
-        - list: liste de dictionnaires contenant les informations des vidéos
+        - generator: listes de dictionnaires vidéo, une par page de la playlist
     """
-    videos = []
+    from googleapiclient.errors import HttpError
+    connues = etat.setdefault('video_ids', set()) if etat is not None else set()
+    nouvelles_attendues = None
+    nouvelles_vues = 0
     nextPageToken = None
+    premiere_page = None
     while True:
         pl_request = youtube.playlistItems().list(
             part="snippet",
             playlistId=playlist_id,
-            maxResults=50,
-            pageToken=nextPageToken
+            maxResults=YOUTUBE_BATCH_SIZE,
+            pageToken=nextPageToken,
+            fields="etag,nextPageToken,pageInfo/totalResults,items/snippet/resourceId/videoId"
         )
-        pl_response = pl_request.execute()
-        for item in pl_response['items']:
-            video_id = item['snippet']['resourceId']['videoId']
-            details = get_video_details(youtube, video_id)
-            if details:
-                title, duration, captions = details
+        if etat is not None and nextPageToken is None and etat.get('etag'):
+            pl_request.headers['If-None-Match'] = etat['etag']
+        try:
+            metrics.registre.compteur("youtube_api_calls_total", "Appels à l'API YouTube Data").inc(methode="playlistItems.list")
+            pl_response = pl_request.execute()
+        except HttpError as e:
+            if e.resp.status == 304:
+                logger.info(f"Playlist {playlist_id} inchangée depuis le dernier crawl")
+                etat['inchangee'] = True
+                return
+            raise
+        if etat is not None and nextPageToken is None:
+            premiere_page = {'etag': pl_response.get('etag'),
+                             'item_count': pl_response.get('pageInfo', {}).get('totalResults')}
+            if premiere_page['item_count'] is not None and connues:
+                nouvelles_attendues = premiere_page['item_count'] - len(connues)
+        page_ids = [item['snippet']['resourceId']['videoId'] for item in pl_response['items']]
+        nouveaux_ids = [video_id for video_id in page_ids if video_id not in connues]
+        details = get_videos_details_batch(youtube, nouveaux_ids) if nouveaux_ids else {}
+        videos = []
+        for video_id in nouveaux_ids:
+            if video_id in details:
+                title, duration, captions = details[video_id]
                 videos.append({
                     'video_id': video_id,
                     'url': f"https://www.youtube.com/watch?v={video_id}",
@@ -401,94 +1447,449 @@ def get_videos_from_playlist(youtube, playlist_id):
                     'duration': duration,
                     'captions': captions
                 })
+        if etat is not None:
+            # Les éléments sans détails (vidéos privées ou supprimées) comptent aussi dans totalResults :
+            # ils sont mémorisés pour que l'arrêt anticipé du crawl incrémental reste possible
+            connues.update(nouveaux_ids)
+        nouvelles_vues += len(nouveaux_ids)
+        yield videos
         nextPageToken = pl_response.get('nextPageToken')
         if not nextPageToken:
             break
-    return videos
+        # Playlist qui ne fait que grandir : tous les nouveaux éléments ont été trouvés
+        if nouvelles_attendues is not None and 0 <= nouvelles_attendues <= nouvelles_vues and len(nouveaux_ids) < len(page_ids):
+            logger.info(f"Playlist {playlist_id}: {nouvelles_vues} nouveaux éléments trouvés, arrêt anticipé du parcours")
+            break
+    if premiere_page is not None:
+        etat.update(premiere_page)
+
+def get_videos_from_playlist(youtube, playlist_id):
+    """
+    Récupère toutes les vidéos d'une playlist YouTube avec leurs détails (titre, durée, sous-titres).
+    Args:
+        - youtube: objet API YouTube
+        - playlist_id: str, identifiant de la playlist
+    Returns:
+        - list: liste de dictionnaires contenant les informations des vidéos
+    """
+    return [video for page in iter_pages_playlist(youtube, playlist_id) for video in page]
+
+_clients_youtube = threading.local()
+
+def _client_youtube(api_key):
+    """
+    Retourne un client API YouTube propre au thread courant (les clients googleapiclient
+    ne sont pas thread-safe), créé au premier usage pour chaque clé.
+    Args:
+        - api_key: str, clé API YouTube
+    Returns:
+        - objet API YouTube
+    """
+    clients = getattr(_clients_youtube, 'clients', None)
+    if clients is None:
+        clients = _clients_youtube.clients = {}
+    if api_key not in clients:
+        # googleapiclient (~0,2 s d'import) n'est chargé que par les modes qui énumèrent des playlists
+        from googleapiclient.discovery import build
+        clients[api_key] = build('youtube', 'v3', developerKey=api_key)
+    return clients[api_key]
+
+def _enumerer_playlist(playlist_id, api_keys, sortie, etat=None):
+    """
+    Enumère une playlist en publiant chaque page dans la file de sortie.
+    En cas d'erreur avec une clé API, l'état de la playlist est restauré et elle est reprise depuis le début
+    avec la clé suivante.
+    Args:
+        - playlist_id: str, identifiant de la playlist
+        - api_keys: list, clés API YouTube par ordre de préférence
+        - sortie: _SortiePages, file bornée recevant les pages de vidéos
+        - etat: dict, optionnel, état de la playlist pour un crawl incrémental (mis à jour en place)
+    Returns:
+        - tuple: (nombre de vidéos publiées pour cette playlist, True si une clé a terminé le parcours)
+    """
+    logger.info(f"Traitement playlist: {playlist_id}")
+    total = 0
+    reussie = False
+    with metrics.etape("playlist_enumeration", playlist_id):
+        for i, api_key in enumerate(api_keys):
+            # Copie de l'état (ETag, vidéos connues) restaurée si cette clé échoue en cours de parcours
+            sauvegarde = {**etat, 'video_ids': set(etat.get('video_ids', ()))} if etat is not None else None
+            try:
+                for videos in iter_pages_playlist(_client_youtube(api_key), playlist_id, etat):
+                    total += len(videos)
+                    sortie.put(videos)
+                reussie = True
+                break
+            except _EnumerationArretee:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur récupération vidéos de la playlist {playlist_id} (clé {i+1}/{len(api_keys)}): {e}")
+                if etat is not None:
+                    etat.clear()
+                    etat.update(sauvegarde)
+    metrics.registre.compteur("playlist_videos_total", "Vidéos publiées par l'énumération des playlists").inc(total)
+    if not reussie:
+        logger.error(f"Enumération de la playlist {playlist_id} échouée avec toutes les clés API ({total} vidéos publiées)")
+    elif etat is not None and etat.get('video_ids'):
+        logger.info(f"Playlist {playlist_id}: {total} nouvelles vidéos")
+    elif not total:
+        logger.error(f"Aucune vidéo trouvée pour la playlist {playlist_id}")
+    return total, reussie
+
+class _EnumerationArretee(Exception):
+    """Levée dans un thread d'énumération quand le consommateur des pages a abandonné."""
+
+class _SortiePages:
+    """
+    File bornée des pages de vidéos énumérées : les threads de playlists attendent quand le consommateur
+    (soumission au pipeline) est en retard, et s'arrêtent s'il abandonne.
+    Args:
+        - capacite: int, nombre maximal de pages en attente
+    """
+
+    def __init__(self, capacite):
+        self.file = queue.Queue(maxsize=capacite)
+        self.arret = threading.Event()
+
+    def put(self, videos):
+        while not self.arret.is_set():
+            try:
+                self.file.put(videos, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise _EnumerationArretee()
 
-def afficher_stats(videos):
+    def get(self):
+        return self.file.get()
+
+class _FinPlaylist:
+    """
+    Marqueur déposé dans la file des pages après la dernière page d'une playlist.
+    Args:
+        - playlist_id: str, identifiant de la playlist
+        - reussie: bool, False si toutes les clés API ont échoué (énumération incomplète)
     """
-    Affiche les statistiques de téléchargement (succès/échecs) pour la liste de vidéos traitées.
+
+    def __init__(self, playlist_id, reussie):
+        self.playlist_id = playlist_id
+        self.reussie = reussie
+
+def enumerer_playlists(playlists, api_keys, max_workers=MAX_PLAYLIST_WORKERS, etats=None, ignorer=None, sur_playlist_terminee=None):
+    """
+    Enumère plusieurs playlists en parallèle (concurrence bornée) et renvoie les vidéos
+    au fil de l'eau, dédupliquées par video_id, sans attendre la fin de l'énumération.
+    Les pages attendent dans une file bornée : l'énumération avance au rythme du consommateur.
     Args:
-        - videos: list, liste de dictionnaires vidéo avec leur statut
+        - playlists: list, identifiants des playlists
+        - api_keys: list, clés API YouTube par ordre de préférence (secours en cas d'erreur)
+        - max_workers: int, nombre de playlists énumérées simultanément
+        - etats: dict, optionnel, playlist_id -> état pour un crawl incrémental (complété en place)
+        - ignorer: conteneur, optionnel, video_id à ne pas renvoyer (test d'appartenance : set, TableStatuts...)
+        - sur_playlist_terminee: callable, optionnel, sur_playlist_terminee(playlist_id, etat) appelé une fois
+          toutes les vidéos de la playlist renvoyées, si son énumération a abouti (pas pour une playlist
+          dont toutes les clés API ont échoué)
+    Returns:
+        - generator: dictionnaires vidéo uniques
+    """
+    api_keys = [key for key in api_keys if key]
+    sortie = _SortiePages(max(2, max_workers * 2))
+    vus = set()
+
+    def _enumerer(playlist_id, etat):
+        reussie = False
+        try:
+            total, reussie = _enumerer_playlist(playlist_id, api_keys, sortie, etat)
+            return total
+        finally:
+            try:
+                sortie.put(_FinPlaylist(playlist_id, reussie))
+            except _EnumerationArretee:
+                pass
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="playlist") as executor:
+        futures = [
+            executor.submit(_enumerer, playlist_id, etats.setdefault(playlist_id, {}) if etats is not None else None)
+            for playlist_id in playlists
+        ]
+        restantes = len(futures)
+        try:
+            while restantes:
+                videos = sortie.get()
+                if isinstance(videos, _FinPlaylist):
+                    restantes -= 1
+                    if sur_playlist_terminee is not None and videos.reussie:
+                        sur_playlist_terminee(videos.playlist_id, etats.get(videos.playlist_id) if etats is not None else None)
+                    continue
+                for video in videos:
+                    if video['video_id'] not in vus and (ignorer is None or video['video_id'] not in ignorer):
+                        vus.add(video['video_id'])
+                        yield video
+        finally:
+            # Consommateur arrêté (fin normale ou abandon) : les threads bloqués sur la file se terminent
+            sortie.arret.set()
+
+def charger_etats_playlists(playlists):
+    """
+    Charge l'état enregistré des playlists pour un crawl incrémental (vide si PLAYLIST_FULL_CRAWL est activé).
+    Args:
+        - playlists: list, identifiants des playlists
+    Returns:
+        - dict: playlist_id -> état {'etag', 'item_count', 'video_ids'}
+    """
+    if PLAYLIST_FULL_CRAWL:
+        return {}
+    return load_playlist_states(playlists)
+
+def sauvegarder_etats_playlists(etats):
+    """
+    Enregistre l'état des playlists énumérées. Appelée en fin d'exécution seulement, afin qu'une
+    exécution interrompue ne marque pas comme connues des vidéos qui n'ont pas été traitées.
+    Args:
+        - etats: dict, playlist_id -> état mis à jour pendant l'énumération
     Returns:
         - None
     """
-    total = len(videos)
-    success = sum(1 for v in videos if v.get('status') == 'success')
-    failed = sum(1 for v in videos if v.get('status') == 'failed')
-    print(f"Succès: {success}/{total} | Échecs: {failed}")
+    for playlist_id, etat in etats.items():
+        if etat.get('etag') and not etat.get('inchangee'):
+            save_playlist_state(playlist_id, etat)
 
-def main():
+def afficher_stats(table, pipeline=None):
+    """
+    Affiche les statistiques de téléchargement (succès/échecs) à partir des compteurs de la table des statuts.
+    Args:
+        - table: TableStatuts, statuts des vidéos du run
+        - pipeline: Pipeline, optionnel, pipeline dont l'occupation des étapes est affichée
+    Returns:
+        - None
+    """
+    total = len(table)
+    success = table.compte('success')
+    failed = table.compte('failed')
+    etapes = f" | Etapes: {pipeline.etat()}" if pipeline is not None else ""
+    uploads = stats_upload()
+    print(f"Succès: {success}/{total} | Échecs: {failed} | Concurrence: {etat_limiteurs()}{etapes} | "
+          f"MinIO: {uploads['debit_moyen'] / 1048576:.1f} Mio/s, {uploads['en_attente']} parqués, disjoncteur {uploads['disjoncteur']}")
+
+def main(reprise=False):
     """
     Fonction principale orchestrant le scraping massif :
-    - Récupère les playlists à traiter
-    - Récupère les vidéos de chaque playlist
-    - Télécharge l'audio, gère l'upload MinIO et l'insertion MongoDB
+    - Reprend le run interrompu décrit par le manifeste si demandé, sinon démarre un nouveau manifeste
+    - Précharge l'index des vidéos déjà présentes dans MongoDB et MinIO
+    - Récupère les vidéos des playlists en parallèle et les soumet au fil de l'eau
+    - Fait passer chaque vidéo par les étapes du pipeline (résolution, téléchargement, transcodage, upload),
+      chacune avec ses propres threads et une file bornée qui freine l'énumération si l'aval sature
     - Affiche un résumé statistique final
+    Args:
+        - reprise: bool, reprendre le dernier run s'il a été interrompu (--resume)
     Returns:
         - None
     """
     print("🚀 DÉBUT DU TÉLÉCHARGEMENT MASSIF YOUTUBE")
     start_time = time.time()
-    youtube = build('youtube', 'v3', developerKey=API_KEY)
-    youtube_2 = build('youtube', 'v3', developerKey=os.getenv("GOOGLE_API_2"))
-    
-    all_videos = []
-    for playlist_id in PLAYLISTS:
-        logger.info(f"Traitement playlist: {playlist_id}")
-        try: 
-            vids = get_videos_from_playlist(youtube, playlist_id)
-        except Exception as e:
-            logger.error(f"Erreur récupération vidéos de la playlist {playlist_id}: {e}")
-            vids = get_videos_from_playlist(youtube_2, playlist_id)
-        if not vids:
-            logger.error(f"Aucune vidéo trouvée pour la playlist {playlist_id}")
-            continue
-        all_videos.extend(vids)
-    videos_unique = list({video['video_id']: video for video in all_videos}.values())
-    print(f"Nombre total de vidéos à télécharger: {len(videos_unique)}")
-    total_estimated_duration = sum(video['duration'] for video in videos_unique)
-    hours = int(total_estimated_duration // 60)
-    minutes = int(total_estimated_duration % 60)
-    print(f"Durée totale estimée du dataset: {hours}h {minutes}m ({total_estimated_duration:.1f} minutes)")
-    for video in videos_unique:
+    demarrer_metriques()
+    ensure_indexes()
+    precharger_index_existence()
+    playlists = get_playlists()
+    # Statut de chaque vidéo et compteurs incrémentaux : les dictionnaires vidéo sont libérés en fin de tâche
+    table = TableStatuts()
+    completed = 0
+    manifeste = ManifesteRun.charger() if reprise else None
+    if manifeste is not None:
+        en_cours = manifeste.reprendre()
+        a_enumerer = [p for p in playlists if p not in manifeste.etats_playlists]
+        etats_playlists = charger_etats_playlists(a_enumerer)
+        etats_playlists.update(manifeste.etats_playlists)
+        for video_id, (statut, duree) in manifeste.statuts.items():
+            table.ajouter(video_id, duree)
+            table.terminer(video_id, statut, duree)
+        completed = len(table)
+        logger.info(f"Reprise du run {manifeste.run_id}: {completed} vidéos terminées, {len(manifeste.videos)} à reprendre "
+                    f"(dernière étape: {en_cours}), {len(a_enumerer)}/{len(playlists)} playlists à énumérer")
+    else:
+        manifeste = ManifesteRun()
+        manifeste.demarrer(playlists)
+        a_enumerer = playlists
+        etats_playlists = charger_etats_playlists(playlists)
+    ajouter_ecouteur_etape(manifeste.etape)
+
+    def _traiter_resultat(tache):
+        nonlocal completed
+        video = tache['video']
+        if video['status'] == 'pending':
+            # Tâche terminée par le pipeline sans verdict (gestionnaire d'erreur ou routage en échec)
+            _marquer_echec(tache)
+        table.terminer(video['video_id'], video['status'], video.get('duration', 0))
+        manifeste.fin(video['video_id'], video['status'], video.get('duration', 0))
+        completed += 1
+        if completed % 5 == 0 or completed == len(table):
+            afficher_stats(table, pipeline)
+
+    def _soumettre(video):
         video['status'] = 'pending'
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_video = {executor.submit(telecharger_video_savetube, video): video for video in videos_unique}
-        completed = 0
-        for future in concurrent.futures.as_completed(future_to_video):
-            video = future_to_video[future]
-            try:
-                result = future.result()
-                if result['status'] == 'success':
-                    video_index = videos_unique.index(video)
-                    videos_unique[video_index] = result
-                completed += 1
-                if completed % 5 == 0 or completed == len(videos_unique):
-                    afficher_stats(videos_unique)
-            except Exception as e:
-                logger.error(f"Exception dans le worker pour {video['video_id']}: {str(e)}")
-                video['status'] = 'failed'
+        table.ajouter(video['video_id'], video['duration'])
+        pipeline.soumettre(_nouvelle_tache(video))
+        while not pipeline.resultats.empty():
+            _traiter_resultat(pipeline.resultats.get())
+
+    with Pipeline(etapes_video(), sur_erreur=_echec_etape, identifiant=_identifiant_tache) as pipeline:
+        # Vidéos du run repris restées en cours : resoumises sans ré-énumération
+        reprises, manifeste.videos, manifeste.statuts = list(manifeste.videos.values()), {}, {}
+        for video in reprises:
+            _soumettre(video)
+        del reprises
+        # Les téléchargements démarrent dès qu'une page de playlist est connue ; la soumission attend
+        # quand la fenêtre de tâches en vol du pipeline est pleine
+        for video in enumerer_playlists(a_enumerer, [API_KEY, os.getenv("GOOGLE_API_2")], etats=etats_playlists,
+                                        ignorer=table, sur_playlist_terminee=manifeste.playlist_terminee):
+            manifeste.video(video)
+            _soumettre(video)
+        print(f"Nombre total de vidéos à télécharger: {len(table)}")
+        total_estimated_duration = table.duree_totale
+        hours = int(total_estimated_duration // 60)
+        minutes = int(total_estimated_duration % 60)
+        print(f"Durée totale estimée du dataset: {hours}h {minutes}m ({total_estimated_duration:.1f} minutes)")
+        while completed < len(table):
+            _traiter_resultat(pipeline.resultats.get())
+    sauvegarder_etats_playlists(etats_playlists)
+    # Ecriture des métadonnées et logs encore en file avant le résumé
+    close_writes()
+    manifeste.terminer()
     end_time = time.time()
     elapsed_time = end_time - start_time
     elapsed_str = str(timedelta(seconds=int(elapsed_time)))
-    successful_downloads = sum(1 for v in videos_unique if v.get('status') == 'success')
-    failed_downloads = sum(1 for v in videos_unique if v.get('status') == 'failed')
+    successful_downloads = table.compte('success')
+    failed_downloads = table.compte('failed')
     print("\n" + "="*60)
     print("RÉSUMÉ FINAL")
-    print(f"Téléchargements réussis: {successful_downloads}/{len(videos_unique)} ({successful_downloads/len(videos_unique)*100:.1f}%)")
+    print(f"Téléchargements réussis: {successful_downloads}/{len(table)} ({successful_downloads/max(len(table), 1)*100:.1f}%)")
     print(f"Téléchargements échoués: {failed_downloads}")
-    total_duration = sum(v.get('duration', 0) for v in videos_unique if v.get('status') == 'success')
+    total_duration = table.duree_succes
     hours = int(total_duration // 60)
     minutes = int(total_duration % 60)
     print(f"Durée totale du dataset: {hours}h {minutes}m ({total_duration:.1f} minutes)")
     if successful_downloads > 0:
         avg_time_per_video = elapsed_time / successful_downloads
         print(f"Vitesse moyenne: {avg_time_per_video:.2f} secondes par vidéo")
+    cache_liens = get_link_cache()
+    print(f"Liens SaveTube servis par le cache: {cache_liens.hits}/{cache_liens.hits + cache_liens.misses}")
+    uploads = stats_upload()
+    print(f"Uploads MinIO: {uploads['fichiers']} fichiers, {uploads['flux']} flux, {uploads['octets'] / 1048576:.1f} Mio "
+          f"à {uploads['debit_moyen'] / 1048576:.1f} Mio/s | parqués: {uploads['parques']}, abandonnés: {uploads['rejetes']}, "
+          f"coupures MinIO: {uploads['ouvertures']}")
     print(f"Temps total d'exécution: {elapsed_str}")
     print("="*60)
     print("\n🏁 TÉLÉCHARGEMENT TERMINÉ\n")
 
+def enqueue_catalogue():
+    """
+    Mode "enqueue" : énumère les playlists et ajoute les vidéos à la file de jobs MongoDB partagée,
+    sans rien télécharger. Les workers (mode "worker") se partagent ensuite la file.
+    Returns:
+        - int: nombre de jobs créés
+    """
+    job_queue.ensure_job_indexes()
+    etats_playlists = charger_etats_playlists(get_playlists())
+    lot = []
+    crees = 0
+    for video in enumerer_playlists(get_playlists(), [API_KEY, os.getenv("GOOGLE_API_2")], etats=etats_playlists):
+        lot.append(video)
+        if len(lot) >= 500:
+            crees += job_queue.enqueue_jobs(lot)
+            lot = []
+    crees += job_queue.enqueue_jobs(lot)
+    # Les vidéos sont désormais persistées dans la file : l'état des playlists peut être enregistré
+    sauvegarder_etats_playlists(etats_playlists)
+    logger.info(f"{crees} nouveaux jobs ajoutés à la file | état de la file: {job_queue.job_stats()}")
+    return crees
+
+def executer_worker(nb_threads=MAX_WORKERS, sortir_si_vide=False):
+    """
+    Mode "worker" : réserve des jobs dans la file MongoDB partagée et les traite, sans énumérer de playlist.
+    Plusieurs conteneurs peuvent tourner en parallèle : chaque job est réservé atomiquement avec un bail
+    prolongé par un heartbeat, et repris par un autre worker si ce bail expire.
+    Args:
+        - nb_threads: int, nombre de jobs traités simultanément par ce worker
+        - sortir_si_vide: bool, termine le worker quand la file est vide au lieu d'attendre
+    Returns:
+        - None
+    """
+    owner = f"{socket.gethostname()}-{os.getpid()}"
+    demarrer_metriques()
+    job_queue.ensure_job_indexes()
+    ensure_indexes()
+    precharger_index_existence()
+    en_cours = set()
+    # en_cours est modifié par les threads de jobs pendant que le heartbeat le parcourt
+    verrou_en_cours = threading.Lock()
+    arret = threading.Event()
+
+    def _suivre_etape(video_id, etape):
+        if video_id in en_cours and etape != job_queue.UPLOADED:
+            job_queue.set_job_state(video_id, owner, etape)
+    ajouter_ecouteur_etape(_suivre_etape)
+
+    def _heartbeat():
+        while not arret.wait(job_queue.JOB_LEASE_SECONDS / 3):
+            try:
+                with verrou_en_cours:
+                    baux = list(en_cours)
+                job_queue.heartbeat(baux, owner)
+                job_queue.expire_stale_jobs()
+            except Exception as e:
+                logger.error(f"Erreur heartbeat de la file de jobs: {e}")
+
+    def _boucle():
+        while not arret.is_set():
+            try:
+                job = job_queue.claim_job(owner)
+            except Exception as e:
+                logger.error(f"Erreur réservation d'un job: {e}")
+                job = None
+            if job is None:
+                if sortir_si_vide:
+                    return
+                arret.wait(JOB_POLL_INTERVAL)
+                continue
+            video_id = job['video_id']
+            with verrou_en_cours:
+                en_cours.add(video_id)
+            try:
+                video_info = {k: job[k] for k in ('video_id', 'url', 'title', 'duration', 'captions') if k in job}
+                result = telecharger_video_savetube(video_info)
+                etat = job_queue.finish_job(video_id, owner, result.get('status') == 'success', job['attempts'])
+                logger.info(f"Job {video_id} terminé: {etat}")
+            except Exception as e:
+                logger.error(f"Exception dans le worker pour {video_id}: {str(e)}")
+                job_queue.finish_job(video_id, owner, False, job['attempts'])
+            finally:
+                with verrou_en_cours:
+                    en_cours.discard(video_id)
+
+    print(f"👷 WORKER {owner} ({nb_threads} threads) | file: {job_queue.job_stats()}")
+    thread_heartbeat = threading.Thread(target=_heartbeat, name="job-heartbeat", daemon=True)
+    thread_heartbeat.start()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=nb_threads, thread_name_prefix="job") as executor:
+            for future in [executor.submit(_boucle) for _ in range(nb_threads)]:
+                future.result()
+    except KeyboardInterrupt:
+        logger.info("Arrêt du worker demandé")
+    finally:
+        arret.set()
+        close_writes()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Scraping massif YouTube vers MinIO')
+    parser.add_argument('--mode', choices=['local', 'enqueue', 'worker'], default=os.getenv("SCRAPER_MODE", "local"),
+                        help="local: énumère et télécharge dans ce processus | enqueue: alimente la file de jobs MongoDB | worker: traite la file de jobs")
+    parser.add_argument('--exit-when-empty', action='store_true', help='Mode worker: s\'arrêter quand la file est vide')
+    parser.add_argument('--resume', action='store_true', help='Mode local: reprendre le dernier run interrompu (manifeste de run)')
+    args = parser.parse_args()
+    configurer_logging("youtube_download.log")
+    if args.mode == 'enqueue':
+        enqueue_catalogue()
+    elif args.mode == 'worker':
+        executer_worker(sortir_si_vide=args.exit_when_empty)
+    else:
+        main(reprise=args.resume)
\ No newline at end of file
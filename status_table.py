@@ -0,0 +1,102 @@
+"""
+Table des statuts des vidéos d'un scraping pour le projet Youtube-Fon-Scrapping.
+
+Ce module remplace la liste des dictionnaires vidéo conservée pendant tout un run :
+- Un seul code de statut (entier) par video_id, au lieu du dictionnaire complet de la vidéo
+- Des compteurs par statut et des durées cumulées mis à jour à chaque changement, en O(1)
+- Des statistiques (total, succès, échecs, en cours) lues sans parcourir la table
+
+La mémoire reste proportionnelle au nombre de vidéos (identifiant + code), quelle que soit la taille
+de leurs métadonnées, et les dictionnaires vidéo sont libérés dès que leur tâche est terminée.
+"""
+import threading
+from collections import Counter
+
+EN_ATTENTE = "pending"
+
+
+class TableStatuts:
+    """
+    Statut courant de chaque vidéo, indexé par video_id, avec compteurs incrémentaux.
+    Les statuts (chaînes) sont codés en petits entiers partagés par toute la table.
+    """
+
+    def __init__(self):
+        self._statuts = {}
+        self._codes = {}
+        self._noms = []
+        self._compteurs = Counter()
+        self.duree_totale = 0.0
+        self.duree_succes = 0.0
+        self._verrou = threading.Lock()
+
+    def _code(self, statut):
+        code = self._codes.get(statut)
+        if code is None:
+            code = self._codes[statut] = len(self._noms)
+            self._noms.append(statut)
+        return code
+
+    def ajouter(self, video_id, duree=0, statut=EN_ATTENTE):
+        """
+        Ajoute une vidéo à la table.
+        Args:
+            video_id (str): Identifiant de la vidéo.
+            duree (float): Durée de la vidéo en minutes (cumulée dans duree_totale).
+            statut (str): Statut initial.
+        Returns:
+            bool: False si la vidéo était déjà présente (rien n'est modifié).
+        """
+        with self._verrou:
+            if video_id in self._statuts:
+                return False
+            self._statuts[video_id] = self._code(statut)
+            self._compteurs[statut] += 1
+            self.duree_totale += duree or 0
+            return True
+
+    def terminer(self, video_id, statut, duree=0):
+        """
+        Enregistre le statut final d'une vidéo et met à jour les compteurs.
+        Args:
+            video_id (str): Identifiant de la vidéo.
+            statut (str): Nouveau statut (success, failed...).
+            duree (float): Durée de la vidéo en minutes, cumulée dans duree_succes si statut vaut success.
+        Returns:
+            None
+        """
+        with self._verrou:
+            precedent = self._statuts.get(video_id)
+            if precedent is not None:
+                ancien = self._noms[precedent]
+                self._compteurs[ancien] -= 1
+                if ancien == "success":
+                    self.duree_succes -= duree or 0
+            self._statuts[video_id] = self._code(statut)
+            self._compteurs[statut] += 1
+            if statut == "success":
+                self.duree_succes += duree or 0
+
+    def statut(self, video_id):
+        """Statut courant d'une vidéo, None si elle est absente de la table."""
+        code = self._statuts.get(video_id)
+        return None if code is None else self._noms[code]
+
+    def compte(self, statut):
+        """Nombre de vidéos ayant ce statut."""
+        return self._compteurs[statut]
+
+    def compteurs(self):
+        """
+        Retourne le nombre de vidéos par statut.
+        Returns:
+            dict: statut -> nombre de vidéos
+        """
+        with self._verrou:
+            return {statut: n for statut, n in self._compteurs.items() if n}
+
+    def __len__(self):
+        return len(self._statuts)
+
+    def __contains__(self, video_id):
+        return video_id in self._statuts
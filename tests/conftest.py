@@ -0,0 +1,20 @@
+"""
+Configuration commune des tests : modules du projet importables depuis la racine du dépôt,
+et base MongoDB en mémoire (mongomock) à la place du serveur.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Client MongoDB en mémoire utilisé par mongo_utils (les tests écrivent les documents directement)."""
+    import mongomock
+    import mongo_utils
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(mongo_utils, "_client", client)
+    return client
@@ -0,0 +1,134 @@
+"""
+Tests de l'énumération des playlists : secours entre clés API et crawl incrémental.
+"""
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+import scraper
+
+
+class _Requete:
+    def __init__(self, executer):
+        self.headers = {}
+        self._executer = executer
+
+    def execute(self):
+        return self._executer(self.headers)
+
+
+class _PlaylistItems:
+    def __init__(self, client):
+        self.client = client
+
+    def list(self, pageToken=None, **kwargs):
+        return _Requete(lambda headers: self.client.page(int(pageToken or 0), headers))
+
+
+class _YouTubeFactice:
+    """
+    Client YouTube Data réduit à playlistItems().list : pages de 50 éléments, ETag de la playlist
+    respecté (304 sur If-None-Match), et échec optionnel à partir d'une page donnée.
+    """
+
+    def __init__(self, ids, etag, echec_page=None):
+        self.ids = ids
+        self.etag = etag
+        self.echec_page = echec_page
+        self.pages = []
+
+    def playlistItems(self):
+        return _PlaylistItems(self)
+
+    def page(self, debut, headers):
+        numero = debut // 50 + 1
+        if headers.get('If-None-Match') == self.etag:
+            raise HttpError(httplib2.Response({'status': 304}), b'')
+        if self.echec_page is not None and numero >= self.echec_page:
+            raise RuntimeError("quota dépassé")
+        self.pages.append(numero)
+        reponse = {
+            'etag': self.etag,
+            'pageInfo': {'totalResults': len(self.ids)},
+            'items': [{'snippet': {'resourceId': {'videoId': v}}} for v in self.ids[debut:debut + 50]],
+        }
+        if debut + 50 < len(self.ids):
+            reponse['nextPageToken'] = str(debut + 50)
+        return reponse
+
+
+@pytest.fixture
+def details(monkeypatch):
+    monkeypatch.setattr(scraper, "get_videos_details_batch", lambda youtube, ids: {i: ("titre", 1.0, "no") for i in ids})
+
+
+def _publiees(sortie):
+    videos = []
+    while not sortie.file.empty():
+        videos.extend(v['video_id'] for v in sortie.file.get())
+    return videos
+
+
+def test_cle_de_secours_ignore_l_etag_d_un_parcours_interrompu(details, monkeypatch):
+    anciennes = [f"a{i:03d}" for i in range(100)]
+    nouvelles = [f"n{i:03d}" for i in range(70)]
+    ids = nouvelles + anciennes
+    clients = {
+        "cle1": _YouTubeFactice(ids, "etag-nouveau", echec_page=2),
+        "cle2": _YouTubeFactice(ids, "etag-nouveau"),
+    }
+    monkeypatch.setattr(scraper, "_client_youtube", lambda cle: clients[cle])
+    etat = {'etag': "etag-ancien", 'item_count': 100, 'video_ids': set(anciennes)}
+    sortie = scraper._SortiePages(100)
+
+    scraper._enumerer_playlist("PL1", ["cle1", "cle2"], sortie, etat)
+
+    # La clé 2 a parcouru la playlist au lieu de recevoir un 304 avec l'ETag enregistré par la clé 1
+    assert clients["cle2"].pages
+    assert not etat.get('inchangee')
+    assert set(_publiees(sortie)) == set(nouvelles)
+    assert etat['etag'] == "etag-nouveau"
+    assert etat['video_ids'] == set(ids)
+
+
+def test_etag_enregistre_seulement_en_fin_de_parcours(details, monkeypatch):
+    ids = [f"v{i:03d}" for i in range(120)]
+    monkeypatch.setattr(scraper, "_client_youtube", lambda cle: _YouTubeFactice(ids, "etag-nouveau", echec_page=2))
+    etat = {'etag': "etag-ancien", 'item_count': 0, 'video_ids': set()}
+
+    scraper._enumerer_playlist("PL1", ["cle1"], scraper._SortiePages(100), etat)
+
+    assert etat['etag'] == "etag-ancien"
+    assert etat['video_ids'] == set()
+
+
+def test_playlist_en_echec_non_marquee_terminee_dans_le_manifeste(details, monkeypatch, tmp_path):
+    from run_manifest import ManifesteRun
+    clients = {
+        "cle1": {"PLok": _YouTubeFactice(["v1", "v2"], "e1"), "PLko": _YouTubeFactice(["v3"], "e2", echec_page=1)},
+        "cle2": {"PLok": _YouTubeFactice(["v1", "v2"], "e1"), "PLko": _YouTubeFactice(["v3"], "e2", echec_page=1)},
+    }
+
+    class _ParPlaylist:
+        def __init__(self, cle):
+            self.cle = cle
+
+        def playlistItems(self):
+            client = self
+
+            class _Items:
+                def list(self, playlistId=None, pageToken=None, **kwargs):
+                    return clients[client.cle][playlistId].playlistItems().list(pageToken=pageToken)
+            return _Items()
+
+    monkeypatch.setattr(scraper, "_client_youtube", _ParPlaylist)
+    manifeste = ManifesteRun(str(tmp_path / "run_manifest.jsonl"))
+    manifeste.demarrer(["PLok", "PLko"])
+
+    videos = list(scraper.enumerer_playlists(["PLok", "PLko"], ["cle1", "cle2"], etats={},
+                                             sur_playlist_terminee=manifeste.playlist_terminee))
+    manifeste.fermer()
+
+    assert sorted(v['video_id'] for v in videos) == ["v1", "v2"]
+    # --resume doit ré-énumérer la playlist dont toutes les clés ont échoué
+    assert set(ManifesteRun.charger(manifeste.chemin).etats_playlists) == {"PLok"}
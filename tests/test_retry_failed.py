@@ -0,0 +1,51 @@
+"""
+Tests du gestionnaire de retry : les échecs écrits après le démarrage du service doivent être réessayés.
+"""
+import time
+
+import pytest
+
+import retry_failed
+
+
+class _Arret(Exception):
+    """Interrompt la boucle infinie de executer_retry."""
+
+
+def test_echec_ecrit_apres_demarrage_est_reessaye(mongo, monkeypatch):
+    reessayees = []
+    attentes = []
+
+    def _telecharger(video_info):
+        reessayees.append(video_info["video_id"])
+        return {"status": "success"}
+
+    def _dormir(duree):
+        attentes.append(duree)
+        if len(attentes) == 1:
+            # Echec journalisé par le scraper (_marquer_echec) pendant que le service tourne : pas de next_retry_at
+            retry_failed._logs().insert_one({"video_id": "tardive", "url": "https://www.youtube.com/watch?v=tardive",
+                        "status": "failed", "timestamp": time.time()})
+        else:
+            raise _Arret()
+
+    monkeypatch.setattr(retry_failed, "telecharger_video_savetube", _telecharger)
+    monkeypatch.setattr(retry_failed, "demarrer_metriques", lambda: None)
+    monkeypatch.setattr(retry_failed.time, "sleep", _dormir)
+
+    with pytest.raises(_Arret):
+        retry_failed.executer_retry()
+
+    assert reessayees == ["tardive"]
+    log = retry_failed._logs().find_one({"video_id": "tardive"})
+    assert log["status"] == "success"
+    assert log["retry_attempts"] == 1
+    assert log["next_retry_at"] > time.time()
+
+
+def test_echec_sans_echeance_est_du(mongo):
+    retry_failed._logs().insert_many([
+        {"video_id": "a", "url": "u", "status": "failed"},
+        {"video_id": "b", "url": "u", "status": "failed", "next_retry_at": time.time() + 3600},
+    ])
+    assert [e["video_id"] for e in retry_failed.recuperer_echecs_dus()] == ["a"]
@@ -0,0 +1,33 @@
+"""
+Tests du traitement des vidéos déjà connues (MongoDB) ou dont le MP3 existe localement :
+le statut renvoyé au pipeline doit refléter le résultat de l'upload MinIO.
+"""
+import pytest
+
+import scraper
+
+
+@pytest.fixture
+def video(monkeypatch, tmp_path):
+    monkeypatch.setattr(scraper, "AUDIO_DIR", str(tmp_path))
+    (tmp_path / "vid1.mp3").write_bytes(b"ID3audio")
+    journal = {"logs": [], "metadata": []}
+    monkeypatch.setattr(scraper, "insert_log", journal["logs"].append)
+    monkeypatch.setattr(scraper, "enregistrer_metadata", journal["metadata"].append)
+    monkeypatch.setattr(scraper, "audio_connu", lambda video_id: False)
+    return {"video_id": "vid1", "url": "https://www.youtube.com/watch?v=vid1", "status": "pending"}, journal
+
+
+@pytest.mark.parametrize("connue", [True, False])
+@pytest.mark.parametrize("upload, statut", [("vid1.mp3", "success"), (False, "failed")])
+def test_statut_suit_le_resultat_de_l_upload(video, monkeypatch, connue, upload, statut):
+    video_info, journal = video
+    monkeypatch.setattr(scraper, "video_connue", lambda video_id: connue)
+    monkeypatch.setattr(scraper, "uploader_audio", lambda *args, **kwargs: upload)
+
+    assert scraper._traiter_video_connue(video_info) is True
+    assert video_info["status"] == statut
+    # Un échec est journalisé pour le service de retry, sans métadonnées de succès
+    assert [log["status"] for log in journal["logs"]] == (["failed"] if statut == "failed" else [])
+    if statut == "failed":
+        assert journal["metadata"] == []
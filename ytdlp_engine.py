@@ -0,0 +1,137 @@
+"""
+Moteur yt-dlp en processus pour le projet Youtube-Fon-Scrapping.
+
+Ce module remplace l'appel du binaire yt-dlp (un sous-processus par vidéo) par l'API Python yt_dlp :
+- Une instance YoutubeDL réutilisée par thread (les extracteurs ne sont initialisés qu'une fois ;
+  YoutubeDL n'étant pas thread-safe, chaque thread worker possède la sienne)
+- Téléchargement du meilleur flux audio dans son conteneur natif (opus/webm, m4a...) sans ré-encodage
+- Transcodage MP3 optionnel via ffmpeg, soit en post-traitement yt-dlp, soit séparément (transcoder_mp3)
+  pour être exécuté dans un pool de processus par le pipeline du scraper
+- Renvoi du chemin, de l'extension et du codec réels du fichier obtenu
+
+Variables d'environnement utilisées :
+- YTDLP_FORMAT : Sélecteur de format yt-dlp (défaut "bestaudio/best")
+- YTDLP_TRANSCODE_MP3 : "1" pour convertir en MP3 (ancien comportement), "0" pour garder le format natif
+- YTDLP_MP3_QUALITY : Qualité VBR de l'encodeur MP3 (0 = meilleure, 9 = plus faible ; 5 comme yt-dlp)
+"""
+import os
+import subprocess
+import threading
+import mimetypes
+from dotenv import load_dotenv
+
+load_dotenv()
+
+YTDLP_FORMAT = os.getenv("YTDLP_FORMAT", "bestaudio/best")
+YTDLP_TRANSCODE_MP3 = os.getenv("YTDLP_TRANSCODE_MP3", "0") == "1"
+YTDLP_MP3_QUALITY = os.getenv("YTDLP_MP3_QUALITY", "5")
+
+# Types MIME des conteneurs audio produits par YouTube / yt-dlp
+CONTENT_TYPES = {
+    "mp3": "audio/mpeg",
+    "m4a": "audio/mp4",
+    "webm": "audio/webm",
+    "opus": "audio/ogg",
+    "ogg": "audio/ogg",
+}
+
+_instances = threading.local()
+
+
+def _get_ydl(output_dir, transcoder_mp3):
+    """
+    Retourne l'instance YoutubeDL du thread courant pour cette configuration, créée au premier usage.
+    Args:
+        output_dir (str): Dossier de sortie des fichiers audio.
+        transcoder_mp3 (bool): Ajoute le post-traitement de conversion MP3 si True.
+    Returns:
+        yt_dlp.YoutubeDL: instance réutilisable.
+    """
+    import yt_dlp
+    cles = getattr(_instances, "ydl", None)
+    if cles is None:
+        cles = _instances.ydl = {}
+    cle = (output_dir, transcoder_mp3)
+    if cle not in cles:
+        options = {
+            "format": YTDLP_FORMAT,
+            "outtmpl": os.path.join(output_dir, "%(id)s.%(ext)s"),
+            "noplaylist": True,
+            "quiet": True,
+            "no_warnings": True,
+            "noprogress": True,
+        }
+        if transcoder_mp3:
+            options["postprocessors"] = [{"key": "FFmpegExtractAudio", "preferredcodec": "mp3"}]
+        cles[cle] = yt_dlp.YoutubeDL(options)
+    return cles[cle]
+
+
+def content_type_pour(extension):
+    """
+    Retourne le type MIME correspondant à une extension audio.
+    Args:
+        extension (str): Extension sans le point (mp3, m4a, webm...).
+    Returns:
+        str: Type MIME.
+    """
+    return CONTENT_TYPES.get(extension) or mimetypes.guess_type(f"x.{extension}")[0] or "application/octet-stream"
+
+
+def telecharger_audio(url, output_dir, transcoder_mp3=YTDLP_TRANSCODE_MP3):
+    """
+    Télécharge l'audio d'une vidéo dans son format natif (ou en MP3 si demandé).
+    Args:
+        url (str): URL de la vidéo YouTube.
+        output_dir (str): Dossier de sortie.
+        transcoder_mp3 (bool): Convertit en MP3 si True.
+    Returns:
+        dict: path, extension, codec, abr (kbit/s), content_type du fichier obtenu.
+    Raises:
+        yt_dlp.utils.DownloadError: si le téléchargement échoue.
+    """
+    ydl = _get_ydl(output_dir, transcoder_mp3)
+    info = ydl.extract_info(url, download=True)
+    if transcoder_mp3:
+        path = os.path.splitext(ydl.prepare_filename(info))[0] + ".mp3"
+        codec = "mp3"
+    else:
+        telechargements = info.get("requested_downloads") or [{}]
+        path = telechargements[0].get("filepath") or ydl.prepare_filename(info)
+        codec = info.get("acodec")
+    extension = os.path.splitext(path)[1].lstrip(".")
+    return {
+        "path": path,
+        "extension": extension,
+        "codec": codec,
+        "abr": info.get("abr"),
+        "content_type": content_type_pour(extension),
+    }
+
+
+def transcoder_mp3(path, supprimer_source=True):
+    """
+    Convertit un fichier audio en MP3 avec ffmpeg. Fonction de module (sérialisable) destinée
+    à être soumise à un ProcessPoolExecutor.
+    Args:
+        path (str): Chemin du fichier audio source.
+        supprimer_source (bool): Supprime le fichier source après une conversion réussie.
+    Returns:
+        dict: path, extension, codec, abr (None, débit variable), content_type du fichier MP3.
+    Raises:
+        subprocess.CalledProcessError: si ffmpeg échoue.
+    """
+    sortie = os.path.splitext(path)[0] + ".mp3"
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-i", path, "-vn", "-codec:a", "libmp3lame", "-q:a", YTDLP_MP3_QUALITY, sortie],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    if supprimer_source and os.path.abspath(sortie) != os.path.abspath(path):
+        os.remove(path)
+    return {
+        "path": sortie,
+        "extension": "mp3",
+        "codec": "mp3",
+        "abr": None,
+        "content_type": content_type_pour("mp3"),
+    }